@@ -0,0 +1,181 @@
+# Description: Batch mode - run CodeWeave over many inputs listed in a manifest.
+
+import json
+import logging
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+from codeweave.main import (
+    close_archive,
+    determine_if_url_zip_or_folder,
+    fetch_repo_archive,
+    repo_is_tar,
+    run_codeweave,
+)
+
+# Optional YAML support for manifests
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+
+def load_manifest(path):
+    """Load a batch manifest and return its entries as a list of dicts.
+
+    The manifest is either a list of entries, or a mapping with an 'entries'
+    list and optional 'defaults' applied to every entry. An entry is an input
+    string (URL, zip, tarball or folder) or a mapping with an 'input' key plus
+    any other command line option, e.g. {"input": "...", "lang": "python"}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            if not YAML_AVAILABLE:
+                raise RuntimeError("YAML manifests require PyYAML: pip install pyyaml")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if isinstance(manifest, list):
+        defaults, entries = {}, manifest
+    else:
+        defaults, entries = manifest.get('defaults', {}), manifest.get('entries', [])
+    return [{**defaults, **({'input': entry} if isinstance(entry, str) else entry)} for entry in entries]
+
+
+def entry_to_argv(entry):
+    """Translate a manifest entry into command line arguments.
+
+    Keys are option names as spelled on the command line, without the
+    leading dashes. True adds a flag, False/None leave it out and lists are
+    joined with commas.
+    """
+    argv = [entry['input']] if entry.get('input') else []
+    for key, value in entry.items():
+        if key == 'input' or value is False or value is None:
+            continue
+        option = f"--{key}"
+        if value is True:
+            argv.append(option)
+        elif isinstance(value, (list, tuple)):
+            argv.extend([option, ','.join(str(item) for item in value)])
+        else:
+            argv.extend([option, str(value)])
+    return argv
+
+
+def _strip_batch_option(argv):
+    """Remove --batch (and its value) from argv, keeping the other options."""
+    stripped = []
+    skip_value = False
+    for arg in argv:
+        if skip_value:
+            skip_value = False
+        elif arg == '--batch':
+            skip_value = True
+        elif not arg.startswith('--batch='):
+            stripped.append(arg)
+    return stripped
+
+
+def _needs_prefetch(args):
+    """Zip archives of --repo entries can be downloaded ahead of processing."""
+    return bool(args.repo) and not repo_is_tar(args) and not args.remote_zip
+
+
+def prefetch_archive(args):
+    """Download the archive of a --repo entry and keep it open on args.archive."""
+    args.archive_file = fetch_repo_archive(args, show_progress=False)
+    args.archive = zipfile.ZipFile(args.archive_file, 'r')
+
+
+def run_batch(manifest_path, argv, parser):
+    """Run every entry of a batch manifest in this process.
+
+    Options given on the command line next to --batch apply to every entry
+    and entries may override them. Repository archives are downloaded by a
+    bounded pool of threads over the shared HTTP session, at most
+    --batch-concurrency ahead of the entry being processed. Entries are
+    processed one at a time, and a failing entry is reported in the final
+    summary without stopping the batch.
+
+    Returns:
+        List of output file paths of the entries that succeeded
+    """
+    console = Console()
+    base_argv = _strip_batch_option(argv)
+    entries = load_manifest(manifest_path)
+    concurrency = max(1, parser.parse_args(argv).batch_concurrency)
+
+    jobs = []
+    for entry in entries:
+        label = entry.get('input') or '<missing input>'
+        try:
+            args = parser.parse_args(base_argv + entry_to_argv(entry))
+            if args.input:
+                determine_if_url_zip_or_folder(args)
+            jobs.append((label, args, None))
+        except (Exception, SystemExit) as e:
+            jobs.append((label, None, e))
+
+    console.print(f"[bold blue]Batch:[/bold blue] {len(jobs)} entries from {manifest_path}")
+
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {}
+        next_prefetch = 0
+        for index, (label, args, error) in enumerate(jobs):
+            # Keep up to `concurrency` downloads running ahead of this entry
+            while next_prefetch < len(jobs) and next_prefetch <= index + concurrency:
+                prefetch_args = jobs[next_prefetch][1]
+                if prefetch_args is not None and _needs_prefetch(prefetch_args):
+                    futures[next_prefetch] = pool.submit(prefetch_archive, prefetch_args)
+                next_prefetch += 1
+
+            console.rule(f"[bold]{index + 1}/{len(jobs)}[/bold] {label}")
+            try:
+                if error is not None:
+                    raise error
+                if index in futures:
+                    futures.pop(index).result()
+                output_file_path = run_codeweave(args, parser)
+                results.append((label, output_file_path, None))
+            except (Exception, SystemExit) as e:
+                if isinstance(e, SystemExit):
+                    message = f"exited with status {e.code} (see log above)"
+                else:
+                    message = f"{type(e).__name__}: {e}"
+                logging.error(f"Batch entry {label} failed: {message}")
+                results.append((label, None, message))
+            finally:
+                if args is not None:
+                    close_archive(args)
+
+    display_batch_summary(results, console)
+
+    if any(error for _, _, error in results):
+        sys.exit(1)
+    return [output for _, output, _ in results]
+
+
+def display_batch_summary(results, console=None):
+    """Display a table with the outcome of every batch entry."""
+    console = console or Console()
+    table = Table(title="Batch Summary", show_header=True, header_style="bold magenta")
+    table.add_column("Entry", style="cyan")
+    table.add_column("Status")
+    table.add_column("Output / Error")
+    for label, output, error in results:
+        if error:
+            table.add_row(label, "[red]✗ failed[/red]", error)
+        else:
+            table.add_row(label, "[green]✓ ok[/green]", str(output))
+    console.print(table)
+    failed = sum(1 for _, _, error in results if error)
+    if failed:
+        console.print(f"[red]{failed} of {len(results)} entries failed[/red]")
@@ -1,13 +1,15 @@
 import os
 import sys
-import requests
 import zipfile
-import io
 import logging
 import argparse
 import subprocess
+import contextlib
+import pickle
+import itertools
+from collections import Counter
+from types import MappingProxyType
 from tqdm.auto import tqdm
-from pdfminer.high_level import extract_text
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, TimeRemainingColumn
 from rich.panel import Panel
@@ -18,17 +20,47 @@ from rich import print as rprint
 from rich.prompt import Prompt, Confirm
 
 from codeweave.utils.path import (
-    should_exclude_file,
-    inclusion_violate,
     extract_git_folder,
-    is_test_file,
-    is_file_type,
-    is_likely_useful_file,
     lookup_file_extension,
     file_extension_dict,
 )
-from codeweave.utils.file import has_sufficient_content, remove_comments_and_docstrings
-from codeweave.utils.jupyter import convert_ipynb_to_py
+from codeweave.utils.filters import FilterPlan
+from codeweave.utils.languages import LANGUAGE_PROFILES, load_profiles, profile_excluded_dirs
+from codeweave.utils.file import IndicatorMatcher, analyze_content, analyze_pages, remove_comments_and_docstrings
+from codeweave.utils.jupyter import NBCONVERT_AVAILABLE, convert_ipynb_to_py, notebook_to_source
+from codeweave.utils.walk import FileEntry, list_git_files, walk_files, walk_order_key
+from codeweave.utils.watch import create_watcher, DEFAULT_POLL_INTERVAL
+from codeweave.utils.gitignore import GitIgnore, load_root_excludes
+from codeweave.utils.cache import open_transform_cache, DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB
+from codeweave.utils.sniff import BinarySniffer
+from codeweave.utils.strip import PYTHON_SYNTAX, comment_syntax, parse_strip_languages, strip_comments
+from codeweave.utils.budget import TokenBudget
+from codeweave.utils.dedup import Deduplicator
+from codeweave.utils.audit import FilterAudit, audit_path, timed
+from codeweave.utils.pipeline import OrderedPipeline, resolve_jobs
+from codeweave.utils.pdf import PDF_TEXT_TRANSFORM, DEFAULT_PDF_TIMEOUT, PdfOptions, PdfTimeout, extract_pdf_pages, parse_page_ranges, split_pages
+from codeweave.utils.manifest import OutputManifest, hash_bytes, hash_file, settings_fingerprint
+from codeweave.utils.download import (
+    ArchiveCache,
+    download_archive,
+    get_session,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MAX_SIZE_MB,
+    DEFAULT_HTTP_TIMEOUT,
+)
+from codeweave.utils.remote_zip import open_remote_zip
+from codeweave.utils.archive import (
+    is_tar_path,
+    iter_tar_members,
+    iter_zip_members,
+    open_tar_stream,
+    strip_archive_suffix,
+    zip_member_reader,
+)
+
+# Seconds to wait for further changes after one is seen in --watch mode
+WATCH_DEBOUNCE = 0.2
 
 # Common binary file extensions
 BINARY_EXTENSIONS = {
@@ -67,6 +99,118 @@ def setup_logging(debug_flag):
         handlers=[RichHandler(rich_tracebacks=True)]
     )
 
+def repo_archive_url(args):
+    """Return the archive URL for args.repo at args.branch_or_tag.
+    
+    A --repo that already points at a .zip or tarball is used as is.
+    """
+    if is_tar_path(args.repo) or args.repo.lower().endswith('.zip'):
+        return args.repo
+    archive_format = getattr(args, 'archive_format', None) or 'zip'
+    return f"{args.repo}/archive/refs/heads/{args.branch_or_tag}.{archive_format}"
+
+def repo_is_tar(args):
+    """Check if the repository archive is fetched as a tarball."""
+    return bool(args.repo) and is_tar_path(repo_archive_url(args))
+
+@contextlib.contextmanager
+def open_tar_input(args):
+    """Yield (fileobj, name) for the tarball named by --tar or --repo.
+    
+    '-' reads the tarball from stdin, e.g. `git archive HEAD | codeweave -`.
+    Uncached repository tarballs are decompressed straight off the socket.
+    """
+    if args.tar == '-':
+        yield sys.stdin.buffer, ''
+    elif args.tar:
+        with open(args.tar, 'rb') as f:
+            yield f, args.tar
+    elif getattr(args, 'no_cache', True) and not getattr(args, 'offline', False):
+        download_url = repo_archive_url(args)
+        logging.info(f"Download URL: {download_url}")
+        with get_session().get(download_url, stream=True, timeout=DEFAULT_HTTP_TIMEOUT) as response:
+            if response.status_code != 200:
+                logging.error(f"Failed to download the repository. Status code: {response.status_code}")
+                sys.exit(1)
+            response.raw.decode_content = True
+            yield response.raw, download_url
+    else:
+        with fetch_repo_archive(args) as f:
+            yield f, repo_archive_url(args)
+
+def fetch_repo_archive(args, show_progress=True):
+    """Fetch the archive of a GitHub repository and return an open binary file.
+    
+    Archives are kept in the on-disk archive cache unless --no-cache is given,
+    so unchanged repositories only cost a conditional request.
+    """
+    download_url = repo_archive_url(args)
+
+    logging.info(f"Download URL: {download_url}")
+    chunk_size = getattr(args, 'chunk_size', None) or DEFAULT_CHUNK_SIZE
+
+    if getattr(args, 'no_cache', True):
+        if getattr(args, 'offline', False):
+            logging.error("--offline requires the archive cache; drop --no-cache")
+            sys.exit(1)
+        status_code, archive = download_archive(download_url, chunk_size=chunk_size, session=get_session(),
+                                                show_progress=show_progress)
+    else:
+        cache = ArchiveCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+        # Pinned until opened, so another batch thread cannot evict it in between
+        with cache.pin(download_url):
+            status_code, archive_path = cache.fetch(download_url, chunk_size=chunk_size, session=get_session(),
+                                                    offline=args.offline, refresh=args.refresh,
+                                                    show_progress=show_progress)
+            # Cached archives are opened in place and stay on disk for the next run
+            archive = open(archive_path, 'rb') if archive_path else None
+
+    if archive is None:
+        if getattr(args, 'offline', False):
+            logging.error(f"Repository archive is not cached and --offline was given: {download_url}")
+        else:
+            logging.error(f"Failed to download the repository. Status code: {status_code}")
+        sys.exit(1)
+    return archive
+
+def open_archive(args):
+    """Return the ZipFile for a --repo or --zip input, opening it once per run.
+    
+    The handle is kept on args.archive so the interactive scan pass and the
+    processing pass share a single download and central directory read.
+    Call close_archive(args) once processing is finished.
+    """
+    if getattr(args, 'archive', None) is not None:
+        return args.archive
+    if args.repo and getattr(args, 'remote_zip', False) and not getattr(args, 'offline', False):
+        # Only the central directory and the selected members are fetched
+        args.archive = open_remote_zip(repo_archive_url(args), get_session())
+        if args.archive is not None:
+            args.archive_file = args.archive.fp
+            return args.archive
+        logging.info("Falling back to downloading the whole archive")
+    if args.repo:
+        args.archive_file = fetch_repo_archive(args)
+    else:
+        args.archive_file = open(args.zip, 'rb')
+    try:
+        args.archive = zipfile.ZipFile(args.archive_file, 'r')
+    except BaseException:
+        close_archive(args)
+        raise
+    return args.archive
+
+def close_archive(args):
+    """Close the archive opened by open_archive (removing a spooled download)."""
+    archive = getattr(args, 'archive', None)
+    archive_file = getattr(args, 'archive_file', None)
+    args.archive = None
+    args.archive_file = None
+    if archive is not None:
+        archive.close()
+    if archive_file is not None:
+        archive_file.close()
+
 def download_repo(args, output_file_path, scan_only=False):
     """Download and process files from a GitHub repository.
     
@@ -75,38 +219,17 @@ def download_repo(args, output_file_path, scan_only=False):
         output_file_path: Path to write output
         scan_only: If True, only scan for extensions without processing files
     """
-    import tempfile
-    
-    download_url = f"{args.repo}/archive/refs/heads/{args.branch_or_tag}.zip"
-
-    logging.info(f"Download URL: {download_url}")
-    response = requests.get(download_url)
-
-    if response.status_code == 200:
-        # Save to temporary file in /tmp
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.zip', dir='/tmp', delete=False) as temp_zip:
-            temp_zip.write(response.content)
-            temp_path = temp_zip.name
-            logging.debug(f"Downloaded ZIP saved to temporary file: {temp_path}")
-        
-        # Process the ZIP file
-        with zipfile.ZipFile(temp_path, 'r') as zip_obj:
-            collected_extensions = set()
-            process_zip_object(zip_obj, args, output_file_path, collected_extensions, scan_only)
-            args.collected_extensions = collected_extensions
-        
-        # Note: We don't delete the temp file - let the OS clean it up from /tmp
-        logging.debug("Temporary ZIP file left in /tmp for OS cleanup")
-    else:
-        logging.error(f"Failed to download the repository. Status code: {response.status_code}")
-        sys.exit(1)
+    zip_obj = open_archive(args)
+    collected_extensions = set()
+    process_zip_object(zip_obj, args, output_file_path, collected_extensions, scan_only)
+    args.collected_extensions = collected_extensions
 
-def process_zip(args: argparse.Namespace, output_file_path=None):
+def process_zip(args: argparse.Namespace, output_file_path=None, scan_only=False):
     """Process files from a local .zip file."""
-    with zipfile.ZipFile(args.zip, 'r') as zip_obj:
-        collected_extensions = set()
-        process_zip_object(zip_obj, args, output_file_path, collected_extensions)
-        args.collected_extensions = collected_extensions
+    zip_obj = open_archive(args)
+    collected_extensions = set()
+    process_zip_object(zip_obj, args, output_file_path, collected_extensions, scan_only)
+    args.collected_extensions = collected_extensions
 
 def process_zip_object(zip_obj, args: argparse.Namespace, output_file_path=None, collected_extensions=None, scan_only=False):
     """Process files from a local .zip file.
@@ -118,10 +241,68 @@ def process_zip_object(zip_obj, args: argparse.Namespace, output_file_path=None,
         collected_extensions: Set to collect file extensions
         scan_only: If True, only scan for extensions without processing files
     """
+    gitignore = None
+    if not getattr(args, 'no_gitignore', False):
+        # The central directory lists every member, so all .gitignore files
+        # can be compiled before the first member is matched
+        gitignore = GitIgnore()
+        for info in zip_obj.infolist():
+            if not info.is_dir() and info.filename.rpartition('/')[2] == '.gitignore':
+                gitignore.add(info.filename.rpartition('/')[0],
+                              zip_obj.read(info).decode('utf-8', errors='replace'))
+    process_archive_members(iter_zip_members(zip_obj), args, output_file_path, collected_extensions,
+                            scan_only, total=len(zip_obj.infolist()), gitignore=gitignore, rankable=True,
+                            zip_path=local_zip_path(zip_obj))
+
+def process_tar(args: argparse.Namespace, output_file_path=None, scan_only=False):
+    """Process files from a tarball in a single forward streaming pass."""
+    collected_extensions = set()
+    with open_tar_input(args) as (fileobj, name):
+        with open_tar_stream(fileobj, name) as tar:
+            gitignore = None if getattr(args, 'no_gitignore', False) else GitIgnore()
+            process_archive_members(iter_tar_members(tar), args, output_file_path, collected_extensions,
+                                    scan_only, description="Processing tar members", gitignore=gitignore)
+    args.collected_extensions = collected_extensions
+
+def process_archive_members(members, args: argparse.Namespace, output_file_path=None, collected_extensions=None,
+                            scan_only=False, total=None, description="Processing zip files", gitignore=None,
+                            rankable=False, zip_path=None):
+    """Process the members of a zip or tar archive.
+    
+    Args:
+        members: Iterable of (path, size, read) tuples, see codeweave.utils.archive
+        args: Command line arguments
+        output_file_path: Path to write output
+        collected_extensions: Set to collect file extensions
+        scan_only: If True, only scan for extensions without processing files
+        total: Number of members, if known, for the progress bar
+        description: Initial progress bar description
+        gitignore: Optional GitIgnore used to skip ignored members. .gitignore
+            members met along the way are added to it, so a streamed tarball
+            applies each file's rules to the members that follow it
+        rankable: The members can be read in any order, so with a token
+            budget they are ranked first (zip). Otherwise the budget is
+            applied in stream order (tar)
+        zip_path: Path of the zip archive on disk, if any. With --jobs,
+            members are then read and transformed by worker processes that
+            each open the archive themselves
+    """
     console = Console()
     
     if collected_extensions is None:
         collected_extensions = set()
+    extension_counts = Counter()
+    filter_plan = FilterPlan.from_args(args)
+    budget = args.token_budget = None if scan_only else TokenBudget.from_args(args)
+    dedup = args.deduplicator = None if scan_only else Deduplicator.from_args(args)
+    audit = None if scan_only else getattr(args, 'filter_audit', None)
+    preselected = budget is not None and rankable
+    if preselected:
+        # Rank the selected members before any of them is read
+        candidates = [(path, size, (path, size, read)) for path, size, read in members
+                      if not path.endswith('/') and filter_plan.selects(path, audit, size)]
+        total = len(candidates)
+        members = (member for _, _, member in budget.ranked(candidates))
     
     # Use args.output_file_path if output_file_path is not provided
     if output_file_path is None and hasattr(args, "output_file_path"):
@@ -137,6 +318,10 @@ def process_zip_object(zip_obj, args: argparse.Namespace, output_file_path=None,
         else:
             console.print("[red]Invalid program format, ignoring --program option[/red]")
             
+    # Members are read and transformed in worker processes when the archive
+    # can be reopened by each of them; tar streams are always read in order
+    jobs = 1 if scan_only or zip_path is None else resolve_jobs(getattr(args, 'jobs', 1))
+    
     with open(output_file_path, "w", encoding="utf-8") as outfile:
         with Progress(
             SpinnerColumn(),
@@ -146,135 +331,305 @@ def process_zip_object(zip_obj, args: argparse.Namespace, output_file_path=None,
             TimeRemainingColumn(),
             console=console
         ) as progress:
-            task = progress.add_task("Processing zip files", total=len(zip_obj.namelist()))
+            task = progress.add_task(description, total=total)
             
-            for file_path in zip_obj.namelist():
-                progress.update(task, description=f"Processing: {os.path.basename(file_path)[:30]}...")
+            def write_member(key, result):
+                """Write one member's section; called in archive order."""
+                (file_path, file_size), (section, report) = key, result
+                merge_worker_report(args, report)
+                duplicate = None
+                if section is not None and dedup is not None:
+                    # Duplicates are found from the whole body, so a PDF's pages are joined
+                    section, fingerprint, duplicate = timed(audit, 'duplicate', dedup.replace, section_text(section))
+                if section is None:
+                    pass
+                elif budget is not None and not budget.accept(file_path, sum(map(len, section_parts(section)))):
+                    if audit is not None:
+                        audit.skip('token budget', file_path, file_size)
+                else:
+                    outfile.writelines(section_parts(section))
+                    if dedup is not None:
+                        dedup.record(fingerprint, duplicate)
+                    record_written(audit, file_path, file_size, duplicate)
+                progress.advance(task)
+            
+            with OrderedPipeline(write_member, jobs, init_render_worker, (render_worker_state(args),)) as pipeline:
+                for file_path, file_size, read_member in members:
+                    progress.update(task, description=f"Processing: {os.path.basename(file_path)[:30]}...")
                 
-                # During scan mode, we want to collect all extensions (skip directories only)
-                if not scan_only:
-                    if (file_path.endswith("/")
-                        or not is_file_type(file_path, args.lang)
-                        or not is_likely_useful_file(file_path, args.lang, args)
-                        or should_exclude_file(file_path, args)):
-                        progress.advance(task)
-                        continue
-
-                    if args.include:
-                        confirm_include = any(include in file_path for include in args.include)
-                        if not confirm_include:
-                            logging.debug(f"Skipping file: {file_path}")
+                    if gitignore is not None and not file_path.endswith("/"):
+                        base_dir, _, name = file_path.rpartition('/')
+                        if name == '.gitignore' and base_dir not in gitignore.files:
+                            ignore_bytes = read_member()
+                            gitignore.add(base_dir, ignore_bytes.decode('utf-8', errors='replace'))
+                            read_member = lambda limit=-1, data=ignore_bytes: data[:limit] if limit >= 0 else data
+                        if timed(audit, 'gitignore', gitignore.is_path_ignored, file_path):
+                            logging.debug(f"Skipping ignored file: {file_path}")
+                            if audit is not None:
+                                audit.skip('gitignore', file_path, file_size)
+                            progress.advance(task)
+                            continue
+                
+                    # During scan mode, we want to collect all extensions (skip directories only)
+                    if not scan_only:
+                        if file_path.endswith("/") or not (preselected or filter_plan.selects(file_path, audit, file_size)):
                             progress.advance(task)
                             continue
                     else:
-                        # Default to include
-                        confirm_include = True
-                    if not confirm_include:
-                        progress.advance(task)
-                        continue
-                else:
-                    # In scan mode, skip directories only
-                    if file_path.endswith("/"):
-                        progress.advance(task)
-                        continue
+                        # In scan mode, skip directories only
+                        if file_path.endswith("/"):
+                            progress.advance(task)
+                            continue
 
-                logging.debug(f"Processing file: {file_path}")
+                    logging.debug(f"Processing file: {file_path}")
                 
-                # Collect file extension
-                _, ext = os.path.splitext(file_path)
-                if ext:
-                    collected_extensions.add(ext.lower())
+                    # Collect file extension
+                    _, ext = os.path.splitext(file_path)
+                    if ext:
+                        collected_extensions.add(ext.lower())
+                        extension_counts[ext.lower()] += 1
                 
-                # If we're only scanning for extensions, skip the rest
-                if scan_only:
-                    progress.advance(task)
-                    continue
-                
-                # --- Run program on specific filetype if requested ---
-                program_output = None
-                if program_filetype and program_command:
-                    # For zip files, we need to extract the file to a temporary location to run the program
-                    if program_filetype in lookup_file_extension(file_path) or program_filetype == '*':
-                        # Create a temporary file
-                        import tempfile
-                        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                            temp_file.write(zip_obj.read(file_path))
-                            temp_path = temp_file.name
-                        
-                        # Run the program on the temporary file
-                        program_output = run_program_on_file(temp_path, program_command)
-                        logging.debug(f"Program output for {file_path}: {program_output}")
-                        
-                        # Clean up the temporary file
-                        os.unlink(temp_path)
-                        
-                        # Need to re-read the file since we've consumed it
-                        zip_obj.open(file_path)
+                    # If we're only scanning for extensions, skip the rest
+                    if scan_only:
+                        progress.advance(task)
+                        continue
                 
-                # Skip binary files (except PDF which has special handling)
-                if is_binary_file(file_path) and not (file_path.endswith('.pdf') and 'pdf' in args.lang):
-                    logging.debug(f"Skipping binary file: {file_path}")
-                    progress.advance(task)
-                    continue
+                    if budget is not None:
+                        if budget.remaining <= 0:
+                            logging.info("Token budget exhausted; not reading the remaining members")
+                            break
+                        if not budget.admits(file_path, file_size):
+                            if audit is not None:
+                                audit.skip('token budget', file_path, file_size)
+                            progress.advance(task)
+                            continue
                 
-                if file_path.endswith('.pdf') and 'pdf' in args.lang:
-                    if args.pdf_text_mode:
-                        file_content = extract_text(io.BytesIO(zip_obj.read(file_path)))
-                        logging.debug(f"Extracted text from PDF: {file_path}")
-                    else:
-                        # Just indicate this is a PDF file but don't extract text
-                        file_content = "[PDF file - use --pdf_text_mode to extract text]"
-                elif file_path.endswith('.ipynb') and args.ipynb_nbconvert:
-                    file_content = zip_obj.read(file_path).decode("utf-8")
-                    file_content = convert_ipynb_to_py(file_content)
-                else:
-                    try:
-                        file_content = zip_obj.read(file_path).decode("utf-8")
-                    except UnicodeDecodeError:
-                        logging.debug(f"Skipping file due to encoding issues: {file_path}")
+                    # Skip binary files (except PDF which has special handling)
+                    if (timed(audit, 'binary extension', is_binary_file, file_path)
+                            and not (file_path.endswith('.pdf') and 'pdf' in args.lang)):
+                        logging.debug(f"Skipping binary file: {file_path}")
+                        if audit is not None:
+                            audit.skip('binary extension', file_path, file_size)
                         progress.advance(task)
                         continue
+                
+                    if pipeline.parallel or (zip_path is not None and extracts_pdf_text(args, file_path)):
+                        # Each worker reads the member through its own handle on the archive;
+                        # PDF text is extracted in a worker even without --jobs
+                        pipeline.offload((file_path, file_size), render_member_task, zip_path, file_path, file_size,
+                                         program_filetype, program_command)
+                    elif extracts_pdf_text(args, file_path):
+                        pipeline.offload((file_path, file_size), render_bytes_task, file_path, file_size,
+                                         read_member(), program_filetype, program_command)
+                    else:
+                        pipeline.put((file_path, file_size), (render_archive_member(
+                            file_path, file_size, read_member, args, program_filetype, program_command), None))
 
-                if any(is_test_file(file_content, lang) for lang in args.lang) or not has_sufficient_content(file_content):
-                    progress.advance(task)
-                    continue
-                if "python" in args.lang and not args.keep_comments:
-                    try:
-                        file_content = remove_comments_and_docstrings(file_content)
-                    except SyntaxError:
-                        progress.advance(task)
-                        continue
+    if scan_only:
+        args.extension_counts = extension_counts
 
-                comment_prefix = "// " if any(lang in ["go", "js"] for lang in args.lang) else "# "
-                outfile.write(f"{comment_prefix}File: {file_path}\n")
-                
-                # If the program ran on this file, handle the output according to --nosubstitute flag
-                if program_output:
-                    outfile.write(f"{comment_prefix}Program output:\n")
-                    outfile.write(program_output)
-                    outfile.write("\n\n")
-                    
-                    # If --nosubstitute is provided, include file content as well
-                    # Otherwise (default), only show program output and skip file content
-                    if not args.nosubstitute:
-                        # Skip writing file content since we're substituting with program output
-                        outfile.write("\n\n")
-                        progress.advance(task)
-                        continue
+def render_archive_member(file_path, file_size, read_member, args: argparse.Namespace,
+                          program_filetype=None, program_command=None):
+    """Read and transform one selected archive member.
+    
+    Args:
+        file_path, file_size: Path and size of the member in the archive
+        read_member: read(limit=-1) callable of the member
+        args: Command line arguments
+        program_filetype, program_command: Parsed --program option, if any
+    
+    Returns:
+        The rendered section, or None when the member is skipped after
+        reading it (binary content, test file, too short, undecodable, or
+        not strippable)
+    """
+    audit = getattr(args, 'filter_audit', None)
+    
+    def skipped(rule):
+        if audit is not None:
+            audit.skip(rule, file_path, file_size)
+    
+    # Members are read at most once; tar streams cannot be read twice
+    file_bytes = None
+    
+    # --- Run program on specific filetype if requested ---
+    program_output = None
+    if program_filetype and program_command:
+        # For zip files, we need to extract the file to a temporary location to run the program
+        if program_filetype in lookup_file_extension(file_path) or program_filetype == '*':
+            # Create a temporary file
+            import tempfile
+            file_bytes = read_member()
+            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+                temp_file.write(file_bytes)
+                temp_path = temp_file.name
+            
+            # Run the program on the temporary file
+            program_output = run_program_on_file(temp_path, program_command)
+            logging.debug(f"Program output for {file_path}: {program_output}")
+            
+            # Clean up the temporary file
+            os.unlink(temp_path)
+    
+    # Sniff the first bytes so binary members are never fully read
+    if not (file_path.endswith('.pdf') and 'pdf' in args.lang):
+        sniffer = get_binary_sniffer(args)
+        if (timed(audit, 'binary content', sniffer.check, file_bytes, None, file_path) if file_bytes is not None
+                else timed(audit, 'binary content', sniffer.member_is_binary, read_member, file_path)):
+            skipped('binary content')
+            return None
+    
+    if file_bytes is None:
+        file_bytes = read_member()
+    
+    if file_path.endswith('.pdf') and 'pdf' in args.lang:
+        if args.pdf_text_mode:
+            file_content = timed(audit, 'pdf text', extract_pdf, args, file_path, file_bytes)
+        else:
+            # Just indicate this is a PDF file but don't extract text
+            file_content = "[PDF file - use --pdf_text_mode to extract text]"
+    elif file_path.endswith('.ipynb'):
+        try:
+            file_content = convert_notebook(args, file_bytes)
+        except (ValueError, UnicodeDecodeError):
+            logging.debug(f"Skipping invalid notebook: {file_path}")
+            skipped('invalid notebook')
+            return None
+    else:
+        try:
+            file_content = file_bytes.decode("utf-8")
+        except UnicodeDecodeError:
+            logging.debug(f"Skipping file due to encoding issues: {file_path}")
+            skipped('encoding')
+            return None
 
-                # If topN is specified, show top N lines with a header comment
-                if args.topN:
-                    lines = file_content.splitlines()
-                    top_lines = lines[:args.topN]
-                    outfile.write(f"{comment_prefix}(top {args.topN} lines)\n")
-                    outfile.write('\n'.join(top_lines))
-                    outfile.write("\n\n")
-                    outfile.write(file_content)
-                else:
-                    outfile.write(file_content)
-                    
-                outfile.write("\n\n")
-                progress.advance(task)
+    stats = timed(audit, 'content check', analyze_file_content, args, file_content)
+    if stats.is_test or not stats.is_sufficient():
+        skipped('test file' if stats.is_test else 'insufficient content')
+        return None
+    file_content = strip_file_comments(args, file_path, file_content)
+
+    return render_section(file_path, file_content, args, program_output)
+
+def enumerate_folder(args: argparse.Namespace, on_directory=None):
+    """Return the candidate files of args.folder.
+    
+    Git work trees are listed from the index unless --no-git-index is given,
+    with the untracked files that are not ignored (or all of them with
+    --no-gitignore) unless --tracked-only is given; other folders, or machines without git, fall back to walking the
+    filesystem, which prunes ignored subtrees with the folder's .gitignore
+    files unless --no-gitignore is given. Excluded and
+    hidden directories, including those of the selected languages' profiles
+    (e.g. node_modules for js), are pruned either way.
+    """
+    excluded_dirs = folder_excluded_dirs(args)
+    if not getattr(args, 'no_git_index', True):
+        entries = list_git_files(args.folder, excluded_dirs, include_untracked=not args.tracked_only,
+                                 on_directory=on_directory, exclude_ignored=not args.no_gitignore)
+        if entries is not None:
+            logging.info(f"Listing files from the git index ({len(entries)} candidates)")
+            return entries
+    gitignore = None
+    if not getattr(args, 'no_gitignore', False):
+        gitignore = GitIgnore()
+        load_root_excludes(gitignore, args.folder)
+    return walk_files(args.folder, excluded_dirs, on_directory=on_directory, gitignore=gitignore)
+
+def folder_excluded_dirs(args: argparse.Namespace):
+    """Return the directory names pruned from a folder: --excluded_dirs and the selected profiles' excluded_dirs."""
+    return frozenset(args.excluded_dirs or ()).union(
+        profile_excluded_dirs(args.lang or (), getattr(args, 'language_profiles', None)))
+
+def render_folder_file(entry, args: argparse.Namespace, program_filetype=None, program_command=None, hash_content=False):
+    """Read and transform one selected file of a folder.
+    
+    Args:
+        entry: FileEntry of the file
+        args: Command line arguments
+        program_filetype, program_command: Parsed --program option, if any
+        hash_content: Also return the SHA-256 of the file's bytes
+    
+    Returns:
+        (section, sha256): the rendered section, or None when the file is
+        skipped after reading it (test file, too short, undecodable, or not
+        strippable), and the content hash (None unless hash_content is set)
+    """
+    file_path = entry.path
+    
+    # --- 3) Run program on specific filetype if requested ---
+    program_output = None
+    if program_filetype and program_command:
+        # Check if this file matches the specified filetype
+        extension_keys = lookup_file_extension(file_path)
+        if program_filetype in extension_keys or program_filetype == '*':
+            program_output = run_program_on_file(file_path, program_command)
+            logging.debug(f"Program output for {file_path}: {program_output}")
+
+    audit = getattr(args, 'filter_audit', None)
+    
+    def skipped(rule):
+        if audit is not None:
+            audit.skip(rule, entry.rel_path, entry.stat().st_size)
+    
+    # Now handle PDF extraction, or reading text directly
+    sha256 = None
+    if file_path.endswith('.pdf') and 'pdf' in args.lang:
+        if args.pdf_text_mode:
+            with open(file_path, 'rb') as f:
+                pdf_bytes = f.read()
+            if hash_content:
+                sha256 = hash_bytes(pdf_bytes)
+            file_content = timed(audit, 'pdf text', extract_pdf, args, entry.rel_path, pdf_bytes)
+        else:
+            if hash_content:
+                sha256 = hash_file(file_path)
+            # Just indicate this is a PDF file but don't extract text
+            file_content = "[PDF file - use --pdf_text_mode to extract text]"
+    else:
+        sniffer = get_binary_sniffer(args)
+        key = BinarySniffer.file_key(entry.stat())
+        if sniffer.cached(key):
+            skipped('binary content')
+            return None, hash_file(file_path) if hash_content else None
+        with open(file_path, 'rb') as f:
+            # Sniff the first bytes so binary files are never fully read
+            prefix = f.read(sniffer.size)
+            if timed(audit, 'binary content', sniffer.check, prefix, key, file_path):
+                skipped('binary content')
+                return None, hash_file(file_path) if hash_content else None
+            file_bytes = prefix + f.read()
+        if hash_content:
+            sha256 = hash_bytes(file_bytes)
+        if file_path.endswith('.ipynb'):
+            try:
+                file_content = convert_notebook(args, file_bytes)
+            except (ValueError, UnicodeDecodeError):
+                logging.debug(f"Skipping invalid notebook: {file_path}")
+                skipped('invalid notebook')
+                return None, sha256
+        else:
+            try:
+                file_content = file_bytes.decode('utf-8')
+            except UnicodeDecodeError:
+                logging.debug(f"Skipping file due to encoding issues: {file_path}")
+                skipped('encoding')
+                return None, sha256
+        if '\r' in file_content:
+            # Universal newlines, as when reading in text mode
+            file_content = file_content.replace('\r\n', '\n').replace('\r', '\n')
+
+    # Skip test files or short/empty files
+    stats = timed(audit, 'content check', analyze_file_content, args, file_content)
+    if stats.is_test or not stats.is_sufficient():
+        logging.debug(f'Skipping file: {file_path}')
+        logging.debug('Reason: Test file or insufficient content')
+        skipped('test file' if stats.is_test else 'insufficient content')
+        return None, sha256
+
+    # Optionally remove comments (and Python docstrings)
+    file_content = strip_file_comments(args, file_path, file_content)
+    
+    return render_section(file_path, file_content, args, program_output), sha256
 
 def process_folder(args: argparse.Namespace, output_file_path, scan_only=False):
     """
@@ -292,6 +647,7 @@ def process_folder(args: argparse.Namespace, output_file_path, scan_only=False):
     
     # Initialize collected extensions
     collected_extensions = set()
+    extension_counts = Counter()
     
     # Parse the program argument if provided
     program_filetype = None
@@ -303,6 +659,14 @@ def process_folder(args: argparse.Namespace, output_file_path, scan_only=False):
         else:
             logging.error("Invalid program format, ignoring --program option")
 
+    # Incremental runs splice unchanged files from the previous output, so the
+    # new output is built next to it and only swapped in once complete
+    manifest = None
+    write_path = output_file_path
+    if getattr(args, 'incremental', False) and not scan_only:
+        manifest = OutputManifest.load(output_file_path, settings_fingerprint(args))
+        write_path = output_file_path + '.partial'
+
     # --- 1) Generate a file tree using the 'tree' command, applying exclusions ---
     if args.tree and not scan_only:
         tree_cmd = ['tree']
@@ -356,170 +720,305 @@ def process_folder(args: argparse.Namespace, output_file_path, scan_only=False):
             tree_output = f'Error generating file tree: {e}'
 
         # Write the tree output to our final file (wipe it first)
-        with open(output_file_path, 'w', encoding='utf-8') as outfile:
+        with open(write_path, 'w', encoding='utf-8') as outfile:
             outfile.write(tree_output)
             outfile.write('\n\n')
         logging.info('File tree prepended to output file.')
 
     # --- 2) Process/append actual files that meet your criteria ---
-    from functools import reduce
-    from operator import ior
-    mode = 'a' if args.tree else 'w'
-    
     console = Console()
+    filter_plan = FilterPlan.from_args(args)
+    budget = args.token_budget = None if scan_only else TokenBudget.from_args(args)
+    dedup = args.deduplicator = None if scan_only else Deduplicator.from_args(args)
+    audit = None if scan_only else getattr(args, 'filter_audit', None)
     
-    # Count total files for progress tracking
-    total_files = sum(len(files) for _, _, files in os.walk(args.folder))
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        TimeRemainingColumn(),
-        console=console
-    ) as progress:
-        folder_task = progress.add_task("Scanning folders", total=None)
-        file_task = progress.add_task("Processing files", total=total_files)
-        
-        processed_files = 0
-        
-        for root, dirs, files in os.walk(args.folder):
-            progress.update(folder_task, description=f"Scanning: {os.path.basename(root) or 'root'}")
-            logging.debug(f'In folder: {root}')
+    # The output is opened once, on the first section, in binary mode so that
+    # section offsets can be recorded in the manifest
+    outfile = None
+    previous_output = None
+    if manifest is not None and manifest.previous:
+        previous_output = open(output_file_path, 'rb')
+    
+    def get_outfile():
+        nonlocal outfile
+        if outfile is None:
+            outfile = open(write_path, 'ab' if args.tree else 'wb')
+        return outfile
+    
+    def write_section(entry, section, sha256):
+        offset = get_outfile().tell()
+        for part in section_parts(section):
+            outfile.write(part.encode('utf-8'))
+        if manifest is not None:
+            manifest.record(entry, sha256, offset, outfile.tell() - offset)
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress:
+            folder_task = progress.add_task("Scanning folders", total=None)
+            # The total grows as directories are listed, so the tree is walked only once
+            file_task = progress.add_task("Processing files", total=0)
+            discovered_files = 0
             
-            # Skip excluded directories during os.walk() - modify dirs in-place
-            dirs[:] = [d for d in dirs if d not in args.excluded_dirs]
+            def on_directory(rel_dir, file_count):
+                nonlocal discovered_files
+                discovered_files += file_count
+                progress.update(folder_task, description=f"Scanning: {os.path.basename(rel_dir) or 'root'}")
+                progress.update(file_task, total=discovered_files)
+                logging.debug(f'In folder: {rel_dir or args.folder}')
             
-            # Early check: skip if current root contains any excluded directory
-            # Check for exact directory name matches in the path, not substring matches
-            path_parts = root.split(os.sep)
-            if any(excluded_dir in path_parts for excluded_dir in args.excluded_dirs):
-                logging.debug(f'Excluded directory, skipping entire folder: {root}')
-                continue
-                
-            logging.debug(f'File list:\n{files}')
-
-            for file in files:
-                file_path = os.path.join(root, file)
-                progress.update(file_task, description=f"Processing: {os.path.basename(file_path)[:30]}...")
-
-                # During scan mode, we want to collect all extensions
-                if not scan_only:
-                    # Build your dictionary of "skip" conditions
-                    we_should_examine = {
-                        'bad filetype': not is_file_type(file, args.lang),
-                        'not useful': not any(is_likely_useful_file(file, lang, args) for lang in args.lang),
-                        'should exclude': should_exclude_file(file, args),
-                        'inclusion violate': inclusion_violate(file, args),
-                    }
-
-                    if reduce(ior, we_should_examine.values()):
-                        logging.debug(f'Skipping file: {file_path}')
-                        logging.debug(f'Reasons: {we_should_examine}')
+            def selects(entry):
+                return filter_plan.selects(entry.name, audit, lambda: entry.stat().st_size, entry.rel_path)
+            
+            def finish_file(entry, result):
+                """Write one file's section or copy it from the previous output; called in walk order."""
+                record, section, sha256, report = result
+                merge_worker_report(args, report)
+                if record is not None:
+                    # Unchanged files are copied from the previous output as they were rendered
+                    if record['offset'] is None:
+                        if audit is not None:
+                            audit.skip('unchanged, no section', entry.rel_path, entry.stat().st_size)
+                    elif budget is not None and not budget.accept(entry.rel_path, record['length']):
+                        if audit is not None:
+                            audit.skip('token budget', entry.rel_path, entry.stat().st_size)
+                        progress.advance(file_task)
+                        return
+                    elif audit is not None:
+                        audit.include(entry.rel_path, entry.stat().st_size)
+                    manifest.splice(entry, record, previous_output,
+                                    get_outfile() if record['offset'] is not None else outfile)
+                elif section is not None:
+                    duplicate = None
+                    if dedup is not None:
+                        section, fingerprint, duplicate = timed(audit, 'duplicate', dedup.replace, section_text(section))
+                    if budget is not None and not budget.accept(entry.rel_path, sum(map(len, section_parts(section)))):
+                        if audit is not None:
+                            audit.skip('token budget', entry.rel_path, entry.stat().st_size)
+                    else:
+                        write_section(entry, section, sha256)
+                        if dedup is not None:
+                            dedup.record(fingerprint, duplicate)
+                        record_written(audit, entry.rel_path, entry.stat().st_size, duplicate)
+                elif manifest is not None:
+                    # Remember files that produce no section so they are not read again
+                    manifest.record(entry, sha256)
+                progress.advance(file_task)
+            
+            entries = enumerate_folder(args, on_directory)
+            if budget is not None:
+                # Rank the selected files before any of them is read; ranked() stops
+                # lazily once nothing else fits
+                entries = (entry for _, _, entry in budget.ranked(
+                    [(entry.rel_path, entry.stat().st_size, entry) for entry in entries if selects(entry)]))
+            
+            # Files are read and transformed by worker processes with --jobs;
+            # their sections are written here, in walk order
+            jobs = 1 if scan_only else resolve_jobs(getattr(args, 'jobs', 1))
+            with OrderedPipeline(finish_file, jobs, init_render_worker, (render_worker_state(args),)) as pipeline:
+                for entry in entries:
+                    file = entry.name
+                    file_path = entry.path
+                    progress.update(file_task, description=f"Processing: {os.path.basename(file_path)[:30]}...")
+
+                    # During scan mode, we want to collect all extensions
+                    if not scan_only and budget is None and not selects(entry):
+                        if logging.getLogger().isEnabledFor(logging.DEBUG):
+                            logging.debug(f'Reasons: {filter_plan.skip_reasons(file)}')
                         progress.advance(file_task)
                         continue
 
-                # Note: Directory exclusion now handled at folder level above
-                
-                # Collect file extension
-                _, ext = os.path.splitext(file_path)
-                if ext:
-                    collected_extensions.add(ext.lower())
-                
-                # If we're only scanning for extensions, skip the rest
-                if scan_only:
-                    progress.advance(file_task)
-                    continue
+                    # Note: Directory exclusion now handled at folder level above
                     
-                # Skip binary files (except PDF which has special handling)
-                if is_binary_file(file_path) and not (file_path.endswith('.pdf') and 'pdf' in args.lang):
-                    logging.debug(f"Skipping binary file: {file_path}")
-                    progress.advance(file_task)
-                    continue
+                    # Collect file extension
+                    _, ext = os.path.splitext(file_path)
+                    if ext:
+                        collected_extensions.add(ext.lower())
+                        extension_counts[ext.lower()] += 1
                     
-                # --- 3) Run program on specific filetype if requested ---
-                program_output = None
-                if program_filetype and program_command:
-                    # Check if this file matches the specified filetype
-                    extension_keys = lookup_file_extension(file_path)
-                    if program_filetype in extension_keys or program_filetype == '*':
-                        program_output = run_program_on_file(file_path, program_command)
-                        logging.debug(f"Program output for {file_path}: {program_output}")
-
-                # Now handle PDF extraction, or reading text directly
-                if file_path.endswith('.pdf') and 'pdf' in args.lang:
-                    if args.pdf_text_mode:
-                        file_content = extract_text(file_path)
-                        logging.debug(f"Extracted text from PDF: {file_path}")
-                    else:
-                        # Just indicate this is a PDF file but don't extract text
-                        file_content = "[PDF file - use --pdf_text_mode to extract text]"
-                else:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            file_content = f.read()
-                    except UnicodeDecodeError:
-                        logging.debug(f"Skipping file due to encoding issues: {file_path}")
+                    # If we're only scanning for extensions, skip the rest
+                    if scan_only:
                         progress.advance(file_task)
                         continue
-
-                # Skip test files or short/empty files
-                if any(is_test_file(file_content, lang) for lang in args.lang) or not has_sufficient_content(file_content):
-                    logging.debug(f'Skipping file: {file_path}')
-                    logging.debug('Reason: Test file or insufficient content')
-                    progress.advance(file_task)
-                    continue
-
-                # Optionally remove comments/docstrings for Python
-                if 'python' in args.lang and (not args.keep_comments):
-                    extension_keys = lookup_file_extension(file_path)
-                    if 'python' in extension_keys:
-                        try:
-                            file_content = remove_comments_and_docstrings(file_content)
-                        except SyntaxError:
-                            logging.debug(f'Tried to remove comments/docstrings from {file_path} but failed (SyntaxError).')
-                            progress.advance(file_task)
-                            continue
-                
-                # Write the file content to the output file
-                with open(output_file_path, mode, encoding='utf-8') as outfile:
-                    comment_prefix = '// ' if any(lang in ['go', 'js'] for lang in args.lang) else '# '
-                    outfile.write(f'{comment_prefix}File: {file_path}\n')
-                    
-                    # If the program ran on this file, handle the output according to --nosubstitute flag
-                    if program_output:
-                        outfile.write(f'{comment_prefix}Program output:\n')
-                        outfile.write(program_output)
-                        outfile.write('\n\n')
                         
-                        # If --nosubstitute is provided, include file content as well
-                        # Otherwise (default), only show program output and skip file content
-                        if not args.nosubstitute:
-                            # Skip writing file content since we're substituting with program output
-                            outfile.write('\n\n')
-                            mode = 'a'
-                            progress.advance(file_task)
-                            continue
-                
-                    # If topN is specified, show top N lines with a header comment
-                    if args.topN:
-                        lines = file_content.splitlines()
-                        top_lines = lines[:args.topN]
-                        outfile.write(f'{comment_prefix}(top {args.topN} lines)\n')
-                        outfile.write('\n'.join(top_lines))
-                        outfile.write('\n\n')
-                        outfile.write(file_content)
-                    else:
-                        outfile.write(file_content)
+                    # Skip binary files (except PDF which has special handling)
+                    if (timed(audit, 'binary extension', is_binary_file, file_path)
+                            and not (file_path.endswith('.pdf') and 'pdf' in args.lang)):
+                        logging.debug(f"Skipping binary file: {file_path}")
+                        if audit is not None:
+                            audit.skip('binary extension', entry.rel_path, entry.stat().st_size)
+                        progress.advance(file_task)
+                        continue
                     
-                    outfile.write('\n\n')
-
-                mode = 'a'
-                progress.advance(file_task)
+                    if budget is not None and not budget.admits(entry.rel_path, entry.stat().st_size):
+                        if audit is not None:
+                            audit.skip('token budget', entry.rel_path, entry.stat().st_size)
+                        progress.advance(file_task)
+                        continue
+                    
+                    record = manifest.lookup(entry) if previous_output is not None else None
+                    if record is not None:
+                        pipeline.put(entry, (record, None, None, None))
+                    elif pipeline.parallel or extracts_pdf_text(args, file_path):
+                        # PDF text is extracted in a worker even without --jobs
+                        pipeline.offload(entry, render_folder_task, entry.path, entry.rel_path,
+                                         program_filetype, program_command, manifest is not None)
+                    else:
+                        section, sha256 = render_folder_file(entry, args, program_filetype, program_command,
+                                                             hash_content=manifest is not None)
+                        pipeline.put(entry, (None, section, sha256, None))
+    finally:
+        if outfile is not None:
+            outfile.close()
+        if previous_output is not None:
+            previous_output.close()
+    
+    if manifest is not None:
+        if outfile is not None or args.tree:
+            os.replace(write_path, output_file_path)
+            manifest.save(output_file_path)
+        else:
+            # Nothing matched; drop the stale output as a regular run would
+            for path in (output_file_path, manifest.path):
+                if os.path.exists(path):
+                    os.remove(path)
     
     # Store collected extensions in args
     args.collected_extensions = collected_extensions
+    if scan_only:
+        args.extension_counts = extension_counts
+
+def load_folder_sections(output_file_path, args: argparse.Namespace):
+    """Split a folder output into its header and per-file sections with its manifest.
+    
+    Returns:
+        (header, sections, manifest): the bytes before the first section
+        (e.g. the --tree output), a {rel_path: bytes or None} mapping and the
+        OutputManifest whose records describe the current output
+    """
+    manifest = OutputManifest.load(output_file_path, settings_fingerprint(args))
+    manifest.records = dict(manifest.previous)
+    try:
+        with open(output_file_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        data = b''
+    sections = {}
+    for rel_path, record in manifest.records.items():
+        offset = record['offset']
+        sections[rel_path] = None if offset is None else data[offset:offset + record['length']]
+    offsets = [record['offset'] for record in manifest.records.values() if record['offset'] is not None]
+    header_end = min(offsets) if offsets else (len(data) if args.tree else 0)
+    return data[:header_end], sections, manifest
+
+def write_folder_sections(output_file_path, header, sections, manifest):
+    """Atomically rewrite a folder output from its sections and save the manifest."""
+    temp_path = output_file_path + '.partial'
+    with open(temp_path, 'wb') as outfile:
+        outfile.write(header)
+        for rel_path in sorted(sections, key=walk_order_key):
+            record = manifest.records[rel_path]
+            section = sections[rel_path]
+            if section is None:
+                record['offset'], record['length'] = None, 0
+            else:
+                record['offset'], record['length'] = outfile.tell(), len(section)
+                outfile.write(section)
+    os.replace(temp_path, output_file_path)
+    manifest.save(output_file_path)
+
+def watch_folder(args: argparse.Namespace, output_file_path):
+    """Keep the output of args.folder up to date until interrupted (--watch).
+    
+    The rendered sections stay in memory. When a file of the output changes
+    only that file is read and transformed again before the output is
+    rewritten; new files and directory changes trigger an incremental
+    process_folder run, which copies every unchanged section. Changes are
+    received from inotify on Linux and by polling elsewhere.
+    """
+    console = Console()
+    program_filetype = program_command = None
+    if args.program:
+        program_filetype, program_command = parse_program_arg(args.program)
+    
+    gitignore = None
+    if not args.no_gitignore:
+        gitignore = GitIgnore()
+        load_root_excludes(gitignore, args.folder)
+    excluded_dirs = folder_excluded_dirs(args)
+    watcher = create_watcher(args.folder, lambda: enumerate_folder(args), excluded_dirs, gitignore,
+                             polling=args.watch_poll, interval=args.watch_interval)
+    header, sections, manifest = load_folder_sections(output_file_path, args)
+    filter_plan = FilterPlan.from_args(args)
+    # Candidate files left out by the last full run, e.g. untracked files with --tracked-only
+    left_out = set()
+    
+    def update_section(rel_path):
+        entry = FileEntry(os.path.join(args.folder, rel_path), rel_path)
+        try:
+            if not os.path.isfile(entry.path):
+                raise FileNotFoundError(entry.path)
+            section, sha256 = render_folder_file(entry, args, program_filetype, program_command, hash_content=True)
+            manifest.record(entry, sha256)
+        except OSError:
+            logging.debug(f"Removed from output: {rel_path}")
+            sections.pop(rel_path, None)
+            manifest.records.pop(rel_path, None)
+            return
+        sections[rel_path] = section_text(section).encode('utf-8') if section is not None else None
+        logging.debug(f"Updated section: {rel_path}")
+    
+    def is_candidate(rel_path):
+        path = os.path.join(args.folder, rel_path)
+        name = os.path.basename(rel_path)
+        return (rel_path not in left_out and os.path.isfile(path)
+                and excluded_dirs.isdisjoint(rel_path.split('/')[:-1])
+                and filter_plan.selects(name)
+                and not (gitignore and gitignore.is_path_ignored(rel_path)))
+    
+    console.print(f"[bold blue]Watching[/bold blue] {args.folder} [dim](Ctrl+C to stop)[/dim]")
+    try:
+        while True:
+            changed, rescan = watcher.poll()
+            # Editors save in bursts; collect the rest of the burst first
+            while True:
+                more, more_rescan = watcher.poll(WATCH_DEBOUNCE)
+                if not more and not more_rescan:
+                    break
+                changed |= more
+                rescan = rescan or more_rescan
+            
+            updated = []
+            for rel_path in sorted(changed):
+                if os.path.basename(rel_path) == '.gitignore':
+                    if gitignore is not None:
+                        gitignore.reload(os.path.dirname(rel_path), os.path.join(args.folder, rel_path))
+                    rescan = True
+                elif rel_path in sections:
+                    update_section(rel_path)
+                    updated.append(rel_path)
+                elif is_candidate(rel_path):
+                    rescan = True
+            
+            if rescan:
+                console.print("[dim]Files added or removed; updating the output...[/dim]")
+                process_folder(args, output_file_path)
+                header, sections, manifest = load_folder_sections(output_file_path, args)
+                left_out = {rel_path for rel_path in changed if rel_path not in sections}
+            elif updated:
+                write_folder_sections(output_file_path, header, sections, manifest)
+                console.print(f"[green]Updated[/green] {', '.join(updated[:5])}"
+                              + (f" and {len(updated) - 5} more" if len(updated) > 5 else ""))
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopped watching[/yellow]")
+    finally:
+        watcher.close()
 
 def create_argument_parser():
     parser = argparse.ArgumentParser(description='CodeWeave - Intelligent source code aggregation and AI workflow optimization')
@@ -531,7 +1030,36 @@ def create_argument_parser():
     input_group.add_argument('--repo', type=str, help='The name of the GitHub repository')
     input_group.add_argument('--zip', type=str, help='Path to the local .zip file')
     input_group.add_argument('--folder', type=str, help='Path to the local folder')
+    input_group.add_argument('--tar', type=str,
+                       help="Path to a local tarball (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz, .tar.zst), or '-' to read one from stdin")
+    input_group.add_argument('--archive-format', type=str, default='zip', choices=['zip', 'tar.gz'],
+                       help='Archive format to download for --repo inputs; tar.gz archives are processed in a single streaming pass (default: zip)')
+    input_group.add_argument('--batch', type=str,
+                       help='Run every entry of a JSON or YAML manifest (URLs, zips, tarballs, folders) in one process, writing one output per entry')
+    input_group.add_argument('--batch-concurrency', type=int, default=4,
+                       help='Maximum number of repository archives downloaded concurrently in --batch mode (default: 4)')
     input_group.add_argument('--branch_or_tag', type=str, help='The branch or tag of the repository to download', default="master")
+    input_group.add_argument('--remote-zip', action='store_true', default=False,
+                       help='Read the central directory and only the selected members of the repository archive with HTTP range requests, falling back to a full download if the server does not support ranges')
+    input_group.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help='Number of bytes to read per chunk when downloading a repository archive')
+    
+    # Caching group
+    cache_group = parser.add_argument_group('Caching')
+    cache_group.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                       help=f'Directory for cached repository archives (default: {DEFAULT_CACHE_DIR})')
+    cache_group.add_argument('--cache-max-size', type=int, default=DEFAULT_CACHE_MAX_SIZE_MB,
+                       help=f'Maximum size of the archive cache in MB; least recently used archives are evicted (default: {DEFAULT_CACHE_MAX_SIZE_MB})')
+    cache_group.add_argument('--no-cache', action='store_true', default=False,
+                       help='Do not read or write the archive cache')
+    cache_group.add_argument('--offline', action='store_true', default=False,
+                       help='Only use cached archives and never contact the network')
+    cache_group.add_argument('--refresh', action='store_true', default=False,
+                       help='Download repository archives again instead of revalidating the cached copy')
+    cache_group.add_argument('--transform-cache-max-size', type=int, default=DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB,
+                       help=f'Maximum size of the cache of stripped sources, converted notebooks and PDF text in MB (default: {DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB})')
+    cache_group.add_argument('--no-transform-cache', action='store_true', default=False,
+                       help='Do not read or write the cache of transformed file contents')
     
     # File selection and filtering group
     filter_group = parser.add_argument_group('File Selection & Filtering')
@@ -542,19 +1070,49 @@ def create_argument_parser():
     filter_group.add_argument('--excluded_dirs', '--exclude_dir', type=str, 
                        help='Comma-separated list of directories to exclude',
                        default="docs,examples,tests,test,scripts,utils,benchmarks")
+    filter_group.add_argument('--profiles', type=str,
+                       help='JSON or YAML file defining or overriding language profiles (extensions, excluded_dirs, config_files, doc_files, test_indicators)')
+    filter_group.add_argument('--no-git-index', action='store_true', default=False,
+                       help='Walk the filesystem instead of listing files from the git index when the folder is a git work tree')
+    filter_group.add_argument('--tracked-only', action='store_true', default=False,
+                       help='When listing files from the git index, leave out untracked files (by default untracked files that are not ignored are included)')
+    # Untracked files are included by default; kept so existing command lines still parse
+    filter_group.add_argument('--untracked', action='store_true', default=False, help=argparse.SUPPRESS)
+    filter_group.add_argument('--no-gitignore', action='store_true', default=False,
+                       help='Do not apply .gitignore files when walking a folder or reading an archive')
     filter_group.add_argument('--interactive-extensions', action='store_true',
                        help='Force interactive extension selection even when --lang is specified')
     
     # Content processing group
     content_group = parser.add_argument_group('Content Processing')
     content_group.add_argument('--keep-comments', action='store_true', 
-                        help='Keep comments and docstrings in the source code (only applicable for Python)')
-    content_group.add_argument('--ipynb_nbconvert', action='store_true', default=True, 
-                        help='Convert IPython Notebook files to Python script files using nbconvert')
+                        help='Keep all comments and docstrings in the source code (same as --strip-comments "")')
+    content_group.add_argument('--strip-comments', type=str, default='python',
+                        help="Comma-separated languages to remove comments from, or 'all': python (also docstrings), c, cpp, java, csharp, go, js, ts, lua, shell and their aliases (default: python)")
+    content_group.add_argument('--ipynb_nbconvert', action='store_true', default=False, 
+                        help='Convert IPython Notebook files to Python script files using nbconvert (slower, requires nbformat and nbconvert) instead of the built-in converter')
+    content_group.add_argument('--ipynb-markdown', action='store_true', default=False,
+                        help='Keep the markdown cells of IPython Notebook files as comments')
     content_group.add_argument('--pdf_text_mode', action='store_true', default=False,
                         help='Convert PDF files to text for analysis (requires pdf filetype in --lang)')
+    content_group.add_argument('--pdf-pages', type=str, default=None,
+                        help="Pages of each PDF to extract, e.g. '1-10,15,20-' (default: all)")
+    content_group.add_argument('--pdf-max-pages', type=int, default=None,
+                        help='Extract at most this many pages of each PDF')
+    content_group.add_argument('--pdf-timeout', type=float, default=DEFAULT_PDF_TIMEOUT,
+                        help=f'Seconds the text extraction of one PDF may take before the pages extracted so far are used; 0 disables (default: {DEFAULT_PDF_TIMEOUT})')
     content_group.add_argument('--topN', type=int, 
                         help="Show the top N lines of each file in the output as a preview")
+    content_group.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes reading and transforming files of folders and local zip files; 0 uses one per CPU (default: 1)')
+    content_group.add_argument('--max-tokens', type=int, default=None,
+                        help='Stop adding files once the output reaches about this many tokens; candidate files are ranked by path and size and read in that order')
+    content_group.add_argument('--max-file-tokens', type=int, default=None,
+                        help='Skip files whose section would exceed about this many tokens')
+    content_group.add_argument('--dedup', action='store_true', default=False,
+                        help='Replace files whose content, after transforms, was already written by a reference to the first copy')
+    content_group.add_argument('--dedup-threshold', type=float, default=None, metavar='SIMILARITY',
+                        help='Also replace near-duplicates of at least this estimated similarity, from 0 to 1 (e.g. 0.9); implies --dedup')
     content_group.add_argument('--tree', action='store_true', 
                         help="Prepend a file tree (generated via the 'tree' command) to the output file (only works for local folders)")
     content_group.add_argument('--tree_flags', type=str,
@@ -589,12 +1147,22 @@ def create_argument_parser():
     output_group.add_argument('--name_append', type=str, help='Append this string to the output file name')
     output_group.add_argument('--append', action='store_true', default=False,
                         help='Append to existing output file instead of overwriting')
+    output_group.add_argument('--incremental', action='store_true', default=False,
+                        help='For folders, keep a manifest next to the output file and copy unchanged files from the previous output instead of reading and transforming them again')
+    output_group.add_argument('--watch', action='store_true', default=False,
+                        help='For folders, keep running and update the output whenever files change (implies --incremental)')
+    output_group.add_argument('--watch-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between scans when --watch has to poll for changes (default: {DEFAULT_POLL_INTERVAL})')
+    output_group.add_argument('--watch-poll', action='store_true', default=False,
+                        help='Poll for changes in --watch mode even where inotify is available')
     output_group.add_argument('--pbcopy', action='store_true', default=False, 
                         help='Copy the output to clipboard (macOS only)')
     
     # Debug options group
     debug_group = parser.add_argument_group('Debugging Options')
     debug_group.add_argument('--debug', action='store_true', help='Enable debug logging')
+    debug_group.add_argument('--audit', type=str, nargs='?', const='', default=None, metavar='PATH',
+                        help='Write per-rule counts, timings, skipped bytes and the largest included and excluded files as JSON (default: <output>.audit.json)')
     debug_group.add_argument('--pdb', action='store_true', help="Drop into pdb on error")
     debug_group.add_argument('--pdb_fromstart', action='store_true', help="Drop into pdb from start")
     
@@ -606,6 +1174,8 @@ def determine_if_url_zip_or_folder(args):
         args.repo = args.input
     elif args.input.endswith(".zip"):
         args.zip = args.input
+    elif args.input == "-" or is_tar_path(args.input):
+        args.tar = args.input
     else:
         args.folder = args.input
 
@@ -634,12 +1204,13 @@ def add_new_extension(languages):
             logging.info(f"Adding new extension .{lang} to the dictionary")
             file_extension_dict[lang] = [f'.{lang}']
 
-def interactive_extension_selection(collected_extensions):
+def interactive_extension_selection(collected_extensions, extension_counts=None):
     """
     Interactively select file extensions to process.
     
     Args:
         collected_extensions: Set of file extensions found during scanning
+        extension_counts: Optional Counter of files per extension from the scan
         
     Returns:
         List of selected extensions or None if cancelled
@@ -685,13 +1256,11 @@ def interactive_extension_selection(collected_extensions):
     # Display extensions with numbers
     for i, ext in enumerate(extensions, 1):
         # Try to find a language name for the extension
-        lang_names = []
-        for lang, exts in file_extension_dict.items():
-            if ext in exts:
-                lang_names.append(lang)
+        lang_names = file_extension_dict.languages_for_suffix(ext)
         
         lang_info = f" ({', '.join(lang_names)})" if lang_names else ""
-        console.print(f"  {i:3d}. {ext}{lang_info}")
+        count_info = f" [dim]{extension_counts[ext]} file(s)[/dim]" if extension_counts else ""
+        console.print(f"  {i:3d}. {ext}{lang_info}{count_info}")
     
     console.print()
     
@@ -759,6 +1328,245 @@ def parse_program_arg(program_arg):
     
     return filetype, command
 
+def cached_transform(args, transform, content, compute, options=None, errors=()):
+    """Run compute() through the persistent transform cache, if one is open.
+    
+    See TransformCache.get_or_compute; the transform name carries a version
+    that should be bumped whenever the transform's output changes.
+    """
+    cache = getattr(args, 'transform_cache', None)
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(transform, content, compute, options, errors)
+
+def extracts_pdf_text(args, file_path):
+    """Whether the text of file_path is extracted as a PDF."""
+    return args.pdf_text_mode and file_path.endswith('.pdf') and 'pdf' in args.lang
+
+def extract_pdf(args, display_path, pdf_bytes):
+    """Return the texts of the --pdf-pages of a PDF, one per page, through the transform cache.
+    
+    A document that runs out of --pdf-timeout contributes the pages extracted
+    until then, with a note, and is not cached.
+    """
+    options = PdfOptions.from_args(args)
+    pages = None
+    
+    def extract():
+        nonlocal pages
+        pages = extract_pdf_pages(pdf_bytes, options)
+        # The cache keeps the document as one text
+        return ''.join(pages)
+    
+    try:
+        if getattr(args, 'transform_cache', None) is None:
+            pages = extract_pdf_pages(pdf_bytes, options)
+        else:
+            text = cached_transform(args, PDF_TEXT_TRANSFORM, pdf_bytes, extract, options.cache_options())
+    except PdfTimeout as e:
+        logging.warning(f"{display_path}: {e}")
+        return e.pages
+    logging.debug(f"Extracted text from PDF: {display_path}")
+    return pages if pages is not None else split_pages(text)
+
+def convert_notebook(args, file_bytes):
+    """Return the source code of a notebook.
+    
+    The built-in converter keeps code cells, plus markdown cells as comments
+    with --ipynb-markdown; --ipynb_nbconvert uses nbconvert instead.
+    
+    Raises:
+        ValueError: if file_bytes is not a notebook
+    """
+    if args.ipynb_nbconvert:
+        file_content = file_bytes.decode('utf-8')
+        return cached_transform(args, 'ipynb-nbconvert:1', file_content, lambda: convert_ipynb_to_py(file_content))
+    return notebook_to_source(file_bytes, markdown=args.ipynb_markdown)
+
+def strip_file_comments(args, file_path, file_content):
+    """Remove the comments of a file in one of the --strip-comments languages.
+    
+    Python files also lose their docstrings.
+    """
+    syntax = comment_syntax(file_path, args.strip_comments)
+    if syntax is None:
+        return file_content
+    if syntax == PYTHON_SYNTAX:
+        transform, strip = 'strip-python:3', lambda: remove_comments_and_docstrings(file_content)
+    else:
+        transform, strip = f'strip-{syntax}:3', lambda: strip_comments(file_content, syntax)
+    return timed(getattr(args, 'filter_audit', None), 'comment stripping', cached_transform, args, transform,
+                 file_content, strip)
+
+def analyze_file_content(args, file_content):
+    """Analyze a file's text once for all of the filters that read it.
+    
+    The test indicators of every selected language are compiled into one
+    matcher, reused for the rest of the run.
+    """
+    matcher = getattr(args, 'test_matcher', None)
+    if matcher is None or matcher.langs != tuple(args.lang):
+        matcher = args.test_matcher = IndicatorMatcher(args.lang, getattr(args, 'language_profiles', None))
+    if isinstance(file_content, list):
+        return analyze_pages(file_content, matcher)
+    return analyze_content(file_content, matcher)
+
+# Per-run state kept on args that is not passed to render workers
+RUN_STATE_ATTRIBUTES = frozenset({
+    'transform_cache', 'binary_sniffer', 'filter_audit', 'test_matcher', 'token_budget', 'language_profiles',
+    'deduplicator', 'archive', 'archive_file', 'collected_extensions', 'extension_counts',
+})
+
+# Settings of a render worker process, see init_render_worker
+_worker_args = None
+_worker_zips = {}
+
+def render_worker_state(args):
+    """Return the picklable settings render workers are initialized with."""
+    options = {}
+    for name, value in vars(args).items():
+        if name in RUN_STATE_ATTRIBUTES:
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        options[name] = value
+    transform_cache = getattr(args, 'transform_cache', None)
+    return {
+        'options': options,
+        'profiles': dict(getattr(args, 'language_profiles', None) or LANGUAGE_PROFILES),
+        'extensions': dict(file_extension_dict),
+        'cache_dir': os.path.dirname(transform_cache.path) if transform_cache is not None else None,
+        'audit': getattr(args, 'filter_audit', None) is not None,
+    }
+
+def init_render_worker(state):
+    """Prepare a worker process to run render_folder_task and render_member_task."""
+    global _worker_args
+    for lang, extensions in state['extensions'].items():
+        if lang not in file_extension_dict:
+            file_extension_dict[lang] = extensions
+    args = argparse.Namespace(**state['options'])
+    args.language_profiles = MappingProxyType(state['profiles'])
+    # New cache entries are handed to the main process, the only writer
+    args.transform_cache = (open_transform_cache(state['cache_dir'], deferred=True)
+                            if state['cache_dir'] else None)
+    args.audit = state['audit']
+    _worker_args = args
+
+def _worker_report(args):
+    """Collect what a task recorded on the worker's args, for merge_worker_report."""
+    sniffer = get_binary_sniffer(args)
+    report = {
+        'audit': args.filter_audit,
+        'binary': (sniffer.sniffed, sniffer.binary),
+        'cache': args.transform_cache.take_deferred() if args.transform_cache is not None else None,
+    }
+    sniffer.sniffed = sniffer.binary = 0
+    return report
+
+def render_folder_task(path, rel_path, program_filetype, program_command, hash_content):
+    """render_folder_file in a worker; returns (None, section, sha256, report) as queued by process_folder."""
+    args = _worker_args
+    args.filter_audit = FilterAudit() if args.audit else None
+    section, sha256 = render_folder_file(FileEntry(path, rel_path), args, program_filetype, program_command,
+                                         hash_content)
+    return None, section, sha256, _worker_report(args)
+
+def render_member_task(zip_path, member_name, file_size, program_filetype, program_command):
+    """render_archive_member in a worker; returns (section, report)."""
+    args = _worker_args
+    args.filter_audit = FilterAudit() if args.audit else None
+    zip_obj = _worker_zips.get(zip_path)
+    if zip_obj is None:
+        zip_obj = _worker_zips[zip_path] = zipfile.ZipFile(zip_path)
+    section = render_archive_member(member_name, file_size, zip_member_reader(zip_obj, member_name), args,
+                                    program_filetype, program_command)
+    return section, _worker_report(args)
+
+def render_bytes_task(file_path, file_size, data, program_filetype, program_command):
+    """render_archive_member in a worker, for a member read by the main process; returns (section, report)."""
+    args = _worker_args
+    args.filter_audit = FilterAudit() if args.audit else None
+    read_member = lambda limit=-1: data[:limit] if limit >= 0 else data
+    section = render_archive_member(file_path, file_size, read_member, args, program_filetype, program_command)
+    return section, _worker_report(args)
+
+def merge_worker_report(args, report):
+    """Add what a render worker recorded to the run's audit, sniffer and transform cache."""
+    if report is None:
+        return
+    if report['audit'] is not None and getattr(args, 'filter_audit', None) is not None:
+        args.filter_audit.merge(report['audit'])
+    sniffer = get_binary_sniffer(args)
+    sniffed, binary = report['binary']
+    sniffer.sniffed += sniffed
+    sniffer.binary += binary
+    if report['cache'] is not None and getattr(args, 'transform_cache', None) is not None:
+        args.transform_cache.absorb(report['cache'])
+
+def record_written(audit, path, size, duplicate):
+    """Count a written section in the audit; a back-reference counts as skipped by the duplicate rule."""
+    if audit is None:
+        return
+    if duplicate is None:
+        audit.include(path, size)
+    else:
+        audit.skip('duplicate' if duplicate.exact else 'near duplicate', path, size)
+
+def local_zip_path(zip_obj):
+    """Return the absolute path of a zip archive read from disk, or None."""
+    path = zip_obj.filename
+    if isinstance(path, str) and os.path.isfile(path):
+        return os.path.abspath(path)
+    return None
+
+def get_binary_sniffer(args):
+    """Return the run's BinarySniffer, creating it on first use."""
+    sniffer = getattr(args, 'binary_sniffer', None)
+    if sniffer is None:
+        sniffer = args.binary_sniffer = BinarySniffer()
+    return sniffer
+
+def render_section(display_path, file_content, args, program_output=None):
+    """Render the block written to the output file for one source file.
+    
+    Program output replaces the file content unless --nosubstitute is given,
+    and --topN repeats the first lines of the file under a header comment.
+    A PDF's text, given as a list of pages, gives a list of parts so that
+    the pages are written one by one without being joined; see
+    section_parts.
+    """
+    comment_prefix = "// " if any(lang in ["go", "js"] for lang in args.lang) else "# "
+    parts = [f"{comment_prefix}File: {display_path}\n"]
+    
+    if program_output:
+        parts.extend([f"{comment_prefix}Program output:\n", program_output, "\n\n"])
+        if not args.nosubstitute:
+            parts.append("\n\n")
+            return ''.join(parts)
+    
+    pages = file_content if isinstance(file_content, list) else None
+    if args.topN:
+        lines = (line for page in pages or (file_content,) for line in page.splitlines())
+        top_lines = itertools.islice(lines, args.topN)
+        parts.extend([f"{comment_prefix}(top {args.topN} lines)\n", '\n'.join(top_lines), "\n\n"])
+    if pages is None:
+        parts.extend([file_content, "\n\n"])
+        return ''.join(parts)
+    parts.extend(pages)
+    parts.append("\n\n")
+    return parts
+
+def section_parts(section):
+    """Return the strings a rendered section is written as, in order."""
+    return (section,) if isinstance(section, str) else section
+
+def section_text(section):
+    """Return a rendered section as one string."""
+    return section if isinstance(section, str) else ''.join(section)
+
 def run_program_on_file(file_path, command):
     """Run the specified command on the file"""
     try:
@@ -788,6 +1596,9 @@ def display_configuration_header(args):
     elif args.zip:
         input_source = args.zip
         input_type = "ZIP Archive"
+    elif args.tar:
+        input_source = "stdin" if args.tar == "-" else args.tar
+        input_type = "Tar Archive"
     elif args.folder:
         input_source = args.folder
         input_type = "Local Folder"
@@ -814,6 +1625,15 @@ def display_configuration_header(args):
         config_table.add_row("File Tree", "✓ Enabled")
     if args.topN:
         config_table.add_row("Top N Lines", str(args.topN))
+    if args.jobs != 1:
+        config_table.add_row("Jobs", str(args.jobs or os.cpu_count()))
+    if args.max_tokens or args.max_file_tokens:
+        limits = [f"{args.max_tokens:,} total" if args.max_tokens else None,
+                  f"{args.max_file_tokens:,} per file" if args.max_file_tokens else None]
+        config_table.add_row("Token Budget", ', '.join(limit for limit in limits if limit))
+    if args.dedup:
+        config_table.add_row("Deduplication", "Exact" + (f", near-duplicates from {args.dedup_threshold:.0%}"
+                                                         if args.dedup_threshold is not None else ""))
     if args.append:
         config_table.add_row("Mode", "Append to existing file")
     
@@ -856,6 +1676,35 @@ def display_completion_summary(output_file_path, args):
                 shown_exts = extensions[:20]
                 summary_text += f"\n[dim]{', '.join(shown_exts)}, and {extension_count - 20} more...[/dim]"
         
+        transform_cache = getattr(args, 'transform_cache', None)
+        if transform_cache is not None and (transform_cache.hits or transform_cache.misses):
+            summary_text += f"\n[cyan]Transform Cache:[/cyan] {transform_cache.hits} hits, {transform_cache.misses} misses"
+        
+        budget = getattr(args, 'token_budget', None)
+        if budget is not None:
+            budget_text = f"{budget.used:,}" + (f" of {budget.max_tokens:,}" if budget.max_tokens else "")
+            summary_text += f"\n[cyan]Token Budget:[/cyan] {budget_text} tokens used, {budget.skipped} files skipped"
+            if budget.unread:
+                summary_text += f", {budget.unread} not read"
+        
+        dedup = getattr(args, 'deduplicator', None)
+        if dedup is not None:
+            summary_text += f"\n[cyan]Duplicates Replaced:[/cyan] {dedup.duplicates} exact"
+            if dedup.threshold is not None:
+                summary_text += f", {dedup.near_duplicates} near"
+        
+        audit = getattr(args, 'filter_audit', None)
+        if audit is not None:
+            summary_text += (f"\n[cyan]Filter Audit:[/cyan] {audit.included_count} included, "
+                             f"{audit.skipped_count} skipped ({audit.skipped_bytes / (1024 * 1024):.2f} MB)")
+            for rule, stats in audit.top_rules():
+                summary_text += f"\n[dim]  {rule}: {stats['hits']} files, {stats['seconds']:.3f}s[/dim]"
+            summary_text += f"\n[dim]  Written to {args.audit_path}[/dim]"
+        
+        binary_sniffer = getattr(args, 'binary_sniffer', None)
+        if binary_sniffer is not None and binary_sniffer.binary:
+            summary_text += f"\n[cyan]Binary Files Skipped:[/cyan] {binary_sniffer.binary} (detected from content)"
+        
         summary_panel = Panel(
             summary_text,
             title="[bold]Summary[/bold]",
@@ -888,9 +1737,30 @@ def display_completion_summary(output_file_path, args):
 def main(args=None) -> str:
     # Parse arguments.
     parser = create_argument_parser()
-    args = parser.parse_args(args)
+    argv = sys.argv[1:] if args is None else list(args)
+    args = parser.parse_args(argv)
     if args.pdb_fromstart:
         import pdb; pdb.set_trace()
+
+    # Batch mode runs every manifest entry in this process
+    if args.batch:
+        setup_logging(args.debug)
+        from codeweave.batch import run_batch
+        return run_batch(args.batch, argv, parser)
+
+    return run_codeweave(args, parser)
+
+def run_codeweave(args: argparse.Namespace, parser: argparse.ArgumentParser) -> str:
+    """Run CodeWeave for one parsed set of command line arguments."""
+    # Language profiles first, so --lang accepts the languages they define
+    args.language_profiles = LANGUAGE_PROFILES
+    if args.profiles:
+        try:
+            args.language_profiles = load_profiles(args.profiles)
+        except (OSError, ValueError, RuntimeError) as e:
+            logging.error(f"Cannot load language profiles from {args.profiles}: {e}")
+            sys.exit(1)
+
     # Process language argument
     if args.lang:
         args.lang = [lang.strip() for lang in args.lang.split(',')]
@@ -961,6 +1831,13 @@ def main(args=None) -> str:
         ))
         return None
 
+    # Languages to strip comments from
+    try:
+        args.strip_comments = [] if args.keep_comments else parse_strip_languages(args.strip_comments)
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
     try:
         # Process excluded directories
         if args.excluded_dirs:
@@ -993,10 +1870,14 @@ def main(args=None) -> str:
             determine_if_url_zip_or_folder(args)
         if args.repo:
             lang_suffix = ','.join(args.lang) if args.lang else 'selected'
-            args.output_file = f"{args.repo.split('/')[-1]}_{lang_suffix}.txt"
+            args.output_file = f"{strip_archive_suffix(args.repo.split('/')[-1])}_{lang_suffix}.txt"
         elif args.zip:
             lang_suffix = ','.join(args.lang) if args.lang else 'selected'
             args.output_file = f"{os.path.splitext(os.path.basename(args.zip))[0]}_{lang_suffix}.txt"
+        elif args.tar:
+            lang_suffix = ','.join(args.lang) if args.lang else 'selected'
+            tar_name = 'stdin' if args.tar == '-' else strip_archive_suffix(os.path.basename(args.tar))
+            args.output_file = f"{tar_name}_{lang_suffix}.txt"
         elif args.folder:
             args.folder = os.path.abspath(os.path.expanduser(args.folder))
             gitfolder = extract_git_folder(args.folder)
@@ -1021,8 +1902,42 @@ def main(args=None) -> str:
         # Attach the output_file_path to the args namespace for easy access
         args.output_file_path = output_file_path
 
+        if args.ipynb_nbconvert and not NBCONVERT_AVAILABLE:
+            logging.error("--ipynb_nbconvert requires nbformat and nbconvert: pip install codeweave[nbconvert]")
+            sys.exit(1)
+
+        try:
+            args.pdf_pages = parse_page_ranges(args.pdf_pages)
+        except ValueError as e:
+            logging.error(f"--pdf-pages: {e}")
+            sys.exit(1)
+        if (args.pdf_max_pages or 0) < 0 or args.pdf_timeout < 0:
+            logging.error("--pdf-max-pages and --pdf-timeout cannot be negative")
+            sys.exit(1)
+
+        if args.jobs < 0:
+            logging.error("--jobs must be 0 (one per CPU) or a positive number")
+            sys.exit(1)
+
+        if args.dedup_threshold is not None:
+            if not 0 < args.dedup_threshold <= 1:
+                logging.error("--dedup-threshold must be greater than 0 and at most 1")
+                sys.exit(1)
+            args.dedup = True
+        if args.dedup and (args.incremental or args.watch):
+            logging.error("--dedup cannot be combined with --incremental or --watch")
+            sys.exit(1)
+
+        # Watch mode keeps the output current with the incremental manifest
+        if args.watch:
+            if args.max_tokens or args.max_file_tokens:
+                logging.error("--watch cannot be combined with --max-tokens or --max-file-tokens")
+                sys.exit(1)
+            args.incremental = True
+
         # Handle output file - remove if exists unless --append is specified
-        if os.path.exists(output_file_path) and not args.append:
+        # (--incremental reuses it, see process_folder)
+        if os.path.exists(output_file_path) and not args.append and not args.incremental:
             logging.info(f"Output file {output_file_path} already exists. Removing it.")
             os.remove(output_file_path)
         elif args.append and os.path.exists(output_file_path):
@@ -1034,31 +1949,42 @@ def main(args=None) -> str:
         # Initialize collected_extensions to ensure it's always available
         args.collected_extensions = set()
 
+        # Stripped sources, notebooks and PDF text are cached across runs
+        args.transform_cache = None
+        if not args.no_transform_cache:
+            args.transform_cache = open_transform_cache(args.cache_dir, args.transform_cache_max_size)
+
+        # Filter decisions are recorded for --audit
+        args.filter_audit = FilterAudit() if args.audit is not None else None
+
         # Handle interactive extension selection if requested or if no language specified
         if args.interactive_extensions or not args.lang:
             console = Console()
             console.print("[bold yellow]Interactive extension selection mode[/bold yellow]")
             console.print("[dim]Scanning for file extensions...[/dim]\n")
             
-            # First pass: scan for extensions only
-            if args.repo:
+            # First pass: scan for extensions only. The archive stays open on
+            # args.archive so the processing pass below reuses it.
+            if args.tar == '-':
+                console.print("[red]A tarball read from stdin can only be streamed once; pass --lang instead of selecting extensions interactively.[/red]")
+                return None
+            elif repo_is_tar(args) or args.tar:
+                console.print("[bold green]Scanning tar archive...[/bold green]")
+                process_tar(args, output_file_path, scan_only=True)
+            elif args.repo:
                 console.print("[bold green]Downloading repository for scanning...[/bold green]")
-                # For repos, we need to download first, then scan
                 download_repo(args, output_file_path, scan_only=True)
                 # Extensions are collected in args.collected_extensions during download
             elif args.zip:
                 console.print("[bold green]Scanning zip file...[/bold green]")
-                # Create a temporary process to scan extensions
-                with zipfile.ZipFile(args.zip, 'r') as zip_file:
-                    temp_extensions = set()
-                    process_zip_object(zip_file, args, output_file_path, temp_extensions, scan_only=True)
-                    args.collected_extensions = temp_extensions
+                process_zip(args, output_file_path, scan_only=True)
             elif args.folder:
                 console.print("[bold green]Scanning folder...[/bold green]")
                 process_folder(args, output_file_path, scan_only=True)
             
             # Select extensions interactively
-            selected_extensions = interactive_extension_selection(args.collected_extensions)
+            selected_extensions = interactive_extension_selection(args.collected_extensions,
+                                                                  getattr(args, 'extension_counts', None))
             
             if not selected_extensions:
                 console.print("[yellow]No extensions selected. Exiting.[/yellow]")
@@ -1078,10 +2004,16 @@ def main(args=None) -> str:
             console.print(f"\n[green]Processing files with extensions:[/green] {', '.join(selected_extensions)}\n")
         
         # Process files (either normally or second pass for interactive mode)
-        if args.repo:
+        if repo_is_tar(args) or args.tar:
+            console = Console()
+            console.print("[bold green]Streaming tar archive...[/bold green]")
+            process_tar(args)
+        elif args.repo:
             console = Console()
-            if not args.interactive_extensions:
+            if getattr(args, 'archive', None) is None:
                 console.print("[bold green]Downloading repository...[/bold green]")
+            else:
+                console.print("[bold green]Processing repository archive...[/bold green]")
             download_repo(args, output_file_path)
         elif args.zip:
             console = Console()
@@ -1095,6 +2027,10 @@ def main(args=None) -> str:
             parser.print_help()
             sys.exit(1)
 
+        if args.filter_audit is not None:
+            args.audit_path = args.audit or audit_path(output_file_path)
+            args.filter_audit.save(args.audit_path)
+
         # If summarize is specified, pipe the output to Fabric
         if args.summarize and os.path.exists(output_file_path):
             console = Console()
@@ -1116,6 +2052,12 @@ def main(args=None) -> str:
         # Display completion summary
         display_completion_summary(output_file_path, args)
 
+        if args.watch:
+            if args.folder:
+                watch_folder(args, output_file_path)
+            else:
+                logging.warning("--watch only applies to folder inputs; ignoring it")
+
         return output_file_path
 
     except argparse.ArgumentError as e:
@@ -1126,6 +2068,11 @@ def main(args=None) -> str:
             pdb.post_mortem()
         else:
             sys.exit(1)
+    finally:
+        close_archive(args)
+        if getattr(args, 'transform_cache', None) is not None:
+            args.transform_cache.close()
+            args.transform_cache = None
 
 if __name__ == "__main__":
     main()
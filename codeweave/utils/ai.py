@@ -301,8 +301,11 @@ File Selection & Filtering:
 
 Content Processing:
   --keep-comments       Keep comments and docstrings in source code
+  --strip-comments LANGS  Languages to remove comments from, or 'all' (default: python)
   --tree                Prepend a file tree to the output file
   --topN TOPN           Show top N lines of each file as preview
+  --dedup               Replace duplicate files by a reference to the first copy
+  --dedup-threshold SIM  Also replace near-duplicates of at least this similarity (0-1)
 
 Output Options:
   --name_append TEXT    Append string to output file name
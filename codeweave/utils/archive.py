@@ -0,0 +1,157 @@
+# Description: Utility functions for iterating over zip and tar archive members.
+
+import logging
+import tarfile
+
+from codeweave.utils.remote_zip import prefetch_member
+
+# Optional zstandard support for .tar.zst archives
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.tar.zst', '.tzst')
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_TAR_MODES = {
+    '.tar': 'r|',
+    '.tar.gz': 'r|gz',
+    '.tgz': 'r|gz',
+    '.tar.bz2': 'r|bz2',
+    '.tbz2': 'r|bz2',
+    '.tar.xz': 'r|xz',
+    '.txz': 'r|xz',
+}
+
+
+def is_tar_path(path:str)->bool:
+    """Check if a path or URL names a tarball."""
+    return path.lower().endswith(TAR_SUFFIXES)
+
+
+def strip_archive_suffix(name:str)->str:
+    """Remove a .zip or tarball suffix from a file name."""
+    lowered = name.lower()
+    for suffix in TAR_SUFFIXES + ('.zip',):
+        if lowered.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def archive_suffix(name:str)->str:
+    """Return the .zip or tarball suffix of a file name or URL, '.zip' if it has none."""
+    lowered = name.lower()
+    for suffix in sorted(TAR_SUFFIXES, key=len, reverse=True):
+        if lowered.endswith(suffix):
+            return suffix
+    return '.zip'
+
+
+def _is_zstd(name, fileobj):
+    if name.lower().endswith(('.tar.zst', '.tzst')):
+        return True
+    peek = getattr(fileobj, 'peek', None)
+    return bool(peek) and peek(4)[:4] == ZSTD_MAGIC
+
+
+def open_tar_stream(fileobj, name=''):
+    """Open a tarball for a single forward pass over fileobj.
+
+    The file object is never seeked, so it may be a pipe, stdin or an HTTP
+    response body. The compression is chosen from the name's suffix, and
+    detected from the stream itself when the name is unknown (e.g. stdin).
+    """
+    if _is_zstd(name, fileobj):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Reading .tar.zst archives requires the zstandard package: pip install codeweave[zstd]")
+        fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+        return tarfile.open(fileobj=fileobj, mode='r|')
+    lowered = name.lower()
+    mode = next((mode for suffix, mode in _TAR_MODES.items() if lowered.endswith(suffix)), 'r|*')
+    return tarfile.open(fileobj=fileobj, mode=mode)
+
+
+class _ZipMemberReader:
+    """read(limit=-1) callable of a zip member.
+
+    A limited read decompresses only the start of the member. cache_key
+    identifies the content by CRC and size, for caching sniff verdicts.
+    """
+
+    def __init__(self, zip_obj, info):
+        self.zip_obj = zip_obj
+        self.info = info
+        self.cache_key = ('zip', info.CRC, info.file_size, info.compress_size)
+
+    def __call__(self, limit=-1):
+        if limit is not None and limit >= 0:
+            prefetch_member(self.zip_obj, self.info, limit)
+            with self.zip_obj.open(self.info) as f:
+                return f.read(limit)
+        # Remote archives fetch the whole member with a single range request
+        prefetch_member(self.zip_obj, self.info)
+        return self.zip_obj.read(self.info)
+
+
+class _TarMemberReader:
+    """read(limit=-1) callable of a streamed tar member.
+
+    The stream cannot be rewound, so a limited read keeps the bytes it
+    consumed and a later full read continues from where it stopped.
+    """
+
+    cache_key = None
+
+    def __init__(self, tar, member):
+        self.tar = tar
+        self.member = member
+        self.file = None
+        self.prefix = b''
+
+    def __call__(self, limit=-1):
+        if self.file is None:
+            self.file = self.tar.extractfile(self.member)
+        if limit is not None and limit >= 0:
+            if len(self.prefix) < limit:
+                self.prefix += self.file.read(limit - len(self.prefix))
+            return self.prefix[:limit]
+        # At the end of the member further reads return b'', so this is repeatable
+        self.prefix += self.file.read()
+        return self.prefix
+
+
+def zip_member_reader(zip_obj, name):
+    """Return the read(limit=-1) callable of a zip member, see iter_zip_members."""
+    return _ZipMemberReader(zip_obj, zip_obj.getinfo(name))
+
+
+def iter_zip_members(zip_obj):
+    """Yield (path, size, read) for each entry of a ZipFile.
+
+    read(limit=-1) returns the member's bytes, or only the first limit
+    bytes. Directories are yielded with a trailing '/' and read set to None.
+    """
+    for info in zip_obj.infolist():
+        if info.is_dir():
+            yield info.filename, 0, None
+        else:
+            yield info.filename, info.file_size, _ZipMemberReader(zip_obj, info)
+
+
+def iter_tar_members(tar):
+    """Yield (path, size, read) for each entry of a tarball opened in stream mode.
+
+    Only the member header has been parsed when an entry is yielded; its data
+    is decompressed into memory only if read() is called, which must happen
+    before asking for the next entry; read(limit) decompresses only the first
+    limit bytes and a later read() returns the whole member. Links and special files are skipped.
+    """
+    for member in tar:
+        if member.isdir():
+            yield member.name.rstrip('/') + '/', 0, None
+        elif member.isfile():
+            yield member.name, member.size, _TarMemberReader(tar, member)
+        else:
+            logging.debug(f"Skipping non-regular tar member: {member.name}")
@@ -0,0 +1,127 @@
+# Description: Per-rule counters and timing of the file selection decisions of a run.
+
+import heapq
+import json
+import logging
+import os
+import time
+
+AUDIT_SUFFIX = '.audit.json'
+# Number of largest included and excluded files kept in the audit
+DEFAULT_TOP_N = 20
+
+
+class FilterAudit:
+    """Records which rule skipped each file, how long the rules took and what they saved.
+
+    Rules are identified by name, e.g. 'bad filetype' or 'binary content'.
+    A rule's time is accumulated by time() whether or not it rejects the
+    file; skip() counts a rejection and the bytes it saved from being read
+    or written. Only the top_n largest included and excluded files are
+    kept, in bounded heaps.
+    """
+
+    def __init__(self, top_n=DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.rules = {}
+        self.included_count = 0
+        self.included_bytes = 0
+        self._included = []
+        self._excluded = []
+        self._order = 0
+        self.started = time.perf_counter()
+
+    def _rule(self, rule):
+        stats = self.rules.get(rule)
+        if stats is None:
+            stats = self.rules[rule] = {'hits': 0, 'seconds': 0.0, 'bytes': 0}
+        return stats
+
+    def _keep(self, heap, size, record):
+        # The insertion order breaks ties so records themselves are never compared
+        self._order += 1
+        item = (size, -self._order, record)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif size > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def time(self, rule, func, *args):
+        """Call func(*args), adding its duration to the rule's time."""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._rule(rule)['seconds'] += time.perf_counter() - start
+
+    def skip(self, rule, path, size):
+        """Count a file skipped by a rule."""
+        stats = self._rule(rule)
+        stats['hits'] += 1
+        stats['bytes'] += size
+        if self.top_n:
+            self._keep(self._excluded, size, {'path': path, 'size': size, 'rule': rule})
+
+    def include(self, path, size):
+        """Count a file written to the output."""
+        self.included_count += 1
+        self.included_bytes += size
+        if self.top_n:
+            self._keep(self._included, size, {'path': path, 'size': size})
+
+    def merge(self, other):
+        """Add the counts, times and largest files recorded by another audit."""
+        for rule, stats in other.rules.items():
+            merged = self._rule(rule)
+            for name, value in stats.items():
+                merged[name] += value
+        self.included_count += other.included_count
+        self.included_bytes += other.included_bytes
+        if self.top_n:
+            for heap, other_heap in ((self._included, other._included), (self._excluded, other._excluded)):
+                for size, _, record in other_heap:
+                    self._keep(heap, size, record)
+
+    @property
+    def skipped_count(self):
+        return sum(stats['hits'] for stats in self.rules.values())
+
+    @property
+    def skipped_bytes(self):
+        return sum(stats['bytes'] for stats in self.rules.values())
+
+    def top_rules(self, n=3):
+        """Return the n (rule, stats) pairs with the most hits."""
+        ranked = sorted(self.rules.items(), key=lambda item: (-item[1]['hits'], -item[1]['seconds']))
+        return [(rule, stats) for rule, stats in ranked[:n] if stats['hits']]
+
+    def to_dict(self):
+        return {
+            'elapsed_seconds': round(time.perf_counter() - self.started, 6),
+            'included': {'files': self.included_count, 'bytes': self.included_bytes},
+            'skipped': {'files': self.skipped_count, 'bytes': self.skipped_bytes},
+            'rules': {rule: dict(stats, seconds=round(stats['seconds'], 6))
+                      for rule, stats in sorted(self.rules.items(), key=lambda item: -item[1]['hits'])},
+            'largest_included': [record for _, _, record in sorted(self._included, reverse=True)],
+            'largest_excluded': [record for _, _, record in sorted(self._excluded, reverse=True)],
+        }
+
+    def save(self, path):
+        """Write the audit as JSON, atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        logging.info(f"Filter audit written to {path}")
+
+
+def audit_path(output_file_path):
+    """Return the default path of the audit written next to an output file."""
+    return output_file_path + AUDIT_SUFFIX
+
+
+def timed(audit, rule, func, *args):
+    """Call func(*args), timing it under rule when an audit is given."""
+    if audit is None:
+        return func(*args)
+    return audit.time(rule, func, *args)
@@ -0,0 +1,128 @@
+# Description: Token budget for the output, with cheap ranking of candidate files.
+
+import argparse
+import logging
+import math
+
+from codeweave.utils.file import CHARS_PER_TOKEN
+
+# File stems that usually define a project's entry points or public surface
+ENTRY_POINT_STEMS = frozenset({
+    '__init__', '__main__', 'main', 'app', 'cli', 'index', 'server', 'api', 'core', 'lib', 'mod', 'manage',
+})
+# Directories whose files are rarely needed to understand a project
+LOW_VALUE_DIRS = frozenset({
+    'example', 'examples', 'sample', 'samples', 'demo', 'demos', 'doc', 'docs', 'benchmark', 'benchmarks',
+    'bench', 'scripts', 'tools', 'migrations', 'generated', 'fixtures', 'third_party', 'vendor', 'contrib',
+})
+# Name fragments of generated or minified files
+LOW_VALUE_MARKERS = ('_pb2', '.pb.', '.min.', '.generated.', '_generated', '.bundle.')
+# Files up to this size are not ranked down for their size
+SIZE_FREE_BYTES = 16 * 1024
+
+
+def estimate_size_tokens(size:int)->int:
+    """Estimate the tokens of a file from its size in bytes."""
+    return -(-size // CHARS_PER_TOKEN)
+
+
+def rank_key(rel_path:str, size:int, entry_dirs=frozenset()):
+    """Sort key of a candidate file; smaller keys are read first.
+
+    Only the path and size are used, so candidates are ranked before any
+    content is read. Shallow files, entry points and their siblings come
+    first; examples, generated files and large files come last.
+    """
+    directory, _, name = rel_path.rpartition('/')
+    parts = directory.split('/') if directory else []
+    score = len(parts)
+    if name.split('.')[0] in ENTRY_POINT_STEMS:
+        score -= 2
+    elif directory in entry_dirs:
+        score -= 1
+    if not LOW_VALUE_DIRS.isdisjoint(part.lower() for part in parts):
+        score += 3
+    if any(marker in name for marker in LOW_VALUE_MARKERS):
+        score += 3
+    if size > SIZE_FREE_BYTES:
+        score += math.log2(size / SIZE_FREE_BYTES)
+    return (score, size, rel_path)
+
+
+def rank_candidates(candidates):
+    """Sort (rel_path, size, item) tuples by rank_key."""
+    candidates = list(candidates)
+    entry_dirs = {rel_path.rpartition('/')[0] for rel_path, _, _ in candidates
+                  if rel_path.rpartition('/')[2].split('.')[0] in ENTRY_POINT_STEMS}
+    return sorted(candidates, key=lambda c: rank_key(c[0], c[1], entry_dirs))
+
+
+class TokenBudget:
+    """Limits the estimated tokens written to the output.
+
+    Files are admitted on the token estimate of their size, before they are
+    read, and charged the estimate of their rendered section, which is
+    dropped if it does not fit after all. Comment stripping is therefore not
+    credited when admitting a file.
+    """
+
+    def __init__(self, max_tokens=None, max_file_tokens=None):
+        self.max_tokens = max_tokens
+        self.max_file_tokens = max_file_tokens
+        self.used = 0
+        self.skipped = 0
+        self.unread = 0
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace):
+        """Return the budget of args, or None when no limit is given."""
+        max_tokens = getattr(args, 'max_tokens', None)
+        max_file_tokens = getattr(args, 'max_file_tokens', None)
+        if max_tokens is None and max_file_tokens is None:
+            return None
+        return cls(max_tokens, max_file_tokens)
+
+    @property
+    def remaining(self):
+        return math.inf if self.max_tokens is None else self.max_tokens - self.used
+
+    def admits(self, rel_path:str, size:int)->bool:
+        """Check, before reading it, whether a file of this size may fit."""
+        tokens = estimate_size_tokens(size)
+        if self.max_file_tokens is not None and tokens > self.max_file_tokens:
+            logging.debug(f"Skipping file over the per-file token cap ({tokens} tokens): {rel_path}")
+        elif tokens > self.remaining:
+            logging.debug(f"Skipping file over the remaining token budget ({tokens} tokens): {rel_path}")
+        else:
+            return True
+        self.skipped += 1
+        return False
+
+    def accept(self, rel_path:str, section_size:int)->bool:
+        """Charge a rendered section of section_size characters, unless it does not fit."""
+        tokens = estimate_size_tokens(section_size)
+        if tokens > self.remaining or (self.max_file_tokens is not None and tokens > self.max_file_tokens):
+            logging.debug(f"Dropping section over the token budget ({tokens} tokens): {rel_path}")
+            self.skipped += 1
+            return False
+        self.used += tokens
+        return True
+
+    def ranked(self, candidates):
+        """Yield (rel_path, size, item) candidates in rank order while any can still fit.
+
+        Iteration stops as soon as the remaining budget is smaller than every
+        remaining candidate, so those candidates are never read.
+        """
+        ranked = rank_candidates(candidates)
+        smallest = [0] * len(ranked)
+        minimum = math.inf
+        for i in range(len(ranked) - 1, -1, -1):
+            minimum = min(minimum, estimate_size_tokens(ranked[i][1]))
+            smallest[i] = minimum
+        for i, candidate in enumerate(ranked):
+            if smallest[i] > self.remaining:
+                self.unread = len(ranked) - i
+                logging.info(f"Token budget exhausted; {self.unread} candidate files not read")
+                return
+            yield candidate
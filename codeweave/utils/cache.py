@@ -0,0 +1,176 @@
+# Description: Persistent cache of transformed file contents.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# Default upper bound for the transform cache, in megabytes
+DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB = 512
+# New entries are committed in batches of this size, and on close()
+COMMIT_INTERVAL = 256
+TRANSFORM_CACHE_FILE = 'transforms.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transforms (
+    key TEXT PRIMARY KEY,
+    transform TEXT NOT NULL,
+    result TEXT,
+    error_type TEXT,
+    error_message TEXT,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def content_hash(content):
+    """Return the hex SHA-256 of file content given as bytes or str."""
+    if isinstance(content, str):
+        content = content.encode('utf-8', errors='surrogatepass')
+    return hashlib.sha256(content).hexdigest()
+
+
+def open_transform_cache(cache_dir, max_size_mb=DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB, deferred=False):
+    """Open the transform cache in cache_dir, or return None if it cannot be opened."""
+    try:
+        return TransformCache(cache_dir, max_size_mb * 1024 * 1024, deferred)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Transform cache disabled, cannot open it in {cache_dir}: {e}")
+        return None
+
+
+class TransformCache:
+    """SQLite-backed cache of transform results.
+
+    Entries are keyed by the content hash, the transform name and its
+    options, so identical files are transformed once across repositories,
+    branches and runs. Expected failures (e.g. a SyntaxError while
+    stripping) are cached as well and raised again on a hit. The least
+    recently used entries are evicted on close() once the cache grows past
+    max_size bytes.
+
+    A deferred cache, used by worker processes, only reads the database:
+    new entries, access times and counters are collected by take_deferred()
+    and stored by the main process's cache with absorb().
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_TRANSFORM_CACHE_MAX_SIZE_MB * 1024 * 1024, deferred=False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, TRANSFORM_CACHE_FILE)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self._pending = 0
+        self._deferred = [] if deferred else None
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(transform, content, options=None):
+        options_json = json.dumps(options or {}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{transform}\0{options_json}\0{content_hash(content)}".encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, transform, content, compute, options=None, errors=()):
+        """Return the cached result of a transform, computing and storing it on a miss.
+
+        Args:
+            transform: Name (and version) of the transform, e.g. 'strip-python:1'
+            content: The input of the transform, as bytes or str
+            compute: Callable returning the transformed text
+            options: JSON-serializable options that change the result
+            errors: Exception types raised by compute that should be cached
+        """
+        key = self.make_key(transform, content, options)
+        row = self.connection.execute(
+            "SELECT result, error_type, error_message FROM transforms WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            self._touched[key] = time.time()
+            result, error_type, error_message = row
+            if error_type is None:
+                return result
+            for error in errors:
+                if error.__name__ == error_type:
+                    raise error(error_message)
+            # The failure is no longer expected by this caller; compute again
+            self.hits -= 1
+
+        self.misses += 1
+        try:
+            result = compute()
+        except errors as e:
+            self._store(key, transform, None, type(e).__name__, str(e))
+            raise
+        self._store(key, transform, result)
+        return result
+
+    def _store(self, key, transform, result, error_type=None, error_message=None):
+        size = len(result.encode('utf-8', errors='surrogatepass')) if result is not None else 0
+        row = (key, transform, result, error_type, error_message, size, time.time())
+        if self._deferred is not None:
+            self._deferred.append(row)
+            return
+        try:
+            self._insert([row])
+        except sqlite3.Error as e:
+            logging.debug(f"Cannot store transform result in {self.path}: {e}")
+
+    def _insert(self, rows):
+        self.connection.executemany("INSERT OR REPLACE INTO transforms VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._pending += len(rows)
+        if self._pending >= COMMIT_INTERVAL:
+            self.connection.commit()
+            self._pending = 0
+
+    def take_deferred(self):
+        """Return and reset what a deferred cache collected since the last call."""
+        report = {'rows': self._deferred, 'touched': self._touched, 'hits': self.hits, 'misses': self.misses}
+        self._deferred = []
+        self._touched = {}
+        self.hits = self.misses = 0
+        return report
+
+    def absorb(self, report):
+        """Store what a deferred cache collected, see take_deferred()."""
+        self.hits += report['hits']
+        self.misses += report['misses']
+        for key, used in report['touched'].items():
+            self._touched[key] = max(used, self._touched.get(key, 0))
+        if report['rows']:
+            try:
+                self._insert(report['rows'])
+            except sqlite3.Error as e:
+                logging.debug(f"Cannot store transform results in {self.path}: {e}")
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_size."""
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM transforms").fetchone()[0]
+        if total <= self.max_size:
+            return
+        freed = 0
+        stale = []
+        for key, size in self.connection.execute("SELECT key, size FROM transforms ORDER BY last_used"):
+            if total - freed <= self.max_size:
+                break
+            stale.append((key,))
+            freed += size
+        self.connection.executemany("DELETE FROM transforms WHERE key = ?", stale)
+        self.connection.commit()
+        logging.debug(f"Evicted {len(stale)} entries ({freed:,} bytes) from the transform cache")
+
+    def close(self):
+        """Commit new entries and the access times of this run's hits, evict and close the database."""
+        try:
+            self.connection.executemany("UPDATE transforms SET last_used = ? WHERE key = ?",
+                                        [(used, key) for key, used in self._touched.items()])
+            self.connection.commit()
+            self.evict()
+        except sqlite3.Error as e:
+            logging.debug(f"Cannot update the transform cache {self.path}: {e}")
+        finally:
+            self.connection.close()
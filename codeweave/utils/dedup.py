@@ -0,0 +1,198 @@
+# Description: Exact and near-duplicate detection of rendered sections, with MinHash and LSH banding.
+
+import argparse
+import hashlib
+import logging
+from array import array
+from collections import namedtuple
+
+# Bins of a MinHash signature; more bins estimate similarity more precisely
+DEFAULT_SIGNATURE_BINS = 128
+# Chance that a pair exactly at the threshold is found by the LSH bands
+LSH_RECALL = 0.99
+# Bodies shorter than this are always written: a back-reference saves little,
+# and placeholders (e.g. of PDFs without --pdf_text_mode) would all match
+MIN_DEDUP_CHARS = 128
+
+_HASH_MASK = (1 << 64) - 1
+# Value of a bin no shingle of the section falls into
+_EMPTY = _HASH_MASK
+
+Duplicate = namedtuple('Duplicate', 'path similarity exact')
+Fingerprint = namedtuple('Fingerprint', 'path digest signature')
+
+
+def lsh_bands(threshold, bins=DEFAULT_SIGNATURE_BINS):
+    """Return (bands, rows) splitting a signature so pairs at threshold become candidates.
+
+    The most rows per band (fewest spurious candidates) are used for which
+    a pair with Jaccard similarity threshold shares at least one band with
+    probability LSH_RECALL.
+    """
+    for rows in range(bins, 0, -1):
+        if bins % rows:
+            continue
+        bands = bins // rows
+        if 1 - (1 - threshold ** rows) ** bands >= LSH_RECALL:
+            return bands, rows
+    return bins, 1
+
+
+def split_section(section):
+    """Split a rendered section into its 'File:' header line and its body."""
+    header, _, body = section.partition('\n')
+    return header, body
+
+
+def section_path(header):
+    """Return the path a section's header line shows."""
+    return header.partition('File: ')[2] or header
+
+
+def back_reference(section, duplicate):
+    """Return the section replacing a duplicate: its header and a line naming the first occurrence."""
+    header, _ = split_section(section)
+    prefix = header[:header.find('File: ')] if 'File: ' in header else '# '
+    if duplicate.exact:
+        return f"{header}\n{prefix}Duplicate of: {duplicate.path}\n\n"
+    return f"{header}\n{prefix}Near-duplicate of: {duplicate.path} ({duplicate.similarity:.0%} similar)\n\n"
+
+
+class Deduplicator:
+    """Finds sections whose body was already written under another path.
+
+    Paths are those shown by the sections' 'File:' headers, so a
+    back-reference names the first occurrence as it appears in the output.
+
+    Exact duplicates are found by a digest of the body, as rendered (after
+    comment stripping and other transforms). With a threshold, near
+    duplicates are found by MinHash: the shingles of a body are its pairs
+    of consecutive non-blank lines, stripped, so re-indented copies and
+    files differing by a header match. A signature is computed with one
+    permutation hashing (each shingle hash falls into one bin that keeps
+    its minimum), in a single pass over the shingles, and indexed in LSH
+    bands; candidates sharing a band are confirmed by estimating their
+    similarity over the whole signature.
+
+    Shingles are hashed with hash(), which is salted per process, so
+    signatures are only comparable within the run that computed them.
+    """
+
+    def __init__(self, threshold=None, bins=DEFAULT_SIGNATURE_BINS):
+        self.threshold = threshold
+        self.bins = bins
+        self.exact = {}
+        self.paths = []
+        self.signatures = []
+        self.buckets = []
+        self.rows = bins
+        if threshold is not None:
+            bands, self.rows = lsh_bands(threshold, bins)
+            self.buckets = [{} for _ in range(bands)]
+        self.duplicates = 0
+        self.near_duplicates = 0
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace):
+        """Return the deduplicator of args, or None without --dedup."""
+        threshold = getattr(args, 'dedup_threshold', None)
+        if not getattr(args, 'dedup', False) and threshold is None:
+            return None
+        return cls(threshold)
+
+    def signature(self, body):
+        """Return the one permutation MinHash signature of a body, or None if it has no shingles."""
+        lines = [line for line in map(str.strip, body.split('\n')) if line]
+        if len(lines) < 2:
+            return None
+        bins = self.bins
+        signature = array('Q', [_EMPTY]) * bins
+        for value in set(map(hash, zip(lines, lines[1:]))):
+            value &= _HASH_MASK
+            slot = value % bins
+            value //= bins
+            if value < signature[slot]:
+                signature[slot] = value
+        return signature
+
+    def similarity(self, first, second):
+        """Estimate the Jaccard similarity of two signatures from the bins either of them fills."""
+        filled = matches = 0
+        for a, b in zip(first, second):
+            if a != _EMPTY or b != _EMPTY:
+                filled += 1
+                matches += a == b
+        return matches / filled if filled else 0.0
+
+    def _bands(self, signature):
+        rows = self.rows
+        for band in range(len(self.buckets)):
+            key = signature[band * rows:(band + 1) * rows]
+            if any(value != _EMPTY for value in key):
+                yield band, key.tobytes()
+
+    def fingerprint(self, section):
+        """Compute the digest and, with a threshold, the signature of a section's body.
+
+        Returns None for a body too short to be deduplicated.
+        """
+        header, body = split_section(section)
+        if len(body) < MIN_DEDUP_CHARS:
+            return None
+        digest = hashlib.blake2b(body.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+        signature = self.signature(body) if self.threshold is not None else None
+        return Fingerprint(section_path(header), digest, signature)
+
+    def find(self, fingerprint):
+        """Return the Duplicate of the most similar section added so far, or None."""
+        path = self.exact.get(fingerprint.digest)
+        if path is not None:
+            return Duplicate(path, 1.0, True)
+        if fingerprint.signature is None:
+            return None
+        best = None
+        seen = set()
+        for band, key in self._bands(fingerprint.signature):
+            for index in self.buckets[band].get(key, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                similarity = self.similarity(fingerprint.signature, self.signatures[index])
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = Duplicate(self.paths[index], similarity, False)
+        return best
+
+    def add(self, fingerprint):
+        """Remember a section written in full."""
+        self.exact.setdefault(fingerprint.digest, fingerprint.path)
+        if fingerprint.signature is None:
+            return
+        index = len(self.paths)
+        self.paths.append(fingerprint.path)
+        self.signatures.append(fingerprint.signature)
+        for band, key in self._bands(fingerprint.signature):
+            self.buckets[band].setdefault(key, []).append(index)
+
+    def replace(self, section):
+        """Return (section to write, fingerprint, duplicate) for a rendered section.
+
+        A duplicate section is replaced by its back_reference. Pass the
+        result to record() once the section is written.
+        """
+        fingerprint = self.fingerprint(section)
+        duplicate = None if fingerprint is None else self.find(fingerprint)
+        if duplicate is None:
+            return section, fingerprint, None
+        return back_reference(section, duplicate), fingerprint, duplicate
+
+    def record(self, fingerprint, duplicate):
+        """Count a written back-reference, or remember a section written in full."""
+        if duplicate is None:
+            if fingerprint is not None:
+                self.add(fingerprint)
+        elif duplicate.exact:
+            self.duplicates += 1
+            logging.debug(f"Duplicate of {duplicate.path}: {fingerprint.path}")
+        else:
+            self.near_duplicates += 1
+            logging.debug(f"Near-duplicate ({duplicate.similarity:.0%}) of {duplicate.path}: {fingerprint.path}")
@@ -0,0 +1,343 @@
+# Description: Utility functions for streaming repository archives over HTTP.
+
+import hashlib
+import json
+import logging
+import os
+import contextlib
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+import requests.adapters
+from rich.console import Console
+
+from codeweave.utils.archive import archive_suffix
+from rich.progress import (
+    Progress,
+    SpinnerColumn,
+    TextColumn,
+    BarColumn,
+    DownloadColumn,
+    TransferSpeedColumn,
+    TimeRemainingColumn,
+)
+
+# Default size of each chunk pulled off the socket while downloading
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Archives smaller than this stay in memory, larger ones roll over to disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Root of all on-disk caches kept by CodeWeave
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'codeweave')
+# Default upper bound for the archive cache, in megabytes
+DEFAULT_CACHE_MAX_SIZE_MB = 2048
+# Number of pooled connections kept per host by the shared session
+DEFAULT_POOL_SIZE = 16
+# Seconds to wait for a connection, and between bytes of a response
+DEFAULT_HTTP_TIMEOUT = (10, 60)
+
+_session = None
+
+
+def get_session():
+    """Return the process-wide requests.Session with a pooled HTTP adapter.
+
+    Reusing one session keeps TCP/TLS connections alive across archive
+    downloads and range requests.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def _content_length(response):
+    """Return the Content-Length of a response as an int, or None if unknown."""
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+class _HashingWriter:
+    """File wrapper that feeds everything written through a hash."""
+
+    def __init__(self, fileobj, hasher):
+        self.fileobj = fileobj
+        self.hasher = hasher
+
+    def write(self, data):
+        self.hasher.update(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def stream_response_to_file(response, fileobj, chunk_size=DEFAULT_CHUNK_SIZE, console=None,
+                            description="Downloading archive", show_progress=True):
+    """Copy a streamed response body into fileobj chunk by chunk.
+
+    Progress is reported in bytes; the bar is indeterminate when the server
+    does not send a Content-Length (GitHub archives usually don't). Pass
+    show_progress=False when downloading from a background thread, since
+    rich allows only one live display at a time.
+
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    if not show_progress:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            fileobj.write(chunk)
+            written += len(chunk)
+        fileobj.flush()
+        return written
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+        console=console or Console(),
+    ) as progress:
+        task = progress.add_task(description, total=_content_length(response))
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not chunk:
+                continue
+            fileobj.write(chunk)
+            written += len(chunk)
+            progress.advance(task, len(chunk))
+    fileobj.flush()
+    return written
+
+
+def download_archive(url, chunk_size=DEFAULT_CHUNK_SIZE, session=None, console=None, show_progress=True,
+                     timeout=DEFAULT_HTTP_TIMEOUT):
+    """Stream the archive at url into a spooled temporary file.
+
+    The body is never held in memory as a whole: it is written chunk by chunk
+    into a SpooledTemporaryFile that moves to disk once it outgrows
+    SPOOL_MAX_SIZE. The file is deleted as soon as it is closed.
+
+    Args:
+        url: Archive URL
+        chunk_size: Number of bytes to read per chunk
+        session: Optional requests.Session to reuse connections
+        console: Optional rich Console for the progress bar
+        show_progress: Whether to display a progress bar
+        timeout: (connect, read) timeout in seconds
+
+    Returns:
+        Tuple of (status_code, fileobj). fileobj is positioned at the start of
+        the archive, or None when the request did not succeed.
+    """
+    http = session or requests
+    with http.get(url, stream=True, timeout=timeout) as response:
+        if response.status_code != 200:
+            return response.status_code, None
+        archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, suffix=archive_suffix(url))
+        try:
+            size = stream_response_to_file(response, archive, chunk_size, console, show_progress=show_progress)
+        except BaseException:
+            archive.close()
+            raise
+    logging.debug(f"Downloaded {size:,} bytes from {url}")
+    archive.seek(0)
+    return response.status_code, archive
+
+
+class ArchiveCache:
+    """On-disk cache of repository archives, keyed by archive URL (repo + ref).
+
+    Each entry is an archive file plus a small JSON sidecar holding the
+    ETag/Last-Modified validators, the size, the SHA-256 of the archive and
+    the time it was last used. Entries are revalidated with a conditional
+    GET, and the least recently used ones are evicted once the cache grows
+    beyond max_size bytes. Archives keep the suffix of their URL (.zip,
+    .tar.gz, ...).
+
+    Batch mode fetches from several threads: archives being fetched or
+    read are pinned (see pin()) and never evicted, and eviction runs under
+    a lock shared by all instances.
+    """
+
+    _lock = threading.Lock()
+    # Pin counts by archive path, shared by the instances of the process
+    _pinned = Counter()
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_MAX_SIZE_MB * 1024 * 1024):
+        self.directory = os.path.join(os.path.expanduser(cache_dir), 'archives')
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + archive_suffix(url), base + '.json'
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta_path, meta):
+        # A unique temporary file, since batch threads may write the same entry
+        fd, tmp_path = tempfile.mkstemp(suffix='.json.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+    @contextlib.contextmanager
+    def pin(self, url):
+        """Keep the archive of url from being evicted while the block runs, e.g. while it is opened."""
+        archive_path = self._paths(url)[0]
+        with self._lock:
+            self._pinned[archive_path] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pinned[archive_path] -= 1
+                if not self._pinned[archive_path]:
+                    del self._pinned[archive_path]
+
+    def lookup(self, url):
+        """Return (archive_path, metadata) for a cached url, or (None, None)."""
+        archive_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is None or not os.path.exists(archive_path):
+            return None, None
+        return archive_path, meta
+
+    def _touch(self, url, meta):
+        meta['last_used'] = time.time()
+        self._write_meta(self._paths(url)[1], meta)
+
+    def fetch(self, url, chunk_size=DEFAULT_CHUNK_SIZE, session=None, offline=False, refresh=False,
+              console=None, show_progress=True, timeout=DEFAULT_HTTP_TIMEOUT):
+        """Return a local path for the archive at url, downloading only when needed.
+
+        Args:
+            url: Archive URL
+            chunk_size: Number of bytes to read per chunk
+            session: Optional requests.Session to reuse connections
+            offline: Never touch the network; only serve cached archives
+            refresh: Skip revalidation and download the archive again
+            show_progress: Whether to display a progress bar while downloading
+            timeout: (connect, read) timeout in seconds
+
+        Returns:
+            Tuple of (status_code, archive_path). archive_path is None when the
+            archive is neither cached nor downloadable. status_code is 304 for
+            a revalidated hit and None when no request was made. A cached
+            archive is served when the request fails.
+        """
+        with self.pin(url):
+            return self._fetch(url, chunk_size, session, offline, refresh, console, show_progress, timeout)
+
+    def _fetch(self, url, chunk_size, session, offline, refresh, console, show_progress, timeout):
+        archive_path, meta = self.lookup(url)
+
+        if offline:
+            if archive_path:
+                logging.info(f"Using cached archive (offline): {archive_path}")
+                self._touch(url, meta)
+            return None, archive_path
+
+        headers = {}
+        if meta and not refresh:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        http = session or requests
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 304 and archive_path:
+                    logging.info(f"Cached archive is up to date: {archive_path}")
+                    self._touch(url, meta)
+                    return response.status_code, archive_path
+                if response.status_code != 200:
+                    return response.status_code, None
+                archive_path = self._store(url, response, chunk_size, console, show_progress)
+                return response.status_code, archive_path
+        except requests.RequestException as e:
+            if archive_path:
+                logging.warning(f"Could not revalidate {url} ({e}); using cached archive")
+                self._touch(url, meta)
+                return None, archive_path
+            raise
+
+    def _store(self, url, response, chunk_size, console, show_progress):
+        archive_path, meta_path = self._paths(url)
+        hasher = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(suffix=archive_suffix(url) + '.part', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                size = stream_response_to_file(response, _HashingWriter(f, hasher), chunk_size, console,
+                                               show_progress=show_progress)
+            os.replace(tmp_path, archive_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._write_meta(meta_path, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': size,
+            'sha256': hasher.hexdigest(),
+            'last_used': time.time(),
+        })
+        logging.debug(f"Cached {size:,} bytes from {url} at {archive_path}")
+        self.evict(keep=archive_path)
+        return archive_path
+
+    def evict(self, keep=None):
+        """Delete least recently used archives until the cache fits in max_size; pinned ones are kept."""
+        with self._lock:
+            self._evict(keep)
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            meta = self._read_meta(meta_path)
+            if meta is None or 'url' not in meta:
+                continue
+            archive_path = self._paths(meta['url'])[0]
+            if not os.path.exists(archive_path):
+                # Tarballs cached before archives kept their suffix were named .zip
+                archive_path = meta_path[:-len('.json')] + '.zip'
+                if not os.path.exists(archive_path):
+                    continue
+            entries.append((meta.get('last_used', 0), archive_path, meta_path, os.path.getsize(archive_path)))
+
+        total = sum(entry[3] for entry in entries)
+        for _, archive_path, meta_path, size in sorted(entries):
+            if total <= self.max_size:
+                break
+            if archive_path == keep or archive_path in self._pinned:
+                continue
+            logging.debug(f"Evicting cached archive {archive_path}")
+            for path in (archive_path, meta_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    # Already gone, or still open elsewhere on Windows
+                    pass
+            total -= size
@@ -1,23 +1,222 @@
 # Description: This file contains utility functions for working with file content
 
-import ast
+import re
+from dataclasses import dataclass
 
-def has_sufficient_content(file_content, min_line_count=10):
+from codeweave.utils.strip import apply_removals
+
+# Minimum number of substantive lines for a file to be included
+MIN_LINE_COUNT = 10
+# Rough characters-per-token ratio of source code for BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# A line holding something other than whitespace or a '#' or '//' comment
+_SUBSTANTIVE_LINE = re.compile(r'^[^\S\n]*(?:[^\s#/]|/(?!/))', re.MULTILINE)
+_PLACEHOLDER_PREFIX = "[PDF file - use"
+
+def count_substantive_lines(file_content):
+    """Count the lines that are not blank and not '#' or '//' comments."""
+    return sum(1 for _ in _SUBSTANTIVE_LINE.finditer(file_content))
+
+def has_sufficient_content(file_content, min_line_count=MIN_LINE_COUNT):
     """Check if the file has a minimum number of substantive lines."""
     # Special case for PDF files with placeholder text
-    if file_content.startswith("[PDF file - use"):
+    if file_content.startswith(_PLACEHOLDER_PREFIX):
         return True
-        
-    lines = [line for line in file_content.split('\n') if line.strip() and not line.strip().startswith(('#', '//'))]
-    return len(lines) >= min_line_count
+    return count_substantive_lines(file_content) >= min_line_count
+
+
+class IndicatorMatcher:
+    """Finds the languages whose test indicators occur in a text, in one scan.
+
+    All indicators are compiled into a single alternation inside a
+    lookahead, so the regex engine tries them at every position in one
+    pass. Each indicator also reports the languages of the indicators it
+    contains, since the longest indicator starting at a position hides the
+    shorter ones there.
+    """
+
+    def __init__(self, langs, profiles=None):
+        # Imported here: the profile registry imports codeweave.utils.path
+        from codeweave.utils.languages import get_profile
+        self.langs = tuple(langs)
+        owners = {}
+        for lang in self.langs:
+            for indicator in get_profile(lang, profiles).test_indicators:
+                owners.setdefault(indicator, set()).add(lang)
+        self.languages = {indicator: frozenset().union(*(langs for other, langs in owners.items() if other in indicator))
+                          for indicator in owners}
+        self.regex = None
+        if owners:
+            alternation = '|'.join(re.escape(i) for i in sorted(owners, key=len, reverse=True))
+            self.regex = re.compile(f'(?=({alternation}))')
+
+    def match(self, file_content)->frozenset:
+        """Return the languages with at least one indicator in file_content."""
+        if self.regex is None:
+            return frozenset()
+        found = set()
+        wanted = len(set(self.langs))
+        for indicator in self.regex.finditer(file_content):
+            found |= self.languages[indicator.group(1)]
+            if len(found) == wanted:
+                break
+        return frozenset(found)
+
+
+@dataclass(frozen=True)
+class ContentStats:
+    """What the filters need to know about a file's text, from one analysis.
+
+    Attributes:
+        substantive_lines: Lines that are not blank or '#'/'//' comments
+        test_languages: Selected languages whose test indicators occur
+        longest_line: Length of the longest line, in characters
+        estimated_tokens: Approximate LLM token count
+        placeholder: The text is a placeholder, e.g. for a PDF not extracted
+    """
+    substantive_lines: int
+    test_languages: frozenset
+    longest_line: int
+    estimated_tokens: int
+    placeholder: bool = False
+
+    @property
+    def is_test(self)->bool:
+        return bool(self.test_languages)
+
+    def is_sufficient(self, min_line_count=MIN_LINE_COUNT)->bool:
+        return self.placeholder or self.substantive_lines >= min_line_count
+
+
+def estimate_tokens(file_content):
+    """Approximate the token count of a text without a tokenizer."""
+    return -(-len(file_content) // CHARS_PER_TOKEN)
+
+def analyze_content(file_content, matcher=None)->ContentStats:
+    """Compute the ContentStats of a text; matcher is a IndicatorMatcher."""
+    return ContentStats(
+        substantive_lines=count_substantive_lines(file_content),
+        test_languages=matcher.match(file_content) if matcher is not None else frozenset(),
+        longest_line=max(map(len, file_content.split('\n'))),
+        estimated_tokens=estimate_tokens(file_content),
+        placeholder=file_content.startswith(_PLACEHOLDER_PREFIX),
+    )
+
+def analyze_pages(pages, matcher=None)->ContentStats:
+    """Compute the ContentStats of a text given as pages (e.g. of a PDF) without joining them."""
+    stats = [analyze_content(page, matcher) for page in pages] or [analyze_content('', matcher)]
+    return ContentStats(
+        substantive_lines=sum(s.substantive_lines for s in stats),
+        test_languages=frozenset().union(*(s.test_languages for s in stats)),
+        longest_line=max(s.longest_line for s in stats),
+        estimated_tokens=sum(s.estimated_tokens for s in stats),
+    )
+
+# The Python lexemes that matter for stripping, after any blanks; other code
+# is matched in runs, which start after a string prefix has had its chance
+_PYTHON_LEXEME = re.compile(r"""
+    [ \t\f\r]*
+    (?:
+        (?P<string>[rRbBuUfF]{0,2}(?:
+            '''(?:[^'\\]|\\.|'(?!''))*'''
+          | \"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"
+          | '(?:[^'\\\n]|\\.)*'
+          | "(?:[^"\\\n]|\\.)*"))
+      | (?P<error>[rRbBuUfF]{0,2}['"])
+      | (?P<comment>\#[^\n]*)
+      | (?P<newline>\n)
+      | (?P<continuation>\\\r?\n)
+      | (?P<open>[(\[{])
+      | (?P<close>[)\]}])
+      | (?P<code>[^\s\#'"\\()\[\]{}][^\#'"\\()\[\]{}\n]*|\\)
+    )
+""", re.VERBOSE | re.DOTALL)
+_FSTRING_PREFIX = re.compile(r'[rRbBuU]?[fF]')
+
+def _python_removals(source):
+    """Return the (start, end, replacement) offsets of the comments and string statements.
+    
+    A string statement is a logical line made only of string literals other
+    than f-strings, which covers docstrings. One that leaves its block empty
+    is replaced with 'pass'. Scanning stops at an unterminated string.
+    """
+    removals = []
+    # Indentation, whether a statement is kept, index of the last removed statement
+    blocks = [[0, True, None]]
+    depth = 0
+    line_begin = 0
+    statement = None  # String spans of the current logical line, False once it has code
+    continuations = []  # Backslashes continuing onto the current lexeme
+
+    def close_block(block):
+        if not block[1] and block[2] is not None:
+            removals[block[2]] = removals[block[2]][:2] + ('pass',)
+
+    def end_statement():
+        if statement:
+            removals.append((statement[0][0], statement[-1][1], ''))
+            blocks[-1][2] = len(removals) - 1
+        elif statement is False:
+            blocks[-1][1] = True
+
+    for match in _PYTHON_LEXEME.finditer(source):
+        kind = match.lastgroup
+        start = match.start(kind)
+        if kind == 'comment':
+            # The comment ends the logical line, so the backslashes continuing
+            # onto it go too, or they would join the next line once it is dropped
+            removals.extend((backslash, backslash + 1, '') for backslash in continuations)
+            removals.append((start, match.end(), ''))
+            continuations = []
+            continue
+        if kind == 'continuation':
+            continuations.append(start)
+            continue
+        continuations = []
+        if kind == 'newline':
+            if depth == 0 and statement is not None:
+                end_statement()
+                statement = None
+            line_begin = match.end()
+            continue
+        if kind == 'error':
+            return removals
+        if statement is None:
+            indent = len(source[line_begin:start].expandtabs(8))
+            if indent > blocks[-1][0]:
+                blocks.append([indent, False, None])
+            while len(blocks) > 1 and indent < blocks[-1][0]:
+                close_block(blocks.pop())
+            statement = []
+        # f-strings run code when evaluated, so they are kept
+        if kind == 'string' and statement is not False and not _FSTRING_PREFIX.match(source, start):
+            statement.append((start, match.end()))
+        else:
+            statement = False
+        if kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            depth = max(depth - 1, 0)
+
+    end_statement()
+    while len(blocks) > 1:
+        close_block(blocks.pop())
+    return removals
 
 def remove_comments_and_docstrings(source):
-    """Remove comments and docstrings from the Python source code."""
-    tree = ast.parse(source)
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)) and ast.get_docstring(node):
-            node.body = node.body[1:]  # Remove docstring
-        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Str):
-            node.value.s = ""  # Remove comments
-    return ast.unparse(tree)
+    """Remove comments and docstrings from the Python source code.
+    
+    Works in one pass over the source, so the remaining code keeps its
+    formatting and line structure: lines that only held comments or
+    docstrings are dropped, every other line is kept as written apart from
+    trailing whitespace left by a removed comment. Bare string statements
+    are removed like docstrings. Nothing is parsed, so Python 2 and other
+    invalid code is stripped too; an unterminated string ends stripping and
+    the rest of the file is kept as is.
 
+    Strings are lexed as before Python 3.12: an f-string that reuses its own
+    quote inside a replacement field, e.g. f"{d["key"]}", is split where
+    that quote occurs, so a '#' after it may be taken for a comment.
+    """
+    return apply_removals(source, _python_removals(source))
@@ -0,0 +1,136 @@
+# Description: File selection rules compiled once per run.
+
+import argparse
+import fnmatch
+import logging
+import re
+
+from codeweave.utils.languages import COMMON_DOC_FILES, get_profile, profile_excluded_dirs
+from codeweave.utils.path import file_extension_dict
+
+def _any_substring_regex(substrings):
+    """Compile a regex searching for any of the substrings, or None if there are none."""
+    if not substrings:
+        return None
+    # Longest first so the alternation does not stop at a shorter prefix
+    return re.compile('|'.join(re.escape(s) for s in sorted(set(substrings), key=len, reverse=True)))
+
+
+class FilterPlan:
+    """The file selection rules of one run, compiled once.
+
+    Replaces per-file loops over patterns with a combined regex for the
+    exclude globs, a suffix-keyed dict for extensions, a combined substring
+    regex for --include, and sets of excluded directory segments, config
+    and doc file names merged from the language profiles. Paths are
+    '/'-separated, either full archive member paths or bare file names.
+    Folders pass bare names, so their excluded directories are pruned by
+    the walker instead (see enumerate_folder in main).
+    """
+
+    def __init__(self, langs, exclude=(), include=(), excluded_dirs=(), folder=None, profiles=None):
+        self.langs = list(langs)
+        self.folder = folder
+
+        # Suffix -> language keys, e.g. {'.py': ['python', 'py']}
+        self.extensions = {}
+        for lang in self.langs:
+            for ext in file_extension_dict.get(lang.replace('.', ''), []):
+                self.extensions.setdefault(ext, []).append(lang)
+
+        exclude = [pattern for pattern in exclude if pattern]
+        self.exclude_regex = (re.compile('|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in exclude))
+                              if exclude else None)
+        self.include_regex = _any_substring_regex([include_pattern for include_pattern in include if include_pattern])
+
+        # Rules of all selected languages apply to every file
+        language_profiles = [get_profile(lang, profiles) for lang in self.langs]
+        self.excluded_segments = frozenset(d for d in excluded_dirs if d and '/' not in d).union(
+            profile_excluded_dirs(self.langs, profiles))
+        # Excluded directories given as nested paths ('src/generated') are matched as substrings
+        self.excluded_nested_dirs = tuple(d.strip('/') for d in excluded_dirs if '/' in d.strip('/'))
+        self.config_files = frozenset().union(*(profile.config_files for profile in language_profiles))
+        doc_files = COMMON_DOC_FILES.union(*(profile.doc_files for profile in language_profiles))
+        self.hidden_doc_files = frozenset(d for d in doc_files if d.startswith('.'))
+        self.doc_files = frozenset(d for d in doc_files if not d.startswith('.'))
+        self.skip_test_paths = isinstance(folder, str) and 'test' not in folder
+
+        # (rule, rejects) pairs, cheapest first, named as in skip_reasons
+        self.rules = (
+            ('bad filetype', lambda path: not self.matches_type(path)),
+            ('should exclude', self.is_excluded),
+            ('inclusion violate', self.violates_inclusion),
+            ('not useful', lambda path: not self.is_likely_useful(path)),
+        )
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace):
+        return cls(args.lang, args.exclude or (), args.include or (), args.excluded_dirs or (),
+                   getattr(args, 'folder', None), getattr(args, 'language_profiles', None))
+
+    def matches_type(self, path:str)->bool:
+        """Check if the path ends with an extension of the selected languages."""
+        name = path.rpartition('/')[2]
+        dot = name.find('.')
+        while dot != -1:
+            if name[dot:] in self.extensions:
+                return True
+            dot = name.find('.', dot + 1)
+        return False
+
+    def is_excluded(self, path:str)->bool:
+        """Check if the path matches any of the --exclude globs."""
+        return self.exclude_regex is not None and self.exclude_regex.match(path) is not None
+
+    def violates_inclusion(self, path:str)->bool:
+        """Check if --include is given and the path contains none of its patterns."""
+        return self.include_regex is not None and self.include_regex.search(path) is None
+
+    def is_likely_useful(self, path:str)->bool:
+        """Compiled equivalent of is_likely_useful_file for all selected languages."""
+        parts = path.split('/')
+        name = parts[-1]
+        if any(part.startswith('.') and not part.startswith('..') and part != '.' for part in parts):
+            return False
+        if self.skip_test_paths and 'test' in path.lower():
+            return False
+        if self.excluded_segments and not self.excluded_segments.isdisjoint(parts[:-1]):
+            return False
+        if any(f"/{d}/" in path or path.startswith(d + "/") for d in self.excluded_nested_dirs):
+            return False
+        if name in self.config_files:
+            return False
+        if name in self.hidden_doc_files or (len(parts) > 1 and name in self.doc_files):
+            return False
+        return True
+
+    def skip_reasons(self, path:str)->dict:
+        """Return every rule with whether it rejects the path; any True value skips it."""
+        return {
+            'bad filetype': not self.matches_type(path),
+            'not useful': not self.is_likely_useful(path),
+            'should exclude': self.is_excluded(path),
+            'inclusion violate': self.violates_inclusion(path),
+        }
+
+    def selects(self, path:str, audit=None, size=0, display_path=None)->bool:
+        """Check all rules, cheapest first, stopping at the first that rejects the path.
+
+        With a FilterAudit, each rule is timed and a rejection is recorded
+        under display_path (default path) with size, an int or a callable
+        only called on rejection.
+        """
+        if audit is None:
+            selected = (self.matches_type(path) and not self.is_excluded(path)
+                        and not self.violates_inclusion(path) and self.is_likely_useful(path))
+        else:
+            for rule, rejects in self.rules:
+                if audit.time(rule, rejects, path):
+                    audit.skip(rule, display_path or path, size() if callable(size) else size)
+                    selected = False
+                    break
+            else:
+                selected = True
+        if not selected:
+            logging.debug(f"Skipping file: {path}")
+        return selected
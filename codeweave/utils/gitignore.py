@@ -0,0 +1,220 @@
+# Description: Compiled .gitignore matching for folder walks and archives.
+
+import os
+import re
+import logging
+
+
+def _translate(pattern:str)->str:
+    """Translate a gitignore glob (without '!' or trailing '/') into a regex."""
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/') and (i + 2 == n or pattern[i + 2] == '/'):
+                if i + 2 == n:
+                    out.append('.*')  # 'dir/**' matches everything inside dir
+                    i += 2
+                else:
+                    out.append('(?:.*/)?')  # '**/' matches zero or more directories
+                    i += 3
+                continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                negate = body[:1] in ('!', '^')
+                if negate:
+                    body = body[1:]
+                body = body.replace('\\', '\\\\')
+                out.append(f"[{'^' if negate else ''}{body}]")
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class _RuleGroup:
+    """Consecutive rules sharing polarity and directory-only flag.
+
+    Plain names ('node_modules') and extension globs ('*.pyc') are kept in
+    sets; everything else is folded into one alternation regex.
+    """
+
+    __slots__ = ('negate', 'dir_only', 'names', 'suffixes', 'regexes', 'regex')
+
+    def __init__(self, negate, dir_only):
+        self.negate = negate
+        self.dir_only = dir_only
+        self.names = set()
+        self.suffixes = set()
+        self.regexes = []
+        self.regex = None
+
+    def add(self, pattern, anchored):
+        if not anchored and not any(ch in pattern for ch in '*?[\\'):
+            self.names.add(pattern)
+        elif (not anchored and pattern.startswith('*.') and
+              not any(ch in pattern[1:] for ch in '*?[\\/')):
+            self.suffixes.add(pattern[1:])
+        else:
+            prefix = '' if anchored else '(?:.*/)?'
+            self.regexes.append(prefix + _translate(pattern))
+
+    def compile(self):
+        if self.regexes:
+            self.regex = re.compile('(?:' + '|'.join(self.regexes) + r')\Z', re.DOTALL)
+
+    def matches(self, rel_path, name):
+        if name in self.names:
+            return True
+        if self.suffixes:
+            dot = name.find('.')
+            while dot != -1:
+                if name[dot:] in self.suffixes:
+                    return True
+                dot = name.find('.', dot + 1)
+        return self.regex is not None and self.regex.match(rel_path) is not None
+
+
+class IgnoreFile:
+    """The compiled rules of one .gitignore file."""
+
+    def __init__(self, text):
+        self.groups = []
+        for line in text.splitlines():
+            self._add_line(line)
+        for group in self.groups:
+            group.compile()
+
+    def _add_line(self, line):
+        if not line or line.startswith('#'):
+            return
+        # Trailing spaces are ignored unless escaped with a backslash
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '
+        line = stripped
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return
+        # A slash at the start or in the middle anchors the pattern to this directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+
+        if not self.groups or (self.groups[-1].negate, self.groups[-1].dir_only) != (negate, dir_only):
+            self.groups.append(_RuleGroup(negate, dir_only))
+        self.groups[-1].add(line, anchored)
+
+    def match(self, rel_path, is_dir):
+        """Return True (ignored), False (re-included) or None (no rule matched).
+
+        The last matching rule wins, so groups are checked from the end.
+        """
+        name = rel_path.rpartition('/')[2]
+        for group in reversed(self.groups):
+            if group.dir_only and not is_dir:
+                continue
+            if group.matches(rel_path, name):
+                return not group.negate
+        return None
+
+
+class GitIgnore:
+    """Matcher for the .gitignore files found below a root.
+
+    Rules from a deeper .gitignore take precedence over those of its
+    parents, and every file is compiled once when it is added. Callers that
+    walk a tree should prune ignored directories; is_path_ignored() also
+    checks ancestors, for flat listings such as archive member names.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self._dir_cache = {}
+
+    def add(self, base_dir, text):
+        """Register the contents of the .gitignore located in base_dir ('' for the root)."""
+        base_dir = base_dir.strip('/')
+        self.files[base_dir] = IgnoreFile(text)
+        self._dir_cache.clear()
+        logging.debug(f"Loaded .gitignore rules for '{base_dir or '.'}'")
+
+    def add_file(self, base_dir, path):
+        """Register a .gitignore file from disk, ignoring unreadable files."""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                self.add(base_dir, f.read())
+        except OSError as e:
+            logging.debug(f"Cannot read {path}: {e}")
+
+    def reload(self, base_dir, path):
+        """Re-read the .gitignore of base_dir after it changed or was removed."""
+        base_dir = base_dir.strip('/')
+        if os.path.isfile(path):
+            self.add_file(base_dir, path)
+        elif self.files.pop(base_dir, None) is not None:
+            self._dir_cache.clear()
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Check a '/'-separated path relative to the root, ignoring its ancestors."""
+        base = rel_path.rpartition('/')[0]
+        while True:
+            ignore_file = self.files.get(base)
+            if ignore_file is not None:
+                verdict = ignore_file.match(rel_path[len(base) + 1:] if base else rel_path, is_dir)
+                if verdict is not None:
+                    return verdict
+            if not base:
+                return False
+            base = base.rpartition('/')[0]
+
+    def _is_dir_ignored(self, rel_dir):
+        if not rel_dir:
+            return False
+        cached = self._dir_cache.get(rel_dir)
+        if cached is None:
+            parent = rel_dir.rpartition('/')[0]
+            cached = self._is_dir_ignored(parent) or self.is_ignored(rel_dir, is_dir=True)
+            self._dir_cache[rel_dir] = cached
+        return cached
+
+    def is_path_ignored(self, rel_path):
+        """Check a file path, treating it as ignored when any ancestor directory is."""
+        rel_path = rel_path.strip('/')
+        return self._is_dir_ignored(rel_path.rpartition('/')[0]) or self.is_ignored(rel_path)
+
+
+def load_root_excludes(gitignore, root):
+    """Add the repository-local .git/info/exclude rules of root, if any."""
+    exclude_path = os.path.join(root, '.git', 'info', 'exclude')
+    if os.path.isfile(exclude_path):
+        gitignore.add_file('', exclude_path)
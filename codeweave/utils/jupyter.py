@@ -1,9 +1,172 @@
-import nbformat
-from nbconvert import PythonExporter
+# Description: Conversion of Jupyter notebooks to source code, natively or with nbconvert.
+
+import codecs
+import functools
+import importlib.util
+import json
+import re
+
+# nbconvert (with Jinja, traitlets and mistune) is only imported when used
+NBCONVERT_AVAILABLE = (importlib.util.find_spec('nbconvert') is not None
+                       and importlib.util.find_spec('nbformat') is not None)
+
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(rb'[^\s,\]}]+')
+_SPACE = re.compile(rb'\s*')
+# The characters that matter while skipping a nested value
+_NESTED = re.compile(rb'["\[\]{}]')
+
+
+class _Scanner:
+    """Walks the JSON text of a notebook without building objects for skipped values."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def error(self, message):
+        return ValueError(f"Invalid notebook JSON at byte {self.pos}: {message}")
+
+    def peek(self):
+        self.pos = _SPACE.match(self.data, self.pos).end()
+        return self.data[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"expected {char.decode()}")
+        self.pos += 1
+
+    def skip(self):
+        """Skip one value; outputs and base64 images are only scanned, never decoded."""
+        char = self.peek()
+        if char == b'"':
+            match = _STRING.match(self.data, self.pos)
+            if match is None:
+                raise self.error("unterminated string")
+            self.pos = match.end()
+        elif char in (b'{', b'['):
+            depth = 0
+            while True:
+                match = _NESTED.search(self.data, self.pos)
+                if match is None:
+                    raise self.error("unterminated value")
+                char = match.group()
+                if char == b'"':
+                    self.pos = match.start()
+                    self.skip()
+                    continue
+                self.pos = match.end()
+                depth += 1 if char in (b'{', b'[') else -1
+                if depth == 0:
+                    return
+        else:
+            match = _SCALAR.match(self.data, self.pos)
+            if match is None:
+                raise self.error("expected a value")
+            self.pos = match.end()
+
+    def value(self):
+        """Decode one (small) value."""
+        start = self.pos
+        self.skip()
+        return json.loads(self.data[start:self.pos])
+
+    def items(self, container):
+        """Yield once per element of an array, or with the key of each member of an object."""
+        close = b']' if container == b'[' else b'}'
+        self.expect(container)
+        if self.peek() == close:
+            self.pos += 1
+            return
+        while True:
+            if container == b'{':
+                key = self.value()
+                self.expect(b':')
+                yield key
+            else:
+                yield None
+            if self.peek() == b',':
+                self.pos += 1
+                continue
+            self.expect(close)
+            return
+
+
+def _cells(scanner):
+    """Yield (cell_type, source) of the cells of a notebook, v4 or v3."""
+    for key in scanner.items(b'{'):
+        if key == 'cells':
+            yield from _cell_list(scanner)
+        elif key == 'worksheets':
+            for _ in scanner.items(b'['):
+                for sheet_key in scanner.items(b'{'):
+                    if sheet_key == 'cells':
+                        yield from _cell_list(scanner)
+                    else:
+                        scanner.skip()
+        else:
+            scanner.skip()
+
+
+def _cell_list(scanner):
+    for _ in scanner.items(b'['):
+        cell_type, source = None, ''
+        for key in scanner.items(b'{'):
+            if key == 'cell_type':
+                cell_type = scanner.value()
+            elif key in ('source', 'input'):
+                source = scanner.value()
+            else:
+                scanner.skip()
+        if isinstance(source, list):
+            source = ''.join(source)
+        yield cell_type, source if isinstance(source, str) else ''
+
+
+def notebook_to_source(data, markdown=False):
+    """Return the code cells of a notebook as one source file.
+
+    The notebook JSON is walked once: only the type and source of each
+    cell are decoded, while outputs, attachments and metadata (where
+    base64 images live) are skipped over without being parsed. With
+    markdown, markdown cells are kept as '#' comments.
+
+    Args:
+        data: The .ipynb file, as bytes or str
+
+    Raises:
+        ValueError: if data is not a notebook
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    scanner = _Scanner(data)
+    if data.startswith(codecs.BOM_UTF8):
+        scanner.pos = len(codecs.BOM_UTF8)
+    if scanner.peek() != b'{':
+        raise scanner.error("expected an object")
+    blocks = []
+    for cell_type, source in _cells(scanner):
+        source = source.strip('\n')
+        if not source.strip():
+            continue
+        if cell_type == 'code':
+            blocks.append(source)
+        elif cell_type == 'markdown' and markdown:
+            blocks.append('\n'.join(f'# {line}'.rstrip() for line in source.split('\n')))
+    return '\n\n'.join(blocks) + '\n' if blocks else ''
+
+
+@functools.lru_cache(maxsize=None)
+def _python_exporter():
+    # Building an exporter loads its templates, so one is reused for the run
+    from nbconvert import PythonExporter
+    return PythonExporter()
+
 
 def convert_ipynb_to_py(ipynb_content):
+    """Convert a notebook with nbconvert's PythonExporter, for full fidelity."""
+    import nbformat
+
     notebook = nbformat.reads(ipynb_content, as_version=4)
-    exporter = PythonExporter()
-    (body, _) = exporter.from_notebook_node(notebook)
+    (body, _) = _python_exporter().from_notebook_node(notebook)
     return body
-
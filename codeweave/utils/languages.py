@@ -0,0 +1,124 @@
+# Description: Immutable registry of per-language filtering profiles.
+
+import json
+import logging
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+
+from codeweave.utils.path import file_extension_dict
+
+# Optional YAML support for profile files
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# Files skipped for every language
+COMMON_DOC_FILES = frozenset({'.github', '.gitignore', 'LICENSE', 'README'})
+
+
+@dataclass(frozen=True)
+class LanguageProfile:
+    """Filtering rules of one language.
+
+    Attributes:
+        name: Language key, as passed to --lang
+        extensions: File suffixes of the language
+        excluded_dirs: Directory names never included for this language
+        config_files: Utility or configuration file names to skip
+        doc_files: Documentation or tooling file names to skip
+        test_indicators: Substrings whose presence marks a file as a test
+    """
+    name: str
+    extensions: tuple = ()
+    excluded_dirs: frozenset = field(default_factory=frozenset)
+    config_files: frozenset = field(default_factory=frozenset)
+    doc_files: frozenset = field(default_factory=frozenset)
+    test_indicators: tuple = ()
+
+
+_PYTHON_RULES = dict(
+    excluded_dirs=frozenset({'__pycache__'}),
+    config_files=frozenset({'hubconf.py', 'setup.py'}),
+    doc_files=frozenset({'stale.py', 'gen-card-', 'write_model_card'}),
+    test_indicators=('import unittest', 'import pytest', 'from unittest', 'from pytest'),
+)
+_LANGUAGE_RULES = {
+    'python': _PYTHON_RULES,
+    'mojo': _PYTHON_RULES,
+    'go': dict(
+        excluded_dirs=frozenset({'vendor'}),
+        config_files=frozenset({'go.mod', 'go.sum', 'Makefile'}),
+        test_indicators=('import testing', 'func Test'),
+    ),
+    'js': dict(
+        excluded_dirs=frozenset({'node_modules', 'dist', 'build'}),
+        config_files=frozenset({'package.json', 'package-lock.json', 'webpack.config.js'}),
+        test_indicators=('describe(', 'it(', 'test(', 'expect(', 'jest', 'mocha'),
+    ),
+    'html': dict(
+        excluded_dirs=frozenset({'css', 'js', 'images', 'fonts'}),
+    ),
+}
+
+# Set-valued profile fields; the others are tuples
+_SET_FIELDS = ('excluded_dirs', 'config_files', 'doc_files')
+_TUPLE_FIELDS = ('extensions', 'test_indicators')
+
+
+def _build_registry():
+    profiles = {name: LanguageProfile(name, tuple(extensions), **_LANGUAGE_RULES.get(name, {}))
+                for name, extensions in file_extension_dict.items()}
+    return MappingProxyType(profiles)
+
+
+LANGUAGE_PROFILES = _build_registry()
+
+
+def get_profile(name, profiles=None):
+    """Return the profile of a language, or an empty one for unknown languages."""
+    profiles = LANGUAGE_PROFILES if profiles is None else profiles
+    profile = profiles.get(name)
+    if profile is None:
+        profile = LanguageProfile(name, tuple(file_extension_dict.get(name, ())))
+    return profile
+
+
+def profile_excluded_dirs(langs, profiles=None):
+    """Return the directory names excluded by the profiles of the given languages."""
+    return frozenset().union(*(get_profile(lang, profiles).excluded_dirs for lang in langs))
+
+
+def load_profiles(path, base=None):
+    """Return a new registry extending base with the profiles defined in a file.
+
+    The JSON or YAML file maps language names to profile fields, optionally
+    under a top-level 'profiles' key, e.g.
+    {"rust": {"extensions": [".rs"], "excluded_dirs": ["target"]}}. Fields
+    given for an existing language replace that field only. Extensions of
+    new languages are registered in file_extension_dict so --lang accepts
+    them.
+    """
+    base = LANGUAGE_PROFILES if base is None else base
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            if not YAML_AVAILABLE:
+                raise RuntimeError("YAML profile files require PyYAML: pip install pyyaml")
+            data = yaml.safe_load(f) or {}
+        else:
+            data = json.load(f)
+    data = data.get('profiles', data)
+
+    profiles = dict(base)
+    for name, fields in data.items():
+        unknown = set(fields) - set(_SET_FIELDS) - set(_TUPLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields for language profile '{name}': {', '.join(sorted(unknown))}")
+        values = {key: frozenset(value) for key, value in fields.items() if key in _SET_FIELDS}
+        values.update({key: tuple(value) for key, value in fields.items() if key in _TUPLE_FIELDS})
+        profiles[name] = replace(get_profile(name, base), **values)
+        if name not in file_extension_dict and profiles[name].extensions:
+            file_extension_dict[name] = list(profiles[name].extensions)
+        logging.debug(f"Loaded language profile: {profiles[name]}")
+    return MappingProxyType(profiles)
@@ -0,0 +1,152 @@
+# Description: Per-file manifest for incremental regeneration of folder outputs.
+
+import hashlib
+import json
+import logging
+import os
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Options that change the rendered section of a file; a manifest written with
+# different values cannot be reused
+FINGERPRINT_OPTIONS = (
+    'folder', 'lang', 'keep_comments', 'strip_comments', 'topN', 'program', 'nosubstitute',
+    'pdf_text_mode', 'pdf_pages', 'pdf_max_pages', 'pdf_timeout', 'ipynb_nbconvert', 'ipynb_markdown',
+    'profiles',
+)
+
+
+def manifest_path(output_file_path):
+    """Return the path of the manifest kept next to an output file."""
+    return output_file_path + MANIFEST_SUFFIX
+
+
+def settings_fingerprint(args):
+    """Hash the options that affect how files are rendered into the output.
+
+    The --profiles file is hashed by content, so editing it invalidates the
+    manifest.
+    """
+    settings = {option: getattr(args, option, None) for option in FINGERPRINT_OPTIONS}
+    settings['folder'] = os.path.abspath(settings['folder'] or '')
+    if settings['profiles']:
+        try:
+            settings['profiles'] = hash_file(settings['profiles'])
+        except OSError:
+            pass
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def hash_bytes(data):
+    """Return the hex SHA-256 of a file's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the hex SHA-256 of a file on disk."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OutputManifest:
+    """Records where each file's section lives in an output file.
+
+    Every processed file gets a record with its size, mtime_ns and content
+    hash, plus the byte offset and length of its section in the output
+    (offset is None for files that were read but produced no section, e.g.
+    test files). On the next run a file whose size and mtime_ns match, or
+    whose hash still matches after a touch, is copied from the previous
+    output without being read or transformed again.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.previous = {}
+        self.records = {}
+        self.reused = 0
+        self.rendered = 0
+
+    @classmethod
+    def load(cls, output_file_path, fingerprint):
+        """Load the manifest of output_file_path.
+
+        Previous records are only kept when the manifest was written with the
+        same settings and the output file is exactly as that run left it.
+        """
+        manifest = cls(manifest_path(output_file_path), fingerprint)
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            output_stat = os.stat(output_file_path)
+        except (OSError, ValueError):
+            return manifest
+        if data.get('version') != MANIFEST_VERSION:
+            logging.info("Manifest version changed; regenerating all files")
+        elif data.get('fingerprint') != fingerprint:
+            logging.info("Options changed since the last run; regenerating all files")
+        elif data.get('output_size') != output_stat.st_size or data.get('output_mtime_ns') != output_stat.st_mtime_ns:
+            logging.info("Output file was modified since the last run; regenerating all files")
+        else:
+            manifest.previous = data.get('files', {})
+        return manifest
+
+    def lookup(self, entry):
+        """Return the previous record of a FileEntry if its content is unchanged, else None."""
+        st = entry.stat()
+        record = self.previous.get(entry.rel_path)
+        if record is None or record['size'] != st.st_size:
+            return None
+        if record['mtime_ns'] != st.st_mtime_ns:
+            # Touched but possibly unchanged, e.g. after a checkout
+            try:
+                if hash_file(entry.path) != record['sha256']:
+                    return None
+            except OSError:
+                return None
+            record = dict(record, mtime_ns=st.st_mtime_ns)
+        return record
+
+    def splice(self, entry, record, previous_output, outfile):
+        """Copy a file's section from the previous output and record its new position."""
+        offset = None
+        if record['offset'] is not None:
+            previous_output.seek(record['offset'])
+            data = previous_output.read(record['length'])
+            offset = outfile.tell()
+            outfile.write(data)
+        self.records[entry.rel_path] = dict(record, offset=offset)
+        self.reused += 1
+
+    def record(self, entry, sha256, offset=None, length=0):
+        """Record a file processed in this run."""
+        st = entry.stat()
+        self.records[entry.rel_path] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': sha256,
+            'offset': offset,
+            'length': length,
+        }
+        self.rendered += 1
+
+    def save(self, output_file_path):
+        """Write the manifest for the finished output file atomically."""
+        output_stat = os.stat(output_file_path)
+        data = {
+            'version': MANIFEST_VERSION,
+            'fingerprint': self.fingerprint,
+            'output_size': output_stat.st_size,
+            'output_mtime_ns': output_stat.st_mtime_ns,
+            'files': self.records,
+        }
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+        logging.info(f"Incremental run: {self.reused} files reused, {self.rendered} files processed")
@@ -5,7 +5,95 @@ import fnmatch
 import argparse
 import logging
 
-file_extension_dict = {
+class ExtensionRegistry(dict):
+    """Mapping of language keys to extensions with a reverse suffix index.
+
+    The index maps each suffix, including multi-dot ones such as '.d.ts',
+    to the language keys that list it, in registration order. It is kept
+    up to date by every dict operation; to change the extensions of a
+    language assign a new list rather than mutating the old one in place.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reindex()
+
+    def _reindex(self):
+        self._by_suffix = {}
+        # Extensions without a leading dot can only be matched with endswith
+        self._other_suffixes = {}
+        for key, extensions in self.items():
+            self._index(key, extensions)
+
+    def _index(self, key, extensions):
+        for ext in extensions:
+            index = self._by_suffix if ext.startswith('.') else self._other_suffixes
+            keys = index.setdefault(ext, [])
+            if key not in keys:
+                keys.append(key)
+
+    def __setitem__(self, key, extensions):
+        replacing = key in self
+        super().__setitem__(key, extensions)
+        if replacing:
+            self._reindex()
+        else:
+            self._index(key, extensions)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._reindex()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._reindex()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._reindex()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._reindex()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def languages_for_suffix(self, suffix:str)->list[str]:
+        """Return the language keys listing exactly this suffix, e.g. '.py'."""
+        return list(self._by_suffix.get(suffix, ()))
+
+    def lookup(self, file_path:str)->list[str]:
+        """Return the language keys with an extension that file_path ends with."""
+        name = file_path.rpartition('/')[2]
+        found = []
+        dot = name.find('.')
+        while dot != -1:
+            for key in self._by_suffix.get(name[dot:], ()):
+                if key not in found:
+                    found.append(key)
+            dot = name.find('.', dot + 1)
+        for ext, keys in self._other_suffixes.items():
+            if file_path.endswith(ext):
+                found.extend(key for key in keys if key not in found)
+        if len(found) > 1:
+            order = {key: position for position, key in enumerate(self)}
+            found.sort(key=order.__getitem__)
+        return found
+
+file_extension_dict = ExtensionRegistry({
         'python': ['.py'],
         'py': ['.py'],
         'ipython': ['.ipynb'],
@@ -23,6 +111,8 @@ file_extension_dict = {
         'ruby': ['.rb'],
         'mojo': ['.mojo'],
         'javascript': ['.js'],
+        'ts': ['.ts','.tsx'],
+        'typescript': ['.ts','.tsx'],
         'markdown': ['.md', '.markdown', '.mdx'],
         'matlab': ['.m'],
         'md': ['.md'],
@@ -31,12 +121,12 @@ file_extension_dict = {
         'zsh': ['.sh'],
         'toml': ['.toml'],
         'pdf': ['.pdf']
-}
+})
 
 def lookup_file_extension(file_path:str)->list[str]:
     """Lookup the file extension of a file_path and return list of valid keys of
     file_extension_dict"""
-    return [key for key, value in file_extension_dict.items() if any(file_path.endswith(ext) for ext in value)]
+    return file_extension_dict.lookup(file_path)
 
 def should_exclude_file(file_path, args):
     """Check if the file path matches any of the exclude patterns."""
@@ -69,16 +159,11 @@ def extract_git_folder(folder:str)->str|None:
             return os.path.basename(folder)
         folder = os.path.dirname(folder)
     return None
-def is_test_file(file_content, lang):
+def is_test_file(file_content, lang, profiles=None):
     """Determine if the file content suggests it is a test file."""
-    test_indicators = []
-    if lang == "python" or lang == "mojo":
-        test_indicators = ["import unittest", "import pytest", "from unittest", "from pytest"]
-    elif lang == "go":
-        test_indicators = ["import testing", "func Test"]
-    elif lang == "js":
-        test_indicators = ["describe(", "it(", "test(", "expect(", "jest", "mocha"]
-    return any(indicator in file_content for indicator in test_indicators)
+    # Imported here: the profile registry is built from file_extension_dict
+    from codeweave.utils.languages import get_profile
+    return any(indicator in file_content for indicator in get_profile(lang, profiles).test_indicators)
 
 def is_file_type(file_path, file_languages:list|set):
     """
@@ -89,8 +174,8 @@ def is_file_type(file_path, file_languages:list|set):
     """
     if isinstance(file_languages, set):
         file_languages += os.path.splitext(file_path)[1][1:]
-    is_ft = any(file_path.endswith(ext) for file_language in file_languages for
-        ext in file_extension_dict.get(file_language.replace('.',''), []))
+    wanted = {file_language.replace('.','') for file_language in file_languages}
+    is_ft = any(key in wanted for key in file_extension_dict.lookup(file_path))
     if not is_ft:
         logging.debug(f"Skipping file: {file_path}")
     return is_ft
@@ -98,45 +183,28 @@ def is_file_type(file_path, file_languages:list|set):
 def is_likely_useful_file(file_path:str, lang:str, args:argparse.Namespace)->bool:
     """Determine if the file is likely to be useful by excluding certain
     directories and specific file types."""
-    excluded_dirs = args.excluded_dirs
-    utility_or_config_files = []
-    github_workflow_or_docs = [".github", ".gitignore", "LICENSE", "README"]
-    # if file_path.endswith(".py"):
-    #     import pdb; pdb.set_trace()
-
-    if lang == "python" or lang == "mojo":
-        excluded_dirs.append("__pycache__")
-        utility_or_config_files.extend(["hubconf.py", "setup.py"])
-        github_workflow_or_docs.extend(["stale.py", "gen-card-", "write_model_card"])
-    elif lang == "go":
-        excluded_dirs.append("vendor")
-        utility_or_config_files.extend(["go.mod", "go.sum", "Makefile"])
-    elif lang == "js":
-        excluded_dirs.extend(["node_modules", "dist", "build"])
-        utility_or_config_files.extend(["package.json", "package-lock.json", "webpack.config.js"])
-    elif lang == "html":
-        excluded_dirs.extend(["css", "js", "images", "fonts"])
+    from codeweave.utils.languages import COMMON_DOC_FILES, get_profile
+    profile = get_profile(lang, getattr(args, 'language_profiles', None))
+    parts = file_path.split('/')
+    file_name = parts[-1]
 
     if any((part.startswith('.') and not part.startswith('..') and part != '.' and part != '..')
-        for part in file_path.split('/')):
+        for part in parts):
         logging.debug(f"Skipping hidden file: {file_path}")
         return False
     if 'test' in file_path.lower() and isinstance(args.folder, str) and 'test' not in args.folder:
         logging.debug(f"Skipping test file: {file_path}")
         return False
-    for excluded_dir in excluded_dirs:
-        if f"/{excluded_dir}/" in file_path or file_path.startswith(excluded_dir + "/"):
-            logging.debug(f"Skipping excluded directory: {file_path}")
-            return False
-    for file_name in utility_or_config_files:
-        if file_name in file_path:
-            logging.debug(f"Skipping utility or config file: {file_path}")
-            return False
-    for doc_file in github_workflow_or_docs:
-        doc_file_check = (file_path.endswith(f"/{doc_file}") if not doc_file.startswith(".") else
-                 os.path.basename(file_path) == doc_file)
-        if doc_file_check:
-            logging.debug(f"Skipping GitHub workflow or documentation file: {file_path}")
-            return False
+    directories = parts[:-1]
+    if any(part in profile.excluded_dirs for part in directories) or any(
+            f"/{excluded_dir}/" in file_path or file_path.startswith(excluded_dir + "/")
+            for excluded_dir in args.excluded_dirs):
+        logging.debug(f"Skipping excluded directory: {file_path}")
+        return False
+    if file_name in profile.config_files:
+        logging.debug(f"Skipping utility or config file: {file_path}")
+        return False
+    if (file_name in COMMON_DOC_FILES or file_name in profile.doc_files) and (file_name.startswith('.') or len(parts) > 1):
+        logging.debug(f"Skipping GitHub workflow or documentation file: {file_path}")
+        return False
     return True
-
@@ -0,0 +1,168 @@
+# Description: PDF text extraction page by page, with page limits and a per-document timeout.
+
+import contextlib
+import io
+import re
+import signal
+import threading
+import time
+from dataclasses import dataclass
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+# Name and version of the transform in the transform cache
+PDF_TEXT_TRANSFORM = 'pdf-text:2'
+# Seconds a document may take before the text extracted so far is used
+DEFAULT_PDF_TIMEOUT = 120
+
+_PAGE_RANGE = re.compile(r'^(\d+)(?:(-)(\d*))?$')
+# pdfminer ends the text of every page with a form feed
+_PAGE_END = re.compile(r'(?<=\f)')
+
+
+class PdfTimeout(Exception):
+    """A document ran out of time; pages holds the texts of the pages extracted until then, and a note."""
+
+    def __init__(self, pages, timeout):
+        super().__init__(f"PDF text extraction stopped after {timeout}s ({len(pages)} pages extracted)")
+        self.pages = pages + [f"\n[PDF text truncated: extraction stopped after {timeout}s, {len(pages)} pages]\n"]
+
+
+class _Expired(Exception):
+    pass
+
+
+def parse_page_ranges(spec):
+    """Parse a page selection like '1-10,15,20-' into (first, last) pairs, 1-based and inclusive.
+
+    An open range ('20-') has None as last page. An empty spec selects
+    every page.
+
+    Raises:
+        ValueError: for an invalid selection
+    """
+    ranges = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = _PAGE_RANGE.match(part)
+        if match is None or int(match.group(1)) < 1:
+            raise ValueError(f"Invalid page range: {part}")
+        first = int(match.group(1))
+        last = first if not match.group(2) else int(match.group(3)) if match.group(3) else None
+        if last is not None and last < first:
+            raise ValueError(f"Invalid page range: {part}")
+        ranges.append((first, last))
+    return tuple(ranges)
+
+
+@dataclass(frozen=True)
+class PdfOptions:
+    """Which pages of a document are extracted, and for how long.
+
+    Attributes:
+        pages: (first, last) page ranges, see parse_page_ranges; empty for all
+        max_pages: Stop after this many extracted pages
+        timeout: Seconds before extraction stops, or None
+    """
+    pages: tuple = ()
+    max_pages: int = None
+    timeout: float = None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(tuple(getattr(args, 'pdf_pages', None) or ()), getattr(args, 'pdf_max_pages', None) or None,
+                   getattr(args, 'pdf_timeout', DEFAULT_PDF_TIMEOUT) or None)
+
+    def selects(self, number):
+        """Whether the 1-based page number is extracted."""
+        return not self.pages or any(first <= number and (last is None or number <= last)
+                                     for first, last in self.pages)
+
+    @property
+    def last_page(self):
+        """The last page that can be selected, or None if the ranges are open."""
+        if not self.pages or any(last is None for _, last in self.pages):
+            return None
+        return max(last for _, last in self.pages)
+
+    def cache_options(self):
+        """The options that change a complete extraction's result."""
+        return {'pages': self.pages, 'max_pages': self.max_pages}
+
+
+def iter_page_texts(fp, options=PdfOptions()):
+    """Yield the text of each selected page of a PDF, as pdfminer's extract_text lays it out.
+
+    Pages are interpreted one at a time, so the layout of only one page is
+    held in memory, and pages after the selection are never parsed.
+    """
+    resources = PDFResourceManager(caching=True)
+    laparams = LAParams()
+    extracted = 0
+    for number, page in enumerate(PDFPage.get_pages(fp, caching=True), 1):
+        if options.last_page is not None and number > options.last_page:
+            return
+        if not options.selects(number):
+            continue
+        output = io.StringIO()
+        device = TextConverter(resources, output, laparams=laparams)
+        try:
+            PDFPageInterpreter(resources, device).process_page(page)
+        finally:
+            device.close()
+        yield output.getvalue()
+        extracted += 1
+        if options.max_pages is not None and extracted >= options.max_pages:
+            return
+
+
+@contextlib.contextmanager
+def _alarm(timeout):
+    """Interrupt the block after timeout seconds, where SIGALRM can be used (main thread on Unix)."""
+    if not timeout or not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise _Expired()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_pdf_pages(data, options=PdfOptions()):
+    """Return the texts of the selected pages of a PDF given as bytes, one per page.
+
+    The pages are not joined, so they can be written to the output one by
+    one. The timeout is checked after every page and, where SIGALRM is
+    available, also interrupts a single slow page.
+
+    Raises:
+        PdfTimeout: if the document took longer than options.timeout
+    """
+    pages = []
+    started = time.monotonic()
+    try:
+        with _alarm(options.timeout):
+            for text in iter_page_texts(io.BytesIO(data), options):
+                pages.append(text)
+                if options.timeout and time.monotonic() - started > options.timeout:
+                    raise _Expired()
+    except _Expired:
+        raise PdfTimeout(pages, options.timeout) from None
+    return pages
+
+
+def split_pages(text):
+    """Split the joined texts of extract_pdf_pages back into pages."""
+    return [page for page in _PAGE_END.split(text) if page]
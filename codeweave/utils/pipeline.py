@@ -0,0 +1,106 @@
+# Description: Process pool feeding results back in order to a single writer.
+
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+
+# Tasks queued per worker; bounds the finished results held while waiting for their turn
+QUEUE_DEPTH_PER_JOB = 4
+
+
+def resolve_jobs(jobs):
+    """Return the number of worker processes for --jobs; 0 means one per CPU."""
+    if jobs is None or jobs < 0:
+        raise ValueError(f"Invalid number of jobs: {jobs}")
+    return jobs or os.cpu_count() or 1
+
+
+class OrderedPipeline:
+    """Runs tasks in a process pool and consumes their results in queue order.
+
+    Items are queued with submit(), which runs a task in the pool, or put(),
+    for a result that is ready now (e.g. a section copied from a previous
+    output). consume(key, result) is called for each item strictly in the
+    order the items were queued, from the calling process only, so it can
+    write to the output without locking. Once depth items are queued, the
+    oldest results are waited for and consumed before queueing more, which
+    bounds memory. With jobs == 1 submitted tasks run inline, and a single
+    worker is only started for tasks queued with offload() (e.g. slow PDF
+    text extraction, so the caller keeps going meanwhile).
+
+    Workers are started with the 'spawn' method, so they do not inherit
+    threads or open files of the caller; initializer(*initargs) prepares
+    each of them.
+    """
+
+    def __init__(self, consume, jobs=1, initializer=None, initargs=(), depth=None):
+        self.consume = consume
+        self.jobs = jobs
+        self.initializer = initializer
+        self.initargs = initargs
+        self.depth = depth or jobs * QUEUE_DEPTH_PER_JOB
+        self.queue = collections.deque()
+        self.pool = None
+
+    @property
+    def parallel(self):
+        return self.jobs > 1
+
+    def _executor(self):
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.jobs, mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer, initargs=self.initargs)
+        return self.pool
+
+    def submit(self, key, func, *args):
+        """Queue func(*args); it runs in a worker, or right away with jobs == 1."""
+        if not self.parallel:
+            self.put(key, func(*args))
+            return
+        self.offload(key, func, *args)
+
+    def offload(self, key, func, *args):
+        """Queue func(*args) to run in a worker process, even with jobs == 1."""
+        self.queue.append((key, self._executor().submit(func, *args)))
+        self._drain(self.depth)
+
+    def put(self, key, result):
+        """Queue a result that is already known."""
+        if not self.queue:
+            self.consume(key, result)
+            return
+        future = concurrent.futures.Future()
+        future.set_result(result)
+        self.queue.append((key, future))
+        self._drain(self.depth)
+
+    def _drain(self, limit):
+        while len(self.queue) > limit:
+            key, future = self.queue.popleft()
+            self.consume(key, future.result())
+
+    def close(self):
+        """Consume every queued result and stop the workers."""
+        try:
+            self._drain(0)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop the workers, dropping queued results."""
+        self.queue.clear()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.shutdown()
+        return False
@@ -0,0 +1,135 @@
+# Description: Lazy access to remote zip archives through HTTP range requests.
+
+import io
+import logging
+import re
+import zipfile
+
+# Bytes fetched from the end of the archive to find the end-of-central-directory
+# record (22 bytes plus the largest possible archive comment)
+TAIL_SIZE = 22 + 65535
+# Minimum number of bytes fetched per request when reading sequentially
+DEFAULT_READAHEAD = 64 * 1024
+# Slack added to member prefetches for the local header's file name and extra field
+LOCAL_HEADER_SLACK = 1024
+
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """Read-only, seekable file object backed by HTTP range requests.
+
+    Only one window of the remote file is buffered at a time. zipfile reads
+    the central directory and each member with a handful of sequential reads,
+    so one request per member is enough once prefetch() has been called with
+    the member's extent.
+    """
+
+    def __init__(self, url, session, size, readahead=DEFAULT_READAHEAD):
+        super().__init__()
+        self.url = url
+        self.session = session
+        self.size = size
+        self.readahead = readahead
+        self.position = 0
+        self.buffer = b''
+        self.buffer_start = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if self.position < 0:
+            raise ValueError("Negative seek position")
+        return self.position
+
+    def _fetch(self, start, length):
+        end = min(start + length, self.size) - 1
+        response = self.session.get(self.url, headers={'Range': f'bytes={start}-{end}'})
+        if response.status_code != 206:
+            raise IOError(f"Range request for {self.url} failed with status {response.status_code}")
+        self.requests += 1
+        self.bytes_fetched += len(response.content)
+        self.buffer = response.content
+        self.buffer_start = start
+
+    def prefetch(self, start, length):
+        """Fetch [start, start + length) in one request unless it is already buffered."""
+        buffer_end = self.buffer_start + len(self.buffer)
+        if not (self.buffer_start <= start and start + length <= buffer_end):
+            self._fetch(start, max(length, self.readahead))
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        if size <= 0:
+            return b''
+        offset = self.position - self.buffer_start
+        if offset < 0 or offset + size > len(self.buffer):
+            self._fetch(self.position, max(size, self.readahead))
+            offset = 0
+        data = self.buffer[offset:offset + size]
+        self.position += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def open_remote_zip(url, session):
+    """Open the zip archive at url without downloading it.
+
+    The tail of the archive is requested with a suffix range. If the server
+    answers with 206 Partial Content, the central directory is read through
+    an HTTPRangeFile and members are fetched on demand.
+
+    Returns:
+        A zipfile.ZipFile, or None when the server does not support range
+        requests (the caller should fall back to a full download).
+    """
+    with session.get(url, headers={'Range': f'bytes=-{TAIL_SIZE}'}, stream=True) as response:
+        match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+        if response.status_code != 206 or not match:
+            logging.info(f"Server does not support range requests for {url} (status {response.status_code})")
+            return None
+        tail = response.content
+
+    size = int(match.group(3))
+    remote = HTTPRangeFile(url, session, size)
+    remote.requests = 1
+    remote.bytes_fetched = len(tail)
+    remote.buffer = tail
+    remote.buffer_start = int(match.group(1))
+    logging.debug(f"Remote archive {url} is {size:,} bytes; reading central directory")
+    return zipfile.ZipFile(remote, 'r')
+
+
+def prefetch_member(zip_obj, info, limit=None):
+    """Fetch a member's local header and data in one request for remote archives.
+
+    With limit, only about the first limit bytes of the compressed data are
+    fetched, which is enough to decompress at least limit bytes since
+    deflate does not expand its input by more than a few bytes per block.
+    """
+    if isinstance(zip_obj.fp, HTTPRangeFile):
+        data_size = info.compress_size if limit is None else min(info.compress_size, limit + LOCAL_HEADER_SLACK)
+        zip_obj.fp.prefetch(info.header_offset, 30 + len(info.orig_filename) + data_size + LOCAL_HEADER_SLACK)
@@ -0,0 +1,100 @@
+# Description: Content sniffing to detect binary files from a bounded prefix.
+
+import codecs
+import logging
+
+# Number of leading bytes inspected to classify a file
+SNIFF_SIZE = 8192
+# Files whose prefix has more than this share of control characters are binary
+MAX_CONTROL_RATIO = 0.3
+
+MAGIC_NUMBERS = (
+    b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'GIF87a', b'GIF89a',  # Images
+    b'\x1aE\xdf\xa3',  # Video containers
+    b'PK\x03\x04', b'PK\x05\x06', b'\x1f\x8b', b'\xfd7zXZ\x00', b'\x28\xb5\x2f\xfd',
+    b'7z\xbc\xaf\x27\x1c', b'Rar!\x1a\x07',  # Archives and compressed streams
+    b'\x7fELF', b'\xca\xfe\xba\xbe', b'\xfe\xed\xfa\xce', b'\xfe\xed\xfa\xcf',
+    b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe', b'\x00asm',  # Executables, classes, wasm
+    b'SQLite format 3\x00', b'\x93NUMPY', b'PAR1', b'\x89HDF\r\n\x1a\n', b'ARROW1',  # Data files
+    b'%PDF-', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',  # Documents
+)
+# Short, printable magic numbers a text file can also start with (e.g. "BMI", "MZ"),
+# only trusted when the prefix also holds a control character
+WEAK_MAGIC_NUMBERS = (
+    b'BM', b'RIFF', b'OggS', b'ID3', b'fLaC', b'BZh', b'MZ', b'PAR1',
+)
+# Pickle protocol 2+ opcode followed by the protocol number
+_PICKLE_PREFIXES = tuple(bytes([0x80, protocol]) for protocol in range(2, 6))
+
+# Control characters that are common in text files: \b \t \n \f \r and ESC
+_TEXT_CONTROLS = frozenset(b'\b\t\n\f\r\x1b')
+_CONTROL_BYTES = bytes(byte for byte in list(range(0x20)) + [0x7f] if byte not in _TEXT_CONTROLS)
+
+
+def looks_binary(prefix:bytes)->bool:
+    """Classify the leading bytes of a file as binary or text.
+
+    A prefix is binary when it starts with a known magic number, contains a
+    NUL byte, has a high ratio of control characters, or is not valid UTF-8
+    (a truncated character at the end of the prefix is allowed). A weak,
+    printable magic number also needs a control character in the prefix.
+    """
+    if not prefix:
+        return False
+    if prefix.startswith(MAGIC_NUMBERS) or prefix.startswith(_PICKLE_PREFIXES):
+        return True
+    if b'\x00' in prefix:
+        return True
+    # bytes.translate with a delete table counts the control bytes in C
+    controls = len(prefix) - len(prefix.translate(None, _CONTROL_BYTES))
+    if controls and prefix.startswith(WEAK_MAGIC_NUMBERS):
+        return True
+    if controls / len(prefix) > MAX_CONTROL_RATIO:
+        return True
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+class BinarySniffer:
+    """Sniffs file prefixes and remembers verdicts for the rest of the run.
+
+    Verdicts are keyed by inode, size and mtime for files on disk, and by
+    CRC and size for zip members, so a file seen again (e.g. by --watch or
+    a duplicate member) is not read again.
+    """
+
+    def __init__(self, size=SNIFF_SIZE):
+        self.size = size
+        self.verdicts = {}
+        self.sniffed = 0
+        self.binary = 0
+
+    @staticmethod
+    def file_key(st):
+        return ('file', st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def cached(self, key):
+        """Return the remembered verdict for key, or None."""
+        return self.verdicts.get(key) if key is not None else None
+
+    def check(self, prefix, key=None, name=''):
+        """Classify a prefix and remember the verdict under key."""
+        verdict = looks_binary(prefix[:self.size])
+        self.sniffed += 1
+        if verdict:
+            self.binary += 1
+            logging.debug(f"Skipping binary content: {name}")
+        if key is not None:
+            self.verdicts[key] = verdict
+        return verdict
+
+    def member_is_binary(self, read_member, name=''):
+        """Sniff an archive member through its reader, reading only the prefix."""
+        key = getattr(read_member, 'cache_key', None)
+        verdict = self.cached(key)
+        if verdict is None:
+            verdict = self.check(read_member(self.size), key, name)
+        return verdict
@@ -0,0 +1,276 @@
+# Description: Table-driven comment stripping for C-family, Go, JS/TS, Lua and shell sources.
+
+import bisect
+import io
+import itertools
+import re
+from dataclasses import dataclass
+
+from codeweave.utils.path import file_extension_dict
+
+# Name of the syntax stripped by remove_comments_and_docstrings in utils/file.py
+PYTHON_SYNTAX = 'python'
+
+# Literals, as regex sources; each is skipped whole so comment markers inside are kept
+_DOUBLE_QUOTED = r'"(?:[^"\\\n]|\\.)*"'
+_SINGLE_QUOTED = r"'(?:[^'\\\n]|\\.)*'"
+_TRIPLE_QUOTED = r'"""(?:[^\\]|\\.)*?"""'
+_BACKTICK_RAW = r'`[^`]*`'
+_DIGIT_SEPARATED = r"\b\d[\w.]*'\w(?:[\w.]|'(?=\w))*"  # 1'000'000, not a character literal
+_CPP_RAW = r'(?<!\w)(?:u8|[uUL])?R"(?P<raw>[^()\\\s"]{0,16})\(.*?\)(?P=raw)"'
+_CSHARP_VERBATIM = r'(?:\$@|@\$?)"(?:[^"]|"")*"'
+_LUA_LONG = r'\[(?P<level>=*)\[.*?\](?P=level)\]'
+_SHELL_SINGLE = r"'[^']*'"
+_SHELL_ANSI = r"\$'(?:[^'\\]|\\.)*'"
+_SHELL_DOUBLE = r'"(?:[^"\\]|\\.)*"'
+_SHELL_ESCAPE = r'\\.'
+# A here-document, from the '<<WORD' or '<<-WORD' operator to its terminator line; not a '<<<' here-string
+_SHELL_HEREDOC = (r"(?<!<)<<-?(?!<)[ \t]*(?P<heredoc_quote>['\"]?)(?P<heredoc>[A-Za-z_][\w.-]*)(?P=heredoc_quote)"
+                  r"[^\n]*\n(?:[^\n]*\n)*?\t*(?P=heredoc)(?=\n|\Z)")
+# A preprocessor header name, e.g. '#include <a//b>', whose '//' is not a comment
+_HEADER_NAME = r'(?:#[ \t]*(?:include|include_next|import)[ \t]*|__has_include(?:_next)?[ \t]*\([ \t]*)<[^>\n]*>'
+
+# Comments, as regex sources; an unterminated block comment runs to the end
+_SLASH_LINE = r'//[^\n]*'
+_SLASH_BLOCK = r'/\*.*?(?:\*/|\Z)'
+
+# Runs of template literal text, and of ${...} expression code, without anything to track
+_TEMPLATE_TEXT = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))+', re.DOTALL)
+_TEMPLATE_CODE = re.compile(r'[^"\'`{}]+')
+_CODE_STRINGS = {'"': re.compile(_DOUBLE_QUOTED), "'": re.compile(_SINGLE_QUOTED)}
+
+# A JS regex literal; whether a '/' starts one depends on what precedes it
+_JS_REGEX = r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*'
+# Characters and keywords after which a '/' starts a regex rather than a division
+_REGEX_AFTER_CHARS = frozenset('(,=:[!&|?{};~+-*%<>^')
+_REGEX_AFTER_WORDS = frozenset({'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                                'throw', 'case', 'do', 'else', 'yield', 'await'})
+_LAST_WORD = re.compile(r'(\w+)\s*$')
+
+
+@dataclass(frozen=True)
+class CommentSyntax:
+    """Lexical rules of one family of languages.
+
+    Attributes:
+        name: Syntax name, e.g. 'c' or 'shell'
+        literals: Regex sources of string and character literals
+        comments: Regex sources of comments, tried after the literals
+        keep: Regex matching comments that carry meaning and are kept
+            (e.g. Go build directives)
+        regex_literals: Whether '/' can start a regex literal (JS)
+        templates: Whether '`' starts a template literal whose ${...}
+            expressions can hold strings and further templates (JS)
+        quotes: Characters opening a literal; one no literal matches at is
+            unterminated and ends the scan
+    """
+    name: str
+    literals: tuple = ()
+    comments: tuple = ()
+    keep: str = None
+    regex_literals: bool = False
+    templates: bool = False
+    quotes: str = '"\''
+
+    def pattern(self):
+        """Compile the scanner: one alternation of literals, comments and unterminated quotes."""
+        alternatives = [f'(?P<literal>{"|".join(self.literals)})'] if self.literals else []
+        alternatives.append(f'(?P<comment>{"|".join(self.comments)})')
+        if self.regex_literals:
+            alternatives.append(f'(?P<regex>{_JS_REGEX})')
+        if self.templates:
+            alternatives.append('(?P<template>`)')
+        alternatives.append(f'(?P<error>[{re.escape(self.quotes)}])')
+        return re.compile('|'.join(alternatives), re.DOTALL)
+
+
+_C_FAMILY = (_SLASH_LINE, _SLASH_BLOCK)
+
+COMMENT_SYNTAXES = {syntax.name: syntax for syntax in (
+    CommentSyntax('c', (_HEADER_NAME, _DIGIT_SEPARATED, _DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY),
+    CommentSyntax('cpp', (_HEADER_NAME, _DIGIT_SEPARATED, _CPP_RAW, _DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY),
+    CommentSyntax('java', (_TRIPLE_QUOTED, _DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY),
+    CommentSyntax('csharp', (r'""".*?"""', _CSHARP_VERBATIM, _DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY),
+    CommentSyntax('go', (_BACKTICK_RAW, _DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY,
+                  keep=r'//(?:go:|line |\s*\+build)', quotes='"\'`'),
+    CommentSyntax('js', (_DOUBLE_QUOTED, _SINGLE_QUOTED), _C_FAMILY,
+                  keep=r'///\s*<(?:reference|amd)|//\s*@ts-|/\*!', regex_literals=True, templates=True),
+    CommentSyntax('lua', (_LUA_LONG, _DOUBLE_QUOTED, _SINGLE_QUOTED),
+                  (r'--\[(?P<comment_level>=*)\[.*?(?:\](?P=comment_level)\]|\Z)', r'--[^\n]*')),
+    # '#' starts a comment only at the start of a word, unlike in $# or ${#x}
+    CommentSyntax('shell', (_SHELL_HEREDOC, _SHELL_ESCAPE, _SHELL_ANSI, _SHELL_SINGLE, _SHELL_DOUBLE),
+                  (r'(?<![^\s;&|()<>])#[^\n]*',), keep=r'#!'),
+)}
+
+# Syntax of each language key of file_extension_dict that comments can be stripped from
+LANGUAGE_SYNTAX = {
+    'python': PYTHON_SYNTAX, 'py': PYTHON_SYNTAX,
+    'c': 'c', 'cpp': 'cpp', 'c++': 'cpp', 'java': 'java', 'csharp': 'csharp', 'go': 'go',
+    'js': 'js', 'javascript': 'js', 'ts': 'js', 'typescript': 'js',
+    'lua': 'lua', 'shell': 'shell', 'bash': 'shell', 'zsh': 'shell',
+}
+
+_patterns = {}
+
+
+def parse_strip_languages(value):
+    """Parse --strip-comments into a sorted list of language keys; 'all' selects every strippable one.
+
+    Raises:
+        ValueError: for a language comments cannot be stripped from
+    """
+    languages = {lang.strip() for lang in (value or '').split(',') if lang.strip()}
+    if 'all' in languages:
+        return sorted(LANGUAGE_SYNTAX)
+    unknown = sorted(languages - set(LANGUAGE_SYNTAX))
+    if unknown:
+        raise ValueError(f"Cannot strip comments from: {', '.join(unknown)} "
+                         f"(supported: {', '.join(sorted(LANGUAGE_SYNTAX))}, all)")
+    return sorted(languages)
+
+
+def comment_syntax(file_path, languages):
+    """Return the syntax to strip file_path with, or None if none of its languages is selected."""
+    for key in file_extension_dict.lookup(file_path):
+        if key in languages and key in LANGUAGE_SYNTAX:
+            return LANGUAGE_SYNTAX[key]
+    return None
+
+
+def _regex_allowed(source, start):
+    """Whether a '/' at start begins a JS regex literal rather than a division."""
+    i = start - 1
+    while i >= 0 and source[i] in ' \t\r\n':
+        i -= 1
+    if i < 0 or source[i] in _REGEX_AFTER_CHARS:
+        return True
+    word = _LAST_WORD.search(source, max(0, i - 15), i + 1)
+    return word is not None and word.group(1) in _REGEX_AFTER_WORDS
+
+
+def _template_end(source, start):
+    """Return the end of the template literal opened at start, or None if it is unbalanced.
+
+    Tracks the nesting of ${...} expressions, the braces inside them and
+    the strings and templates they contain, e.g. `${a ? `//${b}` : c}`.
+    """
+    # Open template literals ('`') and braces of expressions ('{'), innermost last
+    stack = ['`']
+    pos = start + 1
+    while pos < len(source):
+        if stack[-1] == '`':
+            match = _TEMPLATE_TEXT.match(source, pos)
+            if match is not None:
+                pos = match.end()
+                continue
+            if source[pos] == '`':
+                stack.pop()
+                pos += 1
+                if not stack:
+                    return pos
+            elif source.startswith('${', pos):
+                stack.append('{')
+                pos += 2
+            else:
+                # A trailing backslash
+                return None
+            continue
+        match = _TEMPLATE_CODE.match(source, pos)
+        if match is not None:
+            pos = match.end()
+            continue
+        char = source[pos]
+        if char in _CODE_STRINGS:
+            match = _CODE_STRINGS[char].match(source, pos)
+            if match is None:
+                return None
+            pos = match.end()
+            continue
+        if char == '}':
+            stack.pop()
+        else:
+            stack.append(char)
+        pos += 1
+    return None
+
+
+def comment_spans(source, syntax):
+    """Return the (start, end, replacement) offsets of the comments of source.
+
+    Scans once, skipping string, character, raw and regex literals whole.
+    A block comment between two tokens is replaced by a space so they stay
+    apart. Scanning stops at an unterminated or unbalanced literal, keeping
+    the rest.
+    """
+    rules = COMMENT_SYNTAXES[syntax]
+    pattern = _patterns.get(syntax)
+    if pattern is None:
+        pattern = _patterns[syntax] = rules.pattern()
+    keep = re.compile(rules.keep) if rules.keep else None
+
+    spans = []
+    pos = 0
+    while True:
+        match = pattern.search(source, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == 'error':
+            break
+        if kind == 'template':
+            end = _template_end(source, start)
+            if end is None:
+                break
+        if kind == 'regex' and not _regex_allowed(source, start):
+            # A division; the next literal or comment starts after the '/'
+            pos = start + 1
+            continue
+        if kind == 'comment' and not (keep is not None and keep.match(source, start)):
+            joins = (start > 0 and not source[start - 1].isspace()
+                     and end < len(source) and not source[end].isspace())
+            spans.append((start, end, ' ' if joins else ''))
+        pos = end
+    return spans
+
+
+def apply_removals(source, removals):
+    """Apply (start, end, replacement) edits to source, keeping its line structure.
+
+    Lines left blank by an edit are dropped and trailing whitespace left
+    on the others is trimmed; lines no edit touches are kept as written.
+    """
+    lines = io.StringIO(source).readlines()
+    starts = list(itertools.accumulate(map(len, lines), initial=0))
+    edits = {}
+    for start, end, replacement in removals:
+        start_row = bisect.bisect_right(starts, start)
+        end_row = bisect.bisect_right(starts, end - 1)
+        for row in range(start_row, end_row + 1):
+            line_start = starts[row - 1]
+            body_length = len(lines[row - 1].rstrip('\r\n'))
+            edits.setdefault(row, []).append((
+                start - line_start if row == start_row else 0,
+                end - line_start if row == end_row else body_length,
+                replacement if row == start_row else ''))
+
+    result = []
+    for row, line in enumerate(lines, 1):
+        if row not in edits:
+            result.append(line)
+            continue
+        body = line.rstrip('\r\n')
+        pieces, pos = [], 0
+        for start, stop, replacement in sorted(edits[row]):
+            pieces.append(body[pos:start] + replacement)
+            pos = max(pos, stop)
+        pieces.append(body[pos:])
+        stripped = ''.join(pieces).rstrip()
+        if stripped.strip():
+            result.append(stripped + line[len(body):])
+    return ''.join(result)
+
+
+def strip_comments(source, syntax):
+    """Remove the comments of a source file written in one of COMMENT_SYNTAXES."""
+    return apply_removals(source, comment_spans(source, syntax))
@@ -0,0 +1,155 @@
+# Description: Utility functions for enumerating the files of a local folder.
+
+import os
+import stat
+import logging
+import subprocess
+
+
+class FileEntry:
+    """A file found below a folder.
+
+    The stat result is fetched lazily and, when the entry came from
+    os.scandir, reuses the DirEntry's cached data.
+    """
+
+    __slots__ = ('path', 'rel_path', 'name', '_dir_entry', '_stat')
+
+    def __init__(self, path, rel_path, dir_entry=None):
+        self.path = path
+        self.rel_path = rel_path
+        self.name = os.path.basename(rel_path)
+        self._dir_entry = dir_entry
+        self._stat = None
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = self._dir_entry.stat() if self._dir_entry is not None else os.stat(self.path)
+        return self._stat
+
+    def __repr__(self):
+        return f"FileEntry({self.rel_path!r})"
+
+
+def is_pruned_dir(name, excluded_dirs, skip_hidden=True):
+    """Check if a directory should not be descended into."""
+    return name in excluded_dirs or (skip_hidden and name.startswith('.'))
+
+
+def walk_files(root, excluded_dirs=(), skip_hidden=True, on_directory=None, gitignore=None):
+    """Yield a FileEntry for every file below root in a single pass.
+
+    Excluded and hidden directories are pruned before they are descended
+    into, as are directories ignored by a .gitignore when a matcher is
+    given. Directories are visited depth-first with entries in name order, so
+    the output is deterministic. Symlinked directories are not followed.
+
+    Args:
+        root: Folder to walk
+        excluded_dirs: Directory names that are never descended into
+        skip_hidden: Also prune directories whose name starts with '.'
+        on_directory: Optional callback(rel_dir, file_count) called after
+            each directory is listed and before its files are yielded, e.g.
+            to grow a progress bar's total
+        gitignore: Optional GitIgnore; the .gitignore of every visited
+            directory is added to it before that directory's entries are
+            matched
+    """
+    excluded_dirs = frozenset(excluded_dirs)
+    stack = [(root, '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logging.debug(f"Cannot list directory {directory}: {e}")
+            continue
+
+        if gitignore is not None and any(entry.name == '.gitignore' for entry in entries):
+            gitignore.add_file(rel_dir, os.path.join(directory, '.gitignore'))
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if (is_pruned_dir(entry.name, excluded_dirs, skip_hidden)
+                            or (gitignore and gitignore.is_ignored(rel_path, is_dir=True))):
+                        logging.debug(f"Pruning directory: {entry.path}")
+                    else:
+                        subdirs.append((entry, rel_path))
+                elif entry.is_file():
+                    if gitignore and gitignore.is_ignored(rel_path):
+                        logging.debug(f"Skipping ignored file: {entry.path}")
+                    else:
+                        files.append((entry, rel_path))
+            except OSError:
+                continue
+
+        if on_directory is not None:
+            on_directory(rel_dir, len(files))
+        for entry, rel_path in files:
+            yield FileEntry(entry.path, rel_path, entry)
+        for entry, rel_path in reversed(subdirs):
+            stack.append((entry.path, rel_path))
+
+
+def walk_order_key(rel_path):
+    """Sort key that orders paths like walk_files: files before subdirectories."""
+    parts = rel_path.split('/')
+    return [(1, part) for part in parts[:-1]] + [(0, parts[-1])]
+
+
+def list_git_files(root, excluded_dirs=(), skip_hidden=True, include_untracked=False, on_directory=None,
+                   exclude_ignored=True):
+    """List the files of a git work tree from the index with `git ls-files -z`.
+
+    Untracked files are only listed when include_untracked is set, and
+    untracked files ignored by .gitignore and the other git exclude files
+    only when exclude_ignored is also unset, so build trees and other junk
+    are normally skipped without being walked. Paths below excluded or hidden directories are
+    pruned with the same rule as walk_files, and the result is in the
+    same order.
+
+    Returns:
+        List of FileEntry objects, or None when git is not installed or root
+        is not inside a work tree (callers should fall back to walk_files).
+    """
+    command = ['git', '-C', root, 'ls-files', '-z', '--cached']
+    if include_untracked:
+        command.append('--others')
+        if exclude_ignored:
+            command.append('--exclude-standard')
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.debug(f"Not listing {root} from the git index: {e}")
+        return None
+
+    excluded_dirs = frozenset(excluded_dirs)
+    pruned = {}
+    entries = []
+    for rel_path in sorted(set(result.stdout.decode('utf-8', 'surrogateescape').split('\0')) - {''},
+                           key=walk_order_key):
+        rel_dir = rel_path.rpartition('/')[0]
+        if rel_dir not in pruned:
+            pruned[rel_dir] = any(is_pruned_dir(part, excluded_dirs, skip_hidden)
+                                  for part in rel_dir.split('/') if part)
+        if pruned[rel_dir]:
+            continue
+        entry = FileEntry(os.path.join(root, rel_path), rel_path)
+        try:
+            # Skips tracked files deleted from the work tree and submodules
+            entry._stat = os.stat(entry.path)
+        except OSError:
+            continue
+        if not stat.S_ISREG(entry._stat.st_mode):
+            continue
+        entries.append(entry)
+
+    logging.debug(f"Listed {len(entries)} files from the git index of {root}")
+    if on_directory is not None:
+        on_directory('', len(entries))
+    return entries
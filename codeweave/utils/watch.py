@@ -0,0 +1,195 @@
+# Description: File change notification for --watch, via inotify or polling.
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from codeweave.utils.walk import is_pruned_dir
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+DEFAULT_POLL_INTERVAL = 1.0
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Optional inotify support through libc
+try:
+    if not sys.platform.startswith('linux'):
+        raise OSError("inotify is only available on Linux")
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    INOTIFY_AVAILABLE = True
+except (OSError, AttributeError):
+    INOTIFY_AVAILABLE = False
+
+
+class InotifyWatcher:
+    """Watches every non-pruned directory below root with one inotify descriptor.
+
+    New directories are watched as they appear. Directory creation, removal
+    and event queue overflows are reported as a request to rescan, since
+    files may have appeared or vanished without individual events.
+    """
+
+    def __init__(self, root, excluded_dirs=(), gitignore=None):
+        self.root = root
+        self.excluded_dirs = frozenset(excluded_dirs)
+        self.gitignore = gitignore
+        self.directories = {}
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        self._watch_tree('')
+
+    def _watch_tree(self, rel_dir):
+        stack = [rel_dir]
+        while stack:
+            rel_dir = stack.pop()
+            directory = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR)
+            if wd < 0:
+                logging.debug(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self.directories[wd] = rel_dir
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if self.gitignore is not None and any(entry.name == '.gitignore' for entry in entries):
+                self.gitignore.add_file(rel_dir, os.path.join(directory, '.gitignore'))
+            for entry in entries:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if not self._is_pruned(entry.name, rel_path):
+                    stack.append(rel_path)
+
+    def _is_pruned(self, name, rel_path):
+        return (is_pruned_dir(name, self.excluded_dirs)
+                or bool(self.gitignore and self.gitignore.is_ignored(rel_path, is_dir=True)))
+
+    def poll(self, timeout=None):
+        """Wait up to timeout seconds for changes.
+
+        Returns:
+            (changed, rescan): the set of changed file paths relative to root,
+            and whether the directory structure changed
+        """
+        changed = set()
+        rescan = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, rescan
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                rel_dir = self.directories.get(wd)
+                if rel_dir is None or not name:
+                    continue
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if mask & IN_ISDIR:
+                    if self._is_pruned(name, rel_path):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(rel_path)
+                    rescan = True
+                else:
+                    changed.add(rel_path)
+        return changed, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Detects changes by comparing the (mtime_ns, size) of listed files.
+
+    list_files is called every interval seconds and must return FileEntry
+    objects, e.g. a bound codeweave.main.enumerate_folder.
+    """
+
+    def __init__(self, list_files, interval=DEFAULT_POLL_INTERVAL):
+        self.list_files = list_files
+        self.interval = interval
+        self.snapshot = self._take_snapshot()
+        self.last_poll = time.monotonic()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for entry in self.list_files():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.rel_path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout=None):
+        """Wait for the next poll, up to timeout seconds, and return (changed, rescan)."""
+        wait = max(0.0, self.last_poll + self.interval - time.monotonic())
+        if timeout is not None and wait > timeout:
+            time.sleep(timeout)
+            return set(), False
+        time.sleep(wait)
+        self.last_poll = time.monotonic()
+        snapshot = self._take_snapshot()
+        changed = {rel_path for rel_path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(rel_path) != self.snapshot.get(rel_path)}
+        self.snapshot = snapshot
+        return changed, False
+
+    def close(self):
+        pass
+
+
+def create_watcher(root, list_files, excluded_dirs=(), gitignore=None, polling=False, interval=DEFAULT_POLL_INTERVAL):
+    """Return an InotifyWatcher when available, otherwise a PollingWatcher."""
+    if INOTIFY_AVAILABLE and not polling:
+        try:
+            return InotifyWatcher(root, excluded_dirs, gitignore)
+        except OSError as e:
+            logging.warning(f"inotify unavailable ({e}); falling back to polling")
+    return PollingWatcher(list_files, interval)
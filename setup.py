@@ -19,14 +19,14 @@ setup(
         'tk==0.1.0',
         'urllib3==2.2.1',
         'tqdm',
-        'nbformat',
-        'nbconvert',
         'pdfminer.six',
         'rich',
     ],
     extras_require={
         'ai': ['litellm>=1.0.0'],  # Preferred AI provider
         'ai-basic': ['openai>=1.0.0'],  # Fallback AI provider
+        'zstd': ['zstandard'],  # .tar.zst archive input
+        'nbconvert': ['nbformat', 'nbconvert'],  # --ipynb_nbconvert
     },
     tests_require=['pytest'],
     test_suite='pytest',
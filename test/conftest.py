@@ -0,0 +1,75 @@
+import io
+import threading
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+
+def make_zip_bytes(files):
+    """Build an in-memory zip archive from a {name: content} mapping."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """Serves the bytes registered in `server.files` by path."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%x"' % hash(body)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        range_header = self.headers.get('Range')
+        if range_header and self.server.accept_ranges:
+            first, last = range_header[len('bytes='):].split('-')
+            if first == '':
+                start, end = max(len(body) - int(last), 0), len(body) - 1
+            else:
+                start, end = int(first), min(int(last), len(body) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+            body = body[start:end + 1]
+        else:
+            self.send_response(200)
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ArchiveHandler)
+    server.files = {}
+    server.requests = []
+    server.accept_ranges = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def server_url(server, path):
+    host, port = server.server_address
+    return f"http://{host}:{port}{path}"
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk caches of every test run inside its tmp_path."""
+    monkeypatch.setattr('codeweave.main.DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
@@ -0,0 +1,70 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+from codeweave.main import main
+from codeweave.utils.archive import is_tar_path, iter_tar_members, open_tar_stream, strip_archive_suffix
+
+PYTHON_SOURCE = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n"
+
+
+def make_tarball(path, files, mode='w:gz'):
+    """Write a tarball at path from a {name: content} mapping."""
+    with tarfile.open(path, mode) as tar:
+        for name, content in files.items():
+            data = content.encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def test_tar_suffix_helpers():
+    assert is_tar_path('repo.tar.gz')
+    assert is_tar_path('https://github.com/user/repo/archive/refs/heads/main.tar.gz')
+    assert not is_tar_path('repo.zip')
+    assert strip_archive_suffix('repo-main.tar.gz') == 'repo-main'
+    assert strip_archive_suffix('repo.zip') == 'repo'
+
+
+def test_iter_tar_members_streams_headers(tmp_path):
+    """Members are yielded in one forward pass; unread members are skipped."""
+    tarball = tmp_path / 'repo.tar.gz'
+    make_tarball(tarball, {'repo/a.py': 'a = 1\n', 'repo/b.txt': 'b\n', 'repo/c.py': 'c = 3\n'})
+
+    with open(tarball, 'rb') as f, open_tar_stream(f, str(tarball)) as tar:
+        contents = {path: read() for path, size, read in iter_tar_members(tar) if path.endswith('.py')}
+
+    assert contents == {'repo/a.py': b'a = 1\n', 'repo/c.py': b'c = 3\n'}
+
+
+def test_process_tarball(tmp_path, monkeypatch):
+    tarball = tmp_path / 'repo-main.tar.gz'
+    make_tarball(tarball, {
+        'repo-main/pkg/module.py': PYTHON_SOURCE,
+        'repo-main/pkg/notes.txt': 'notes\n',
+    })
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(tarball), '--lang', 'python', '--excluded_dirs', ''])
+
+    assert os.path.basename(output_file) == 'repo-main_python.txt'
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'File: repo-main/pkg/module.py' in content
+    assert 'notes.txt' not in content
+
+
+def test_process_zstd_tarball(tmp_path, monkeypatch):
+    zstandard = pytest.importorskip('zstandard')
+    plain = tmp_path / 'repo.tar'
+    make_tarball(plain, {'repo/pkg/module.py': PYTHON_SOURCE}, mode='w')
+    tarball = tmp_path / 'repo.tar.zst'
+    tarball.write_bytes(zstandard.ZstdCompressor().compress(plain.read_bytes()))
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(tarball), '--lang', 'python', '--excluded_dirs', ''])
+
+    with open(output_file, encoding='utf-8') as f:
+        assert 'File: repo/pkg/module.py' in f.read()
@@ -0,0 +1,61 @@
+import json
+import zipfile
+
+from codeweave.main import main
+from codeweave.utils.audit import FilterAudit
+
+
+def python_source(name, lines=20):
+    return "\n".join(f"{name}_{i} = {i}" for i in range(lines)) + "\n"
+
+
+def test_audit_keeps_largest_files():
+    audit = FilterAudit(top_n=2)
+    for size in [5, 50, 20, 40]:
+        audit.skip('bad filetype', f'f{size}', size)
+    audit.include('a.py', 10)
+
+    data = audit.to_dict()
+    assert data['rules']['bad filetype']['hits'] == 4
+    assert data['skipped'] == {'files': 4, 'bytes': 115}
+    assert [record['path'] for record in data['largest_excluded']] == ['f50', 'f40']
+    assert data['largest_included'] == [{'path': 'a.py', 'size': 10}]
+
+
+def test_folder_audit(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    (folder / 'module.py').write_text(python_source('module'))
+    (folder / 'short.py').write_text("x = 1\n")
+    (folder / 'test_module.py').write_text("import pytest\n" + python_source('case'))
+    (folder / 'notes.txt').write_text("notes\n")
+    (folder / 'blob.py').write_bytes(b'\x00' * 64)
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index', '--audit'])
+
+    with open(output_file + '.audit.json', encoding='utf-8') as f:
+        audit = json.load(f)
+    rules = audit['rules']
+    assert rules['bad filetype']['hits'] == 1
+    assert rules['test file']['hits'] == 1
+    assert rules['insufficient content']['hits'] == 1
+    assert rules['binary content']['hits'] == 1
+    assert rules['binary content']['bytes'] == 64
+    assert audit['included']['files'] == 1
+    assert audit['largest_included'][0]['path'] == 'module.py'
+
+
+def test_zip_audit_custom_path(tmp_path, monkeypatch):
+    archive = tmp_path / 'repo.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('repo/module.py', python_source('module'))
+        zf.writestr('repo/test_case.py', "import pytest\n" + python_source('case'))
+    monkeypatch.chdir(tmp_path)
+    audit_file = tmp_path / 'audit.json'
+
+    main([str(archive), '--lang', 'python', '--excluded_dirs', '', '--audit', str(audit_file)])
+
+    audit = json.loads(audit_file.read_text())
+    assert audit['included']['files'] == 1
+    assert audit['rules']['test file']['hits'] == 1
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+from conftest import make_zip_bytes, server_url
+from codeweave.batch import entry_to_argv, load_manifest
+from codeweave.main import main
+
+PYTHON_SOURCE = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n"
+
+
+def make_project(root, name):
+    project = root / name
+    (project / 'pkg').mkdir(parents=True)
+    (project / 'pkg' / 'module.py').write_text(PYTHON_SOURCE)
+    return project
+
+
+def test_load_manifest_applies_defaults(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({
+        'defaults': {'lang': 'python'},
+        'entries': ['/some/folder', {'input': 'repo.zip', 'lang': ['python', 'md'], 'keep-comments': True}],
+    }))
+
+    entries = load_manifest(str(manifest))
+
+    assert entries == [
+        {'lang': 'python', 'input': '/some/folder'},
+        {'lang': ['python', 'md'], 'input': 'repo.zip', 'keep-comments': True},
+    ]
+    assert entry_to_argv(entries[1]) == ['repo.zip', '--lang', 'python,md', '--keep-comments']
+
+
+def test_batch_runs_every_entry_and_reports_failures(http_server, tmp_path, monkeypatch):
+    """A failing entry does not stop the remaining entries."""
+    http_server.files['/user/repo/archive/refs/heads/main.zip'] = make_zip_bytes({
+        'repo-main/pkg/module.py': PYTHON_SOURCE,
+    })
+    first = make_project(tmp_path, 'first')
+    second = make_project(tmp_path, 'second')
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([
+        str(first),
+        {'input': server_url(http_server, '/user/repo'), 'branch_or_tag': 'main'},
+        {'input': server_url(http_server, '/user/missing'), 'branch_or_tag': 'main'},
+        str(second),
+    ]))
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(SystemExit) as excinfo:
+        main(['--batch', str(manifest), '--lang', 'python', '--excluded_dirs', '', '--no-cache'])
+
+    assert excinfo.value.code == 1
+    assert os.path.exists(f"{first}_python.txt")
+    assert os.path.exists(f"{second}_python.txt")
+    with open(os.path.join('outputs', 'repo_python.txt'), encoding='utf-8') as f:
+        assert 'File: repo-main/pkg/module.py' in f.read()
+    assert http_server.requests.count('/user/repo/archive/refs/heads/main.zip') == 1
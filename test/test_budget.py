@@ -0,0 +1,75 @@
+import zipfile
+
+import codeweave.main
+from codeweave.main import main
+from codeweave.utils.budget import TokenBudget, rank_candidates
+
+
+def python_source(name, lines=20):
+    return "\n".join(f"{name}_{i} = {i}" for i in range(lines)) + "\n"
+
+
+def test_rank_candidates():
+    candidates = [(path, size, path) for path, size in [
+        ('pkg/deep/nested/helpers.py', 100),
+        ('examples/demo.py', 100),
+        ('pkg/big.py', 1024 * 1024),
+        ('pkg/utils.py', 100),
+        ('pkg/__init__.py', 100),
+        ('main.py', 100),
+        ('pkg/api_pb2.py', 100),
+    ]]
+    ranked = [path for _, _, path in rank_candidates(candidates)]
+    assert ranked == ['main.py', 'pkg/__init__.py', 'pkg/utils.py', 'pkg/api_pb2.py',
+                      'pkg/deep/nested/helpers.py', 'examples/demo.py', 'pkg/big.py']
+
+
+def test_budget_stops_when_nothing_fits():
+    budget = TokenBudget(max_tokens=100)
+    candidates = [('a.py', 200, 'a'), ('b.py', 300, 'b'), ('c.py', 1000, 'c')]
+    taken = []
+    for path, size, item in budget.ranked(candidates):
+        if budget.admits(path, size) and budget.accept(path, size):
+            taken.append(item)
+    assert taken == ['a']
+    # 'b' needs 75 tokens but only 50 remain, and so does everything after it
+    assert budget.unread == 2
+    assert budget.used == 50
+
+
+def test_folder_budget_reads_only_ranked_files(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    (folder / 'pkg' / 'sub').mkdir(parents=True)
+    (folder / 'main.py').write_text(python_source('main'))
+    (folder / 'pkg' / 'sub' / 'deep.py').write_text(python_source('deep'))
+    (folder / 'pkg' / 'large.py').write_text(python_source('large', 2000))
+    monkeypatch.chdir(tmp_path)
+
+    rendered = []
+    original = codeweave.main.render_folder_file
+    monkeypatch.setattr(codeweave.main, 'render_folder_file',
+                        lambda entry, *args, **kwargs: rendered.append(entry.rel_path) or original(entry, *args, **kwargs))
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index',
+                        '--max-tokens', '300', '--max-file-tokens', '2000'])
+
+    assert rendered == ['main.py', 'pkg/sub/deep.py']
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert content.index('main_0') < content.index('deep_0')
+    assert 'large_0' not in content
+
+
+def test_zip_budget(tmp_path, monkeypatch):
+    archive = tmp_path / 'repo.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('repo/pkg/sub/deep.py', python_source('deep'))
+        zf.writestr('repo/app.py', python_source('app'))
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(archive), '--lang', 'python', '--excluded_dirs', '', '--max-tokens', '100'])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'app_0' in content
+    assert 'deep_0' not in content
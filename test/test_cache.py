@@ -0,0 +1,51 @@
+import pytest
+
+from codeweave.utils.cache import TransformCache
+
+
+def test_transform_cache_hits_across_instances(tmp_path):
+    calls = []
+
+    def strip():
+        calls.append(1)
+        return "stripped"
+
+    cache = TransformCache(str(tmp_path))
+    assert cache.get_or_compute('strip-python:1', "source", strip) == "stripped"
+    cache.close()
+
+    cache = TransformCache(str(tmp_path))
+    assert cache.get_or_compute('strip-python:1', "source", strip) == "stripped"
+    # Different options or content are different entries
+    cache.get_or_compute('strip-python:1', "source", strip, options={'keep': True})
+    cache.get_or_compute('strip-python:1', b"other source", strip)
+    assert len(calls) == 3
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_transform_cache_remembers_failures(tmp_path):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise SyntaxError("invalid syntax")
+
+    cache = TransformCache(str(tmp_path))
+    for _ in range(2):
+        with pytest.raises(SyntaxError, match="invalid syntax"):
+            cache.get_or_compute('strip-python:1', "def (", broken, errors=(SyntaxError,))
+    assert len(calls) == 1
+    cache.close()
+
+
+def test_transform_cache_evicts_least_recently_used(tmp_path):
+    cache = TransformCache(str(tmp_path), max_size=250)
+    for name in ['a', 'b', 'c']:
+        cache.get_or_compute('t', name, lambda: name * 100)
+    cache.close()
+
+    cache = TransformCache(str(tmp_path))
+    remaining = [row[0] for row in cache.connection.execute("SELECT result FROM transforms ORDER BY last_used")]
+    assert remaining == ['b' * 100, 'c' * 100]
+    cache.close()
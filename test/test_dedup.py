@@ -0,0 +1,92 @@
+import json
+import zipfile
+
+from codeweave.main import main
+from codeweave.utils.dedup import Deduplicator, lsh_bands
+
+
+def python_source(name, lines=30):
+    return "".join(f"{name}_{i} = compute({i}, '{name}')\n" for i in range(lines))
+
+
+def section(path, body):
+    return f"# File: {path}\n{body}\n\n"
+
+
+def write(dedup, path, body):
+    written, fingerprint, duplicate = dedup.replace(section(path, body))
+    dedup.record(fingerprint, duplicate)
+    return written
+
+
+def test_exact_duplicate_is_replaced_by_back_reference():
+    dedup = Deduplicator()
+    body = python_source('value')
+    assert write(dedup, 'a/util.py', body) == section('a/util.py', body)
+    assert write(dedup, 'b/util.py', body) == '# File: b/util.py\n# Duplicate of: a/util.py\n\n'
+    assert write(dedup, 'c/other.py', python_source('other')) == section('c/other.py', python_source('other'))
+    # Without a threshold, near duplicates are written in full
+    edited = body.replace('value_3 =', 'changed_3 =')
+    assert write(dedup, 'd/util.py', edited) == section('d/util.py', edited)
+    assert dedup.duplicates == 1 and dedup.near_duplicates == 0
+
+
+def test_near_duplicate_over_threshold():
+    dedup = Deduplicator(threshold=0.8)
+    body = python_source('value', lines=60)
+    write(dedup, 'a/util.py', body)
+    licensed = "# Copyright 2024 Example\n# Licensed under MIT\n" + body.replace('    ', '\t')
+    assert write(dedup, 'vendor/util.py', licensed).startswith(
+        '# File: vendor/util.py\n# Near-duplicate of: a/util.py (')
+    different = python_source('value', lines=30) + python_source('other', lines=30)
+    assert write(dedup, 'b/mixed.py', different) == section('b/mixed.py', different)
+    assert dedup.near_duplicates == 1
+
+
+def test_short_bodies_are_always_written():
+    dedup = Deduplicator(threshold=0.5)
+    placeholder = "[PDF file - use --pdf_text_mode to extract text]"
+    write(dedup, 'a.pdf', placeholder)
+    assert write(dedup, 'b.pdf', placeholder) == section('b.pdf', placeholder)
+
+
+def test_lsh_bands_find_pairs_at_threshold():
+    assert lsh_bands(0.9) == (16, 8)
+    bands, rows = lsh_bands(0.5)
+    assert bands * rows == 128 and 1 - (1 - 0.5 ** rows) ** bands >= 0.99
+
+
+def test_folder_dedup(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    for directory in ('pkg', 'vendor', 'copy'):
+        (folder / directory).mkdir(parents=True)
+    (folder / 'pkg' / 'util.py').write_text(python_source('helper'))
+    # Identical once comments are stripped
+    (folder / 'copy' / 'util.py').write_text("# vendored copy\n" + python_source('helper'))
+    (folder / 'vendor' / 'main.py').write_text(python_source('entry'))
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index', '--dedup',
+                        '--audit'])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert content.count('helper_29 =') == 1
+    assert f'# File: {folder}/pkg/util.py\n# Duplicate of: {folder}/copy/util.py\n' in content
+    assert 'entry_29 =' in content
+    with open(output_file + '.audit.json', encoding='utf-8') as f:
+        assert json.load(f)['rules']['duplicate']['hits'] == 1
+
+
+def test_zip_near_dedup(tmp_path, monkeypatch):
+    archive = tmp_path / 'repo.zip'
+    body = python_source('helper', lines=60)
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('repo/a.py', body)
+        zf.writestr('repo/b.py', body.replace('helper_59 =', 'patched_59 ='))
+    monkeypatch.chdir(tmp_path)
+
+    with open(main([str(archive), '--lang', 'python', '--dedup-threshold', '0.8']), encoding='utf-8') as f:
+        content = f.read()
+    assert content.count('helper_0 =') == 1
+    assert 'Near-duplicate of: repo/a.py' in content
@@ -0,0 +1,175 @@
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from conftest import make_zip_bytes, server_url
+from codeweave.utils import download
+from codeweave.utils.download import download_archive, ArchiveCache, get_session
+from codeweave.utils.remote_zip import open_remote_zip, prefetch_member
+
+
+def test_download_archive_streams_to_spooled_file(http_server, monkeypatch):
+    """Large archives roll over to disk instead of staying in memory."""
+    monkeypatch.setattr(download, 'SPOOL_MAX_SIZE', 1024)
+    files = {f"repo-main/module_{i}.py": "x = 1\n" * 500 for i in range(20)}
+    payload = make_zip_bytes(files)
+    http_server.files['/archive.zip'] = payload
+
+    status, archive = download_archive(server_url(http_server, '/archive.zip'), chunk_size=512)
+    with archive:
+        assert status == 200
+        assert archive._rolled
+        assert archive.read() == payload
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zf:
+            assert sorted(zf.namelist()) == sorted(files)
+
+
+def test_download_archive_reports_failure(http_server):
+    status, archive = download_archive(server_url(http_server, '/missing.zip'))
+    assert status == 404
+    assert archive is None
+
+
+def test_archive_cache_revalidates_with_etag(http_server, tmp_path):
+    """A second fetch of an unchanged archive is answered with a 304."""
+    url = server_url(http_server, '/repo/archive/refs/heads/main.zip')
+    http_server.files['/repo/archive/refs/heads/main.zip'] = make_zip_bytes({'repo-main/a.py': 'a = 1\n'})
+    cache = ArchiveCache(str(tmp_path))
+
+    status, first_path = cache.fetch(url)
+    assert status == 200
+    status, second_path = cache.fetch(url)
+    assert status == 304
+    assert first_path == second_path
+    with zipfile.ZipFile(second_path) as zf:
+        assert zf.namelist() == ['repo-main/a.py']
+
+    # --refresh skips revalidation and downloads the archive again
+    status, _ = cache.fetch(url, refresh=True)
+    assert status == 200
+
+    # --offline never touches the network
+    request_count = len(http_server.requests)
+    status, offline_path = cache.fetch(url, offline=True)
+    assert offline_path == first_path
+    assert len(http_server.requests) == request_count
+    assert cache.fetch(server_url(http_server, '/other.zip'), offline=True) == (None, None)
+
+
+def test_archive_cache_evicts_least_recently_used(http_server, tmp_path):
+    payload = make_zip_bytes({'repo/big.txt': os.urandom(4096)})
+    for name in ('one', 'two', 'three'):
+        http_server.files[f'/{name}.zip'] = payload
+    cache = ArchiveCache(str(tmp_path), max_size=int(len(payload) * 2.5))
+
+    paths = {}
+    for name in ('one', 'two', 'three'):
+        _, paths[name] = cache.fetch(server_url(http_server, f'/{name}.zip'))
+        time.sleep(0.01)
+
+    assert not os.path.exists(paths['one'])
+    assert os.path.exists(paths['two'])
+    assert os.path.exists(paths['three'])
+
+
+def test_archive_cache_keeps_pinned_archives(http_server, tmp_path):
+    payload = make_zip_bytes({'repo/big.txt': os.urandom(4096)})
+    for name in ('one', 'two', 'three'):
+        http_server.files[f'/{name}.zip'] = payload
+    cache = ArchiveCache(str(tmp_path), max_size=int(len(payload) * 2.5))
+
+    paths = {}
+    with cache.pin(server_url(http_server, '/one.zip')):
+        for name in ('one', 'two', 'three'):
+            _, paths[name] = cache.fetch(server_url(http_server, f'/{name}.zip'))
+            time.sleep(0.01)
+        # 'one' is the least recently used but is still being read
+        assert os.path.exists(paths['one'])
+        assert not os.path.exists(paths['two'])
+
+
+def test_archive_cache_concurrent_fetches(http_server, tmp_path):
+    http_server.files['/repo.tar.gz'] = b'not really gzip' * 100
+    cache = ArchiveCache(str(tmp_path))
+    url = server_url(http_server, '/repo.tar.gz')
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: cache.fetch(url), range(16)))
+
+    paths = {path for _, path in results}
+    assert len(paths) == 1 and paths.pop().endswith('.tar.gz')
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(('.tmp', '.part'))]
+
+
+class FailingSession:
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, **kwargs):
+        self.timeouts.append(kwargs.get('timeout'))
+        raise requests.Timeout("read timed out")
+
+
+def test_archive_cache_serves_cached_archive_when_request_fails(http_server, tmp_path):
+    url = server_url(http_server, '/repo.zip')
+    http_server.files['/repo.zip'] = make_zip_bytes({'repo/a.py': 'a = 1\n'})
+    cache = ArchiveCache(str(tmp_path))
+    _, cached_path = cache.fetch(url)
+
+    session = FailingSession()
+    assert cache.fetch(url, session=session) == (None, cached_path)
+    assert session.timeouts == [download.DEFAULT_HTTP_TIMEOUT]
+
+
+def test_interactive_mode_downloads_archive_once(http_server, tmp_path, monkeypatch):
+    """The extension scan and the processing pass share a single download."""
+    from codeweave import main as codeweave_main
+
+    source = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n"
+    http_server.files['/user/repo/archive/refs/heads/main.zip'] = make_zip_bytes({
+        'repo-main/pkg/module.py': source,
+        'repo-main/pkg/notes.txt': 'notes\n',
+    })
+    seen = {}
+
+    def select_extensions(collected_extensions, extension_counts=None):
+        seen['counts'] = dict(extension_counts)
+        return ['.py']
+
+    monkeypatch.setattr(codeweave_main, 'interactive_extension_selection', select_extensions)
+    monkeypatch.chdir(tmp_path)
+
+    output_file = codeweave_main.main([server_url(http_server, '/user/repo'), '--branch_or_tag', 'main',
+                                       '--no-cache', '--excluded_dirs', ''])
+
+    assert http_server.requests == ['/user/repo/archive/refs/heads/main.zip']
+    assert seen['counts'] == {'.py': 1, '.txt': 1}
+    with open(output_file, encoding='utf-8') as f:
+        assert 'File: repo-main/pkg/module.py' in f.read()
+
+
+def test_remote_zip_fetches_only_selected_members(http_server):
+    """Range requests read the central directory and one member, not the whole archive."""
+    http_server.accept_ranges = True
+    files = {f"repo-main/pkg/module_{i}.py": os.urandom(8192).hex() for i in range(200)}
+    payload = make_zip_bytes(files)
+    http_server.files['/archive.zip'] = payload
+
+    zip_obj = open_remote_zip(server_url(http_server, '/archive.zip'), get_session())
+    assert sorted(zip_obj.namelist()) == sorted(files)
+
+    info = zip_obj.getinfo('repo-main/pkg/module_7.py')
+    requests_before = zip_obj.fp.requests
+    prefetch_member(zip_obj, info)
+    assert zip_obj.read(info).decode() == files['repo-main/pkg/module_7.py']
+    assert zip_obj.fp.requests == requests_before + 1
+    assert zip_obj.fp.bytes_fetched < len(payload) / 4
+
+
+def test_remote_zip_falls_back_without_range_support(http_server):
+    http_server.files['/archive.zip'] = make_zip_bytes({'repo-main/a.py': 'a = 1\n'})
+    assert open_remote_zip(server_url(http_server, '/archive.zip'), get_session()) is None
@@ -0,0 +1,99 @@
+from codeweave.utils.file import IndicatorMatcher, analyze_content, has_sufficient_content, remove_comments_and_docstrings
+from codeweave.utils.languages import LanguageProfile
+from codeweave.utils.path import is_test_file
+
+SAMPLES = [
+    "import pytest\n\ndef test_a():\n    assert True\n",
+    "package main\n\nimport testing\n\nfunc TestA(t *testing.T) {}\n",
+    "describe('a', () => { it('works', () => expect(1).toBe(1)); });\n",
+    "def submit(form):\n    return form\n",
+    "const jest = require('jest-cli');\n",
+    "x = 1\n",
+]
+
+
+def test_matcher_agrees_with_is_test_file():
+    langs = ['python', 'go', 'js', 'html']
+    matcher = IndicatorMatcher(langs)
+    for sample in SAMPLES:
+        expected = {lang for lang in langs if is_test_file(sample, lang)}
+        assert matcher.match(sample) == expected, sample
+
+
+def test_matcher_reports_indicators_hidden_by_longer_ones():
+    profiles = {
+        'a': LanguageProfile('a', test_indicators=('import testing',)),
+        'b': LanguageProfile('b', test_indicators=('import test',)),
+        'c': LanguageProfile('c', test_indicators=('testing',)),
+    }
+    matcher = IndicatorMatcher(['a', 'b', 'c'], profiles)
+    assert matcher.match("import testing") == {'a', 'b', 'c'}
+    assert matcher.match("import tests") == {'b'}
+
+
+def test_analyze_content():
+    content = "# comment\n\n// note\nx = 1\n  / 2\n" + "y" * 30 + "\n"
+    stats = analyze_content(content, IndicatorMatcher(['python']))
+
+    assert stats.substantive_lines == 3
+    assert stats.longest_line == 30
+    assert stats.estimated_tokens == -(-len(content) // 4)
+    assert not stats.is_test
+    assert not stats.is_sufficient()
+    assert stats.is_sufficient(min_line_count=3)
+
+
+def test_substantive_line_count_matches_previous_definition():
+    content = "a\n \t\n#x\n  // y\n/z\n\r\n\x0c\nb\r\n"
+    lines = [line for line in content.split('\n') if line.strip() and not line.strip().startswith(('#', '//'))]
+    assert analyze_content(content).substantive_lines == len(lines) == 3
+    assert has_sufficient_content("[PDF file - use --pdf_text_mode to extract text]")
+
+
+def test_strip_keeps_code_lines_as_written():
+    source = (
+        '#!/usr/bin/env python\n'
+        '"""Module docstring."""\n'
+        'import os  # needed\n'
+        '\n'
+        'def f(x):\n'
+        '    """Multi-line\n'
+        '    docstring."""\n'
+        '    s = "kept"   # inline\n'
+        '    return  s.format( x )\n'
+        '\n'
+        'class A:\n'
+        '    """Only a docstring."""\n'
+        '    f"{run()}"\n'
+    )
+    assert remove_comments_and_docstrings(source) == (
+        'import os\n'
+        '\n'
+        'def f(x):\n'
+        '    s = "kept"\n'
+        '    return  s.format( x )\n'
+        '\n'
+        'class A:\n'
+        '    f"{run()}"\n'
+    )
+
+
+def test_strip_fills_emptied_blocks():
+    source = 'if x:\n    "a"\n    r\'b\'  # c\nelse:\n    y = 1\n'
+    assert remove_comments_and_docstrings(source) == 'if x:\n    pass\nelse:\n    y = 1\n'
+
+
+def test_strip_drops_backslashes_continuing_onto_removed_comments():
+    source = 'x = 1 \\\n# c\ny = (2 + \\\n     3)\n"doc" \\\n  # c\nz = 4\n'
+    stripped = remove_comments_and_docstrings(source)
+    assert stripped == 'x = 1\ny = (2 + \\\n     3)\nz = 4\n'
+    compile(stripped, '<stripped>', 'exec')
+
+
+def test_strip_degrades_on_invalid_source():
+    # Python 2 and broken syntax still tokenize
+    assert remove_comments_and_docstrings('print "hi"  # py2\n') == 'print "hi"\n'
+    assert remove_comments_and_docstrings('def f(:\n    pass # x\n') == 'def f(:\n    pass\n'
+    # Untokenizable source is kept as is from the error on
+    source = '# c\nx = 1\ny = """unterminated # not a comment\n'
+    assert remove_comments_and_docstrings(source) == 'x = 1\ny = """unterminated # not a comment\n'
@@ -0,0 +1,44 @@
+import argparse
+
+import pytest
+
+from codeweave.utils.filters import FilterPlan
+from codeweave.utils.path import inclusion_violate, is_file_type, is_likely_useful_file, should_exclude_file
+
+PATHS = [
+    'repo/src/app.py', 'repo/src/app.pyc', 'repo/setup.py', 'repo/__pycache__/mod.py',
+    'repo/.github/workflows/ci.py', 'repo/docs/README', 'repo/docs/conf.py', 'repo/src/gen_pb2.py',
+    'repo/tests/test_app.py', 'repo/src/main.go', 'repo/vendor/lib.go', 'repo/go.mod', 'app.py',
+]
+
+
+def make_args(**overrides):
+    args = dict(lang=['python'], exclude=['*_pb2.py'], include=['src', 'setup'], excluded_dirs=['docs'], folder=None)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+@pytest.mark.parametrize('lang', ['python', 'go'])
+@pytest.mark.parametrize('folder', [None, '/work/project'])
+def test_filter_plan_matches_per_file_functions(lang, folder):
+    plan = FilterPlan.from_args(make_args(lang=[lang], folder=folder))
+    for path in PATHS:
+        legacy_args = make_args(lang=[lang], folder=folder)
+        expected = {
+            'bad filetype': not is_file_type(path, legacy_args.lang),
+            'not useful': not is_likely_useful_file(path, lang, legacy_args),
+            'should exclude': should_exclude_file(path, legacy_args),
+            'inclusion violate': inclusion_violate(path, legacy_args),
+        }
+        assert plan.skip_reasons(path) == expected, path
+        assert plan.selects(path) == (not any(expected.values())), path
+
+
+def test_filter_plan_applies_rules_of_every_language():
+    plan = FilterPlan.from_args(make_args(lang=['python', 'js'], include=[], exclude=[], excluded_dirs=[]))
+
+    assert plan.selects('repo/src/app.py')
+    assert plan.selects('repo/src/index.js')
+    assert not plan.selects('repo/node_modules/lib/app.py')
+    assert not plan.selects('repo/__pycache__/index.js')
+    assert not plan.selects('repo/setup.py')
@@ -0,0 +1,93 @@
+import zipfile
+
+from codeweave.main import main
+from codeweave.utils.gitignore import GitIgnore
+from codeweave.utils.walk import walk_files
+
+PYTHON_SOURCE = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n"
+
+
+def test_gitignore_semantics():
+    gitignore = GitIgnore()
+    gitignore.add('', "\n".join([
+        "# comment",
+        "*.log",
+        "!keep.log",
+        "build/",
+        "/root_only.py",
+        "docs/**/draft*",
+        "cache",
+    ]))
+    gitignore.add('pkg', "!cache\nlocal.py\n")
+
+    assert gitignore.is_ignored('debug.log')
+    assert gitignore.is_ignored('sub/deep/debug.log')
+    assert not gitignore.is_ignored('keep.log')
+    # '*' also matches an empty name, so dotfiles match suffix patterns
+    assert gitignore.is_ignored('.log')
+    assert gitignore.is_ignored('sub/.log')
+    # Directory-only rules do not match files of the same name
+    assert gitignore.is_ignored('src/build', is_dir=True)
+    assert not gitignore.is_ignored('src/build')
+    # A leading slash anchors the pattern to the .gitignore's directory
+    assert gitignore.is_ignored('root_only.py')
+    assert not gitignore.is_ignored('src/root_only.py')
+    assert gitignore.is_ignored('docs/draft1.md')
+    assert gitignore.is_ignored('docs/a/b/draft2.md')
+    assert not gitignore.is_ignored('docs/final.md')
+    # Nested files take precedence over their parents
+    assert gitignore.is_ignored('cache', is_dir=True)
+    assert not gitignore.is_ignored('pkg/cache', is_dir=True)
+    assert gitignore.is_ignored('pkg/local.py')
+    assert not gitignore.is_ignored('local.py')
+    # Ancestors are checked for flat listings
+    assert gitignore.is_path_ignored('src/build/out.py')
+    assert not gitignore.is_path_ignored('src/app.py')
+
+
+def test_gitignore_many_rules():
+    rules = [f"generated_{i}/" for i in range(3000)] + [f"*.ext{i}" for i in range(3000)] + ["!important.ext7"]
+    gitignore = GitIgnore()
+    gitignore.add('', "\n".join(rules))
+
+    assert gitignore.is_ignored('a/generated_2999', is_dir=True)
+    assert gitignore.is_ignored('a/file.ext42')
+    assert gitignore.is_ignored('a/.ext42')
+    assert not gitignore.is_ignored('a/important.ext7')
+    assert not gitignore.is_ignored('a/file.py')
+
+
+def test_walk_files_prunes_ignored_subtrees(tmp_path):
+    for path in ['src/app.py', 'src/app.pyc', 'build/lib/gen.py', 'src/vendor/dep.py', 'src/vendor/keep.py']:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("x = 1\n")
+    (tmp_path / '.gitignore').write_text("build/\n*.pyc\n")
+    (tmp_path / 'src' / '.gitignore').write_text("vendor/*\n!vendor/keep.py\n")
+    listed = []
+
+    entries = walk_files(str(tmp_path), gitignore=GitIgnore(),
+                         on_directory=lambda rel_dir, count: listed.append(rel_dir))
+
+    assert [entry.rel_path for entry in entries] == [
+        '.gitignore', 'src/.gitignore', 'src/app.py', 'src/vendor/keep.py',
+    ]
+    assert 'build' not in listed
+
+
+def test_process_zip_applies_archive_gitignore(tmp_path, monkeypatch):
+    zip_path = tmp_path / 'repo-main.zip'
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        zf.writestr('repo-main/.gitignore', "generated/\n")
+        zf.writestr('repo-main/pkg/module.py', PYTHON_SOURCE)
+        zf.writestr('repo-main/pkg/generated/schema.py', PYTHON_SOURCE)
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(zip_path), '--lang', 'python', '--excluded_dirs', ''])
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'File: repo-main/pkg/module.py' in content
+    assert 'schema.py' not in content
+
+    output_file = main([str(zip_path), '--lang', 'python', '--excluded_dirs', '', '--no-gitignore'])
+    with open(output_file, encoding='utf-8') as f:
+        assert 'File: repo-main/pkg/generated/schema.py' in f.read()
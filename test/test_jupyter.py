@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from codeweave.main import main
+from codeweave.utils.jupyter import notebook_to_source
+
+
+def notebook(*cells, nbformat=4):
+    return json.dumps({'cells': list(cells), 'metadata': {'kernelspec': {'name': 'python3'}},
+                       'nbformat': nbformat, 'nbformat_minor': 5}, indent=1)
+
+
+def code_cell(source, outputs=()):
+    return {'cell_type': 'code', 'execution_count': 1, 'metadata': {'tags': ['}]"']},
+            'outputs': list(outputs), 'source': source}
+
+
+def test_code_cells_without_outputs():
+    image = {'output_type': 'display_data', 'data': {'image/png': 'iVBORw0KGgo' * 1000,
+                                                     'text/plain': ['<Figure "x">']}}
+    data = notebook(
+        {'cell_type': 'markdown', 'metadata': {}, 'source': ['# Title\n', 'Text']},
+        code_cell(['import os\n', 'print(os.sep)\n'], [image]),
+        code_cell(''),
+        {'cell_type': 'raw', 'metadata': {}, 'source': 'raw'},
+        code_cell('x = 1'),
+    )
+    assert notebook_to_source(data) == 'import os\nprint(os.sep)\n\nx = 1\n'
+    assert notebook_to_source(data.encode(), markdown=True) == (
+        '# # Title\n# Text\n\nimport os\nprint(os.sep)\n\nx = 1\n')
+
+
+def test_version_3_notebook():
+    data = json.dumps({'worksheets': [{'cells': [{'cell_type': 'code', 'input': ['y = 2\n'], 'outputs': []}]}],
+                       'nbformat': 3})
+    assert notebook_to_source(data) == 'y = 2\n'
+
+
+@pytest.mark.parametrize('data', ['[1]', '{"cells": [', '{"cells": [{"source": "x}]}'])
+def test_invalid_notebook(data):
+    with pytest.raises(ValueError):
+        notebook_to_source(data)
+
+
+def test_folder_notebook_is_converted(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    source = ''.join(f'value_{i} = {i}\n' for i in range(12))
+    (folder / 'analysis.ipynb').write_text(notebook(code_cell(source, [{'output_type': 'stream', 'text': 'out'}])))
+    (folder / 'broken.ipynb').write_text('{"cells": [')
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(folder), '--lang', 'ipynb', '--excluded_dirs', '', '--no-git-index', '--audit'])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'value_11 = 11' in content
+    assert 'output_type' not in content
+    with open(output_file + '.audit.json', encoding='utf-8') as f:
+        assert json.load(f)['rules']['invalid notebook']['hits'] == 1
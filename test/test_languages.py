@@ -0,0 +1,93 @@
+import argparse
+import dataclasses
+import json
+
+import pytest
+
+import codeweave.main
+from codeweave.main import main
+
+from codeweave.utils.filters import FilterPlan
+from codeweave.utils.languages import LANGUAGE_PROFILES, get_profile, load_profiles
+from codeweave.utils.path import file_extension_dict, is_likely_useful_file, is_test_file
+
+
+def test_profiles_are_immutable():
+    profile = LANGUAGE_PROFILES['python']
+    assert '__pycache__' in profile.excluded_dirs
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        profile.excluded_dirs = frozenset()
+    with pytest.raises(TypeError):
+        LANGUAGE_PROFILES['python'] = profile
+
+
+def test_is_likely_useful_file_does_not_mutate_args():
+    args = argparse.Namespace(excluded_dirs=['docs'], folder=None)
+    for _ in range(3):
+        assert not is_likely_useful_file('repo/node_modules/lib.js', 'js', args)
+        assert is_likely_useful_file('repo/src/app.js', 'js', args)
+    assert args.excluded_dirs == ['docs']
+
+
+def test_load_profiles_extends_registry(tmp_path):
+    profiles_file = tmp_path / 'profiles.json'
+    profiles_file.write_text(json.dumps({'profiles': {
+        'rustlang': {'extensions': ['.rs'], 'excluded_dirs': ['target'], 'test_indicators': ['#[test]']},
+        'python': {'config_files': ['conftest.py']},
+    }}))
+    try:
+        profiles = load_profiles(str(profiles_file))
+
+        assert 'rustlang' not in LANGUAGE_PROFILES
+        assert get_profile('python', profiles).config_files == frozenset({'conftest.py'})
+        # Fields that are not overridden are inherited
+        assert '__pycache__' in get_profile('python', profiles).excluded_dirs
+        assert is_test_file("#[test]\nfn works() {}", 'rustlang', profiles)
+
+        plan = FilterPlan(['rustlang'], profiles=profiles)
+        assert plan.selects('repo/src/main.rs')
+        assert not plan.selects('repo/target/debug/build.rs')
+    finally:
+        file_extension_dict.pop('rustlang', None)
+
+
+def test_load_profiles_rejects_unknown_fields(tmp_path):
+    profiles_file = tmp_path / 'profiles.json'
+    profiles_file.write_text(json.dumps({'go': {'excluded_directories': ['third_party']}}))
+    with pytest.raises(ValueError, match='excluded_directories'):
+        load_profiles(str(profiles_file))
+
+
+def test_folder_applies_custom_profile_excluded_dirs(tmp_path, monkeypatch):
+    profiles_file = tmp_path / 'profiles.json'
+    profiles_file.write_text(json.dumps({'rustlang': {'extensions': ['.rs'], 'excluded_dirs': ['target']}}))
+    folder = tmp_path / 'crate'
+    source = "".join(f"let value_{i} = {i};\n" for i in range(12))
+    for path in ['src/main.rs', 'target/debug/build.rs']:
+        (folder / path).parent.mkdir(parents=True, exist_ok=True)
+        (folder / path).write_text(source)
+    monkeypatch.chdir(tmp_path)
+    watched = {}
+    monkeypatch.setattr(codeweave.main, 'create_watcher',
+                        lambda root, list_files, excluded_dirs, *args, **kwargs: watched.update(
+                            excluded_dirs=excluded_dirs) or _StoppedWatcher())
+
+    try:
+        output_file = main([str(folder), '--lang', 'rustlang', '--profiles', str(profiles_file),
+                            '--excluded_dirs', '', '--no-git-index', '--watch'])
+    finally:
+        file_extension_dict.pop('rustlang', None)
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'src/main.rs' in content
+    assert 'target/' not in content
+    assert 'target' in watched['excluded_dirs']
+
+
+class _StoppedWatcher:
+    def poll(self, timeout=None):
+        raise KeyboardInterrupt
+
+    def close(self):
+        pass
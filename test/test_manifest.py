@@ -0,0 +1,85 @@
+import json
+import os
+
+import codeweave.main
+from codeweave.main import main
+from codeweave.utils.manifest import manifest_path
+
+
+def python_source(name):
+    return "\n".join(f"{name}_{i} = {i}  # comment" for i in range(20)) + "\n"
+
+
+def run(folder, *extra):
+    return main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index', *extra])
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_incremental_reuses_unchanged_files(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    for name in ['alpha', 'beta', 'gamma']:
+        (folder / 'pkg').mkdir(parents=True, exist_ok=True)
+        (folder / 'pkg' / f'{name}.py').write_text(python_source(name))
+    (folder / 'pkg' / 'tiny.py').write_text("x = 1\n")
+    monkeypatch.chdir(tmp_path)
+
+    stripped = []
+    original = codeweave.main.remove_comments_and_docstrings
+    monkeypatch.setattr(codeweave.main, 'remove_comments_and_docstrings',
+                        lambda source: stripped.append(source) or original(source))
+
+    output_file = run(folder, '--incremental')
+    first = read(output_file)
+    assert len(stripped) == 3
+    manifest = json.loads(read(manifest_path(output_file)))
+    assert set(manifest['files']) == {'pkg/alpha.py', 'pkg/beta.py', 'pkg/gamma.py', 'pkg/tiny.py'}
+    assert manifest['files']['pkg/tiny.py']['offset'] is None
+
+    # Nothing changed: every section is spliced from the previous output
+    stripped.clear()
+    assert read(run(folder, '--incremental')) == first
+    assert stripped == []
+
+    # Only the modified file is transformed again
+    (folder / 'pkg' / 'beta.py').write_text(python_source('beta_v2'))
+    output_file = run(folder, '--incremental')
+    assert len(stripped) == 1
+    content = read(output_file)
+    assert 'beta_v2_0 = 0' in content and 'alpha_0 = 0' in content and 'gamma_0 = 0' in content
+
+    # The result matches a full, non-incremental run
+    os.remove(output_file)
+    assert read(run(folder)) == content
+
+
+def test_incremental_ignores_manifest_for_other_options(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    (folder / 'module.py').write_text(python_source('module'))
+    monkeypatch.chdir(tmp_path)
+
+    run(folder, '--incremental')
+    output_file = run(folder, '--incremental', '--keep-comments')
+
+    assert '# comment' in read(output_file)
+
+
+def test_incremental_ignores_manifest_after_profiles_change(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    (folder / 'module.py').write_text(python_source('module'))
+    profiles_file = tmp_path / 'profiles.json'
+    profiles_file.write_text(json.dumps({'profiles': {'python': {'test_indicators': ['unused_marker']}}}))
+    monkeypatch.chdir(tmp_path)
+
+    assert 'module_0 = 0' in read(run(folder, '--incremental', '--profiles', str(profiles_file)))
+    # Same path, new contents: module.py now reads as a test file
+    profiles_file.write_text(json.dumps({'profiles': {'python': {'test_indicators': ['module_0']}}}))
+    output_file = run(folder, '--incremental', '--profiles', str(profiles_file))
+
+    # Nothing is left to write, so the stale output is dropped
+    assert not os.path.exists(output_file)
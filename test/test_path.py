@@ -0,0 +1,42 @@
+from codeweave.utils.path import ExtensionRegistry, file_extension_dict, is_file_type, lookup_file_extension
+
+
+def test_lookup_uses_multi_dot_suffixes():
+    registry = ExtensionRegistry({
+        'typescript': ['.ts'],
+        'typescript-declarations': ['.d.ts'],
+        'js': ['.js'],
+        'jstest': ['.test.js'],
+    })
+
+    assert registry.lookup('src/types/index.d.ts') == ['typescript', 'typescript-declarations']
+    assert registry.lookup('src/app.test.js') == ['js', 'jstest']
+    assert registry.lookup('src/app.js') == ['js']
+    assert registry.lookup('src/README') == []
+    assert registry.languages_for_suffix('.d.ts') == ['typescript-declarations']
+
+
+def test_index_follows_dict_updates():
+    registry = ExtensionRegistry({'python': ['.py']})
+
+    registry['cython'] = ['.pyx', '.py']
+    assert registry.lookup('mod.py') == ['python', 'cython']
+    registry['cython'] = ['.pyx']
+    assert registry.lookup('mod.py') == ['python']
+    del registry['python']
+    assert registry.lookup('mod.py') == []
+    registry.update({'rust': ['.rs']})
+    assert registry.languages_for_suffix('.rs') == ['rust']
+
+
+def test_lookup_file_extension_matches_registered_extensions(monkeypatch):
+    monkeypatch.setitem(file_extension_dict, 'vue', ['.vue'])
+
+    assert lookup_file_extension('components/App.vue') == ['vue']
+    assert 'python' in lookup_file_extension('pkg/module.py')
+    assert is_file_type('pkg/module.py', ['python'])
+    assert is_file_type('components/App.vue', ['.vue'])
+    assert not is_file_type('components/App.vue', ['python'])
+
+    monkeypatch.undo()
+    assert lookup_file_extension('components/App.vue') == []
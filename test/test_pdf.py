@@ -0,0 +1,92 @@
+import time
+import zipfile
+
+import pytest
+
+import codeweave.utils.pdf
+from codeweave.main import main
+from codeweave.utils.pdf import PdfOptions, PdfTimeout, extract_pdf_pages, parse_page_ranges, split_pages
+
+
+def make_pdf(pages):
+    """Build a minimal PDF with six lines of text per page."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        lines = ' T* '.join(f'({text} line {i}) Tj' for i in range(6))
+        stream = f'BT /F1 12 Tf 16 TL 72 720 Td {lines} ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+PDF = make_pdf([f'Page {number}' for number in range(1, 6)])
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges('1-3, 7,10-') == ((1, 3), (7, 7), (10, None))
+    assert parse_page_ranges('') == ()
+    for spec in ['0', '3-1', 'a', '1-2-3']:
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec)
+
+
+def test_page_selection():
+    pages = extract_pdf_pages(PDF, PdfOptions(pages=parse_page_ranges('2,4-')))
+    assert len(pages) == 3
+    assert 'Page 2 line 0' in pages[0] and 'Page 4 line 0' in pages[1] and 'Page 5 line 5' in pages[2]
+    assert not any('Page 1 ' in page or 'Page 3 ' in page for page in pages)
+    pages = extract_pdf_pages(PDF, PdfOptions(pages=parse_page_ranges('2-'), max_pages=2))
+    assert 'Page 3 line 0' in pages[1] and len(pages) == 2
+    # The cache keeps the pages joined
+    assert split_pages(''.join(pages)) == pages
+
+
+def test_timeout_keeps_extracted_pages(monkeypatch):
+    def slow_pages(fp, options):
+        for number in range(1, 100):
+            yield f'page {number}\n'
+            time.sleep(0.05)
+    monkeypatch.setattr(codeweave.utils.pdf, 'iter_page_texts', slow_pages)
+    with pytest.raises(PdfTimeout) as error:
+        extract_pdf_pages(PDF, PdfOptions(timeout=0.12))
+    assert error.value.pages[:2] == ['page 1\n', 'page 2\n']
+    assert 'truncated' in error.value.pages[-1]
+    assert len(error.value.pages) < 100
+
+
+@pytest.mark.parametrize('archive, extra', [(False, []), (True, []), (False, ['--incremental', '--topN', '3']),
+                                            (True, ['--dedup'])])
+def test_pdf_text_with_page_limit(tmp_path, monkeypatch, archive, extra):
+    folder = tmp_path / 'docs_src'
+    folder.mkdir()
+    (folder / 'spec.pdf').write_bytes(PDF)
+    monkeypatch.chdir(tmp_path)
+    source = str(folder)
+    if archive:
+        source = str(tmp_path / 'docs.zip')
+        with zipfile.ZipFile(source, 'w') as zf:
+            zf.write(folder / 'spec.pdf', 'docs/spec.pdf')
+
+    if not archive:
+        extra = [*extra, '--no-git-index']
+    output_file = main([source, '--lang', 'pdf', '--excluded_dirs', '', '--pdf_text_mode', '--pdf-max-pages', '2',
+                        *extra])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'Page 2 line 5' in content
+    assert 'Page 3 ' not in content
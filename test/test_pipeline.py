@@ -0,0 +1,76 @@
+import json
+import os
+import zipfile
+
+from codeweave.main import main
+from codeweave.utils.pipeline import OrderedPipeline
+
+
+def python_source(name, lines=20):
+    body = "\n".join(f"{name}_{i} = {i}  # comment {i}" for i in range(lines))
+    return f'"""Module {name}."""\n{body}\n'
+
+
+def make_project(folder):
+    (folder / 'pkg').mkdir(parents=True)
+    for i in range(12):
+        (folder / 'pkg' / f'mod{i:02d}.py').write_text(python_source(f'mod{i}'))
+    (folder / 'pkg' / 'test_mod.py').write_text("import pytest\n" + python_source('case'))
+    (folder / 'pkg' / 'broken.py').write_text("def broken(:\n" + python_source('broken'))
+    (folder / 'pkg' / 'blob.py').write_bytes(b'\x00' * 100)
+
+
+def square(x):
+    return x * x
+
+
+def test_ordered_pipeline_keeps_order():
+    consumed = []
+    with OrderedPipeline(lambda key, result: consumed.append((key, result)), jobs=2, depth=3) as pipeline:
+        for i in range(10):
+            if i % 3:
+                pipeline.submit(i, square, i)
+            else:
+                pipeline.put(i, -i)
+            assert len(pipeline.queue) <= 3
+    assert consumed == [(i, square(i) if i % 3 else -i) for i in range(10)]
+
+
+def test_parallel_folder_output_matches_sequential(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    make_project(folder)
+    monkeypatch.chdir(tmp_path)
+    common = [str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index']
+
+    sequential = main(common + ['--name_append', 'seq'])
+    parallel = main(common + ['--name_append', 'par', '--jobs', '2', '--audit'])
+
+    with open(sequential, encoding='utf-8') as f:
+        expected = f.read()
+    with open(parallel, encoding='utf-8') as f:
+        assert f.read() == expected
+    assert 'mod11_0' in expected and 'def broken(:' in expected and 'comment' not in expected
+    with open(parallel + '.audit.json', encoding='utf-8') as f:
+        audit = json.load(f)
+    assert audit['included']['files'] == 13
+    assert audit['rules']['test file']['hits'] == 1
+    assert audit['rules']['binary content']['hits'] == 1
+
+
+def test_parallel_zip_output_matches_sequential(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    make_project(folder)
+    archive = tmp_path / 'project.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                zf.write(path, os.path.relpath(path, tmp_path))
+    monkeypatch.chdir(tmp_path)
+    common = [str(archive), '--lang', 'python', '--excluded_dirs', '']
+
+    with open(main(common + ['--name_append', 'seq']), encoding='utf-8') as f:
+        expected = f.read()
+    with open(main(common + ['--name_append', 'par', '--jobs', '2']), encoding='utf-8') as f:
+        assert f.read() == expected
+    assert 'project/pkg/mod00.py' in expected
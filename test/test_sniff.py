@@ -0,0 +1,110 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import codeweave.main
+from codeweave.main import main
+from codeweave.utils.archive import iter_tar_members, iter_zip_members, open_tar_stream
+from codeweave.utils.sniff import SNIFF_SIZE, BinarySniffer, looks_binary
+
+PYTHON_SOURCE = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n"
+
+
+def test_looks_binary():
+    assert not looks_binary(b'')
+    assert not looks_binary(PYTHON_SOURCE.encode())
+    assert not looks_binary('# café\n'.encode('utf-8'))
+    # A multi-byte character cut at the end of the prefix is still text
+    assert not looks_binary('x = "é"'.encode('utf-8')[:-2])
+    assert looks_binary(b'\x89PNG\r\n\x1a\n' + b'a' * 100)
+    assert looks_binary(b'\x7fELF\x02\x01\x01')
+    assert looks_binary(b'text with a \x00 byte')
+    assert looks_binary(bytes(range(1, 32)) * 4)
+    assert looks_binary('café au lait'.encode('latin-1'))
+
+
+def test_short_magic_numbers_need_binary_evidence():
+    for text in [b'BMI calculator\n', b'MZ-80 emulator notes\n', b'ID3 tags explained\n',
+                 b'BZh is the bzip2 header\n', b'RIFF chunks\n']:
+        assert not looks_binary(text + PYTHON_SOURCE.encode())
+    # A bitmap header, and a DOS executable stub without a NUL in the prefix
+    assert looks_binary(b'BM\x36\x04\x01' + b'pixels' * 100)
+    assert looks_binary(b'MZ\x90\x03' + b'stub' * 100)
+
+
+def test_sniffer_caches_verdicts():
+    sniffer = BinarySniffer()
+    reads = []
+
+    def read(limit=-1):
+        reads.append(limit)
+        return b'\x00\x01\x02'
+    read.cache_key = ('zip', 1234, 3, 3)
+
+    assert sniffer.member_is_binary(read, 'a.py')
+    assert sniffer.member_is_binary(read, 'copy/a.py')
+    assert reads == [SNIFF_SIZE]
+    assert sniffer.binary == 1
+
+
+def test_member_readers_read_prefix_then_whole(tmp_path):
+    data = b'x = 1\n' * 4000
+    archive = tmp_path / 'repo.zip'
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('repo/a.py', data)
+    with zipfile.ZipFile(archive) as zf:
+        [(_, _, read)] = iter_zip_members(zf)
+        assert read(10) == data[:10]
+        assert read() == data
+
+    tarball = tmp_path / 'repo.tar.gz'
+    with tarfile.open(tarball, 'w:gz') as tar:
+        info = tarfile.TarInfo('repo/a.py')
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    with open(tarball, 'rb') as f, open_tar_stream(f, str(tarball)) as tar:
+        _, _, read = next(iter_tar_members(tar))
+        assert read(10) == data[:10]
+        assert read() == data
+
+
+def test_binary_content_skipped_without_full_read(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    (folder / 'module.py').write_text(PYTHON_SOURCE)
+    # Binary content behind a source extension, larger than the sniffed prefix
+    (folder / 'blob.py').write_bytes(b'\x7fELF' + b'\x00' * (4 * SNIFF_SIZE))
+    monkeypatch.chdir(tmp_path)
+
+    read_sizes = []
+    real_open = open
+
+    class RecordingFile:
+        def __init__(self, f):
+            self.f = f
+
+        def read(self, size=-1):
+            data = self.f.read(size)
+            read_sizes.append(len(data))
+            return data
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+    def recording_open(path, mode='r', *args, **kwargs):
+        f = real_open(path, mode, *args, **kwargs)
+        return RecordingFile(f) if str(path).endswith('blob.py') and 'b' in mode else f
+    monkeypatch.setattr(codeweave.main, 'open', recording_open, raising=False)
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index'])
+
+    assert sum(read_sizes) <= SNIFF_SIZE
+    with real_open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'module.py' in content
+    assert 'blob.py' not in content
+    os.remove(output_file)
@@ -0,0 +1,128 @@
+import zipfile
+
+import pytest
+
+from codeweave.main import main
+from codeweave.utils.strip import comment_syntax, parse_strip_languages, strip_comments
+
+
+def test_c_family_literals_keep_comment_markers():
+    source = (
+        '#include <stdio.h> // io\n'
+        '/* header\n'
+        '   comment */\n'
+        'int main() {\n'
+        '    char *url = "http://a/*b*/"; // c\n'
+        "    char q = '\"'; int a/**/= 1'000;\n"
+        '}\n'
+    )
+    assert strip_comments(source, 'cpp') == (
+        '#include <stdio.h>\n'
+        'int main() {\n'
+        '    char *url = "http://a/*b*/";\n'
+        "    char q = '\"'; int a = 1'000;\n"
+        '}\n'
+    )
+    assert strip_comments('auto s = R"x(// )" )x"; // c\n', 'cpp') == 'auto s = R"x(// )" )x";\n'
+
+
+def test_js_regex_and_template_literals():
+    source = (
+        'const re = /\\/\\/[^/]*/g; // regex\n'
+        'let x = a / b / c; // division\n'
+        'const t = `// ${b} /* c */`;\n'
+        '/// <reference path="x" />\n'
+    )
+    assert strip_comments(source, 'js') == (
+        'const re = /\\/\\/[^/]*/g;\n'
+        'let x = a / b / c;\n'
+        'const t = `// ${b} /* c */`;\n'
+        '/// <reference path="x" />\n'
+    )
+
+
+def test_js_nested_template_literals():
+    source = (
+        'const url = `${secure ? `https://${host}` : base}/api`; // c\n'
+        'const s = `a ${ {k: "}`//"}.k } b`; /* d */ f(1);\n'
+        'const x = 1; // e\n'
+    )
+    assert strip_comments(source, 'js') == (
+        'const url = `${secure ? `https://${host}` : base}/api`;\n'
+        'const s = `a ${ {k: "}`//"}.k } b`;  f(1);\n'
+        'const x = 1;\n'
+    )
+    # An unbalanced template keeps the rest of the file as written
+    unbalanced = 'let a; // c\nlet t = `${ `x` ;\nlet b; // kept\n'
+    assert strip_comments(unbalanced, 'js') == 'let a;\nlet t = `${ `x` ;\nlet b; // kept\n'
+
+
+def test_go_lua_and_shell():
+    go = 'package main\n//go:build linux\n// Doc\nvar s = `raw // not` // c\n'
+    assert strip_comments(go, 'go') == 'package main\n//go:build linux\nvar s = `raw // not`\n'
+    lua = 'local s = [[ -- not ]] -- yes\n--[==[ block\n]==]\nprint("--x")\n'
+    assert strip_comments(lua, 'lua') == 'local s = [[ -- not ]]\nprint("--x")\n'
+    shell = '#!/bin/bash\n# comment\necho "$#" ${#a[@]} \'# x\' # trailing\n'
+    assert strip_comments(shell, 'shell') == '#!/bin/bash\necho "$#" ${#a[@]} \'# x\'\n'
+
+
+def test_shell_heredoc_bodies_are_kept():
+    shell = (
+        'cat <<EOF > config.ini # write it\n'
+        '# not a comment\n'
+        'key = 1\n'
+        'EOF\n'
+        'cat <<-\'END\'\n'
+        '\t# also data\n'
+        '\tEND\n'
+        'echo $((1 << 2)) # shift\n'
+        'read x <<< "$y" # here-string\n'
+    )
+    assert strip_comments(shell, 'shell') == (
+        'cat <<EOF > config.ini # write it\n'
+        '# not a comment\n'
+        'key = 1\n'
+        'EOF\n'
+        'cat <<-\'END\'\n'
+        '\t# also data\n'
+        '\tEND\n'
+        'echo $((1 << 2))\n'
+        'read x <<< "$y"\n'
+    )
+
+
+def test_c_header_names_are_literals():
+    source = '#include <a//b> // c\n#  include_next <x/*y*/z.h>\n#if __has_include(<p//q>)\n#endif\n'
+    expected = '#include <a//b>\n#  include_next <x/*y*/z.h>\n#if __has_include(<p//q>)\n#endif\n'
+    assert strip_comments(source, 'c') == expected
+    assert strip_comments(source, 'cpp') == expected
+    assert strip_comments('int x = a < b; // c > d\n', 'c') == 'int x = a < b;\n'
+
+
+def test_unterminated_literal_keeps_the_rest():
+    source = 'int a; // c\nchar *s = "open // kept\nint b; // kept\n'
+    assert strip_comments(source, 'c') == 'int a;\nchar *s = "open // kept\nint b; // kept\n'
+
+
+def test_language_selection():
+    assert parse_strip_languages('go, js') == ['go', 'js']
+    assert 'shell' in parse_strip_languages('all')
+    with pytest.raises(ValueError):
+        parse_strip_languages('go,cobol')
+    assert comment_syntax('src/a.h', ['cpp']) == 'cpp'
+    assert comment_syntax('src/a.ts', ['typescript']) == 'js'
+    assert comment_syntax('src/a.go', ['python']) is None
+
+
+def test_zip_strips_selected_languages_only(tmp_path, monkeypatch):
+    body = "\n".join(f"x{i} := {i} // note {i}" for i in range(12))
+    archive = tmp_path / 'repo.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('repo/main.go', f"package main\n{body}\n")
+        zf.writestr('repo/app.js', body.replace(':=', '=') + "\n")
+    monkeypatch.chdir(tmp_path)
+
+    with open(main([str(archive), '--lang', 'go,js', '--strip-comments', 'go']), encoding='utf-8') as f:
+        content = f.read()
+    assert 'x0 := 0\n' in content
+    assert 'x0 = 0 // note 0' in content
@@ -0,0 +1,119 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from codeweave.main import main
+from codeweave.utils.walk import list_git_files, walk_files
+
+
+def make_tree(root, paths):
+    for path in paths:
+        full_path = root / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text("x = 1\n")
+
+
+def test_walk_files_prunes_excluded_and_hidden_dirs(tmp_path):
+    make_tree(tmp_path, [
+        'setup.cfg',
+        'src/app.py',
+        'src/pkg/core.py',
+        'node_modules/lib/index.js',
+        '.venv/lib/site.py',
+        'src/.cache/blob.py',
+        '.hidden_file.py',
+    ])
+    listed = []
+
+    entries = list(walk_files(str(tmp_path), ['node_modules'],
+                              on_directory=lambda rel_dir, count: listed.append((rel_dir, count))))
+
+    assert [entry.rel_path for entry in entries] == [
+        '.hidden_file.py', 'setup.cfg', 'src/app.py', 'src/pkg/core.py',
+    ]
+    assert listed == [('', 2), ('src', 1), ('src/pkg', 1)]
+    assert entries[2].path == os.path.join(str(tmp_path), 'src', 'app.py')
+    assert entries[2].stat().st_size == len("x = 1\n")
+
+
+def git(root, *args):
+    subprocess.run(['git', '-C', str(root), *args], check=True, capture_output=True)
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_list_git_files_uses_the_index(tmp_path):
+    make_tree(tmp_path, [
+        'src/app.py',
+        'src/vendor/lib.py',
+        'build/generated.py',
+        'scratch.py',
+        'README.md',
+    ])
+    (tmp_path / '.gitignore').write_text("build/\n")
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', 'src', 'README.md', '.gitignore')
+
+    tracked = list_git_files(str(tmp_path), ['vendor'])
+    with_untracked = list_git_files(str(tmp_path), ['vendor'], include_untracked=True)
+
+    assert [entry.rel_path for entry in tracked] == ['.gitignore', 'README.md', 'src/app.py']
+    assert [entry.rel_path for entry in with_untracked] == ['.gitignore', 'README.md', 'scratch.py', 'src/app.py']
+
+
+def test_list_git_files_outside_a_work_tree(tmp_path):
+    make_tree(tmp_path, ['app.py'])
+    assert list_git_files(str(tmp_path)) is None
+
+
+@pytest.mark.parametrize('options', [
+    [],
+    ['--no-git-index'],
+    ['--no-git-index', '--no-gitignore'],
+])
+def test_folder_prunes_language_excluded_dirs(tmp_path, monkeypatch, options):
+    folder = tmp_path / 'project'
+    source = "".join(f"value_{i} = {i}\n" for i in range(12))
+    for path in ['src/app.py', 'web/main.js', 'build/gen.py', 'node_modules/x/index.js',
+                 'src/__pycache__/app.py', 'web/dist/bundle.js']:
+        full_path = folder / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(source)
+    if shutil.which('git') is not None:
+        git(folder, 'init', '-q')
+        git(folder, 'add', '-f', '.')
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(folder), '--lang', 'python,js', '--excluded_dirs', '', *options])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'src/app.py' in content and 'web/main.js' in content
+    for pruned in ['build/', 'node_modules/', '__pycache__/', 'dist/']:
+        assert pruned not in content
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+@pytest.mark.parametrize('tracked_only, no_gitignore', [(False, False), (True, False), (False, True)])
+def test_folder_includes_untracked_files_by_default(tmp_path, monkeypatch, tracked_only, no_gitignore):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    source = "".join(f"value_{i} = {i}\n" for i in range(12))
+    for name in ['tracked.py', 'new_work.py', 'ignored.py']:
+        (folder / name).write_text(source)
+    (folder / '.gitignore').write_text("ignored.py\n")
+    git(folder, 'init', '-q')
+    git(folder, 'add', 'tracked.py', '.gitignore')
+    monkeypatch.chdir(tmp_path)
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '',
+                        *(['--tracked-only'] if tracked_only else []),
+                        *(['--no-gitignore'] if no_gitignore else [])])
+
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'tracked.py' in content
+    assert ('new_work.py' in content) is not tracked_only
+    # --no-gitignore applies to the git index too
+    assert ('ignored.py' in content) is no_gitignore
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+import codeweave.main
+from codeweave.main import main
+from codeweave.utils.walk import walk_files
+from codeweave.utils.watch import INOTIFY_AVAILABLE, InotifyWatcher, PollingWatcher
+
+
+def python_source(name):
+    return "\n".join(f"{name}_{i} = {i}" for i in range(20)) + "\n"
+
+
+class ScriptedWatcher:
+    """Replays a list of poll() results, then stops the watch loop."""
+
+    def __init__(self, events):
+        self.events = list(events)
+
+    def poll(self, timeout=None):
+        if timeout is not None:
+            return set(), False
+        if not self.events:
+            raise KeyboardInterrupt
+        action, result = self.events.pop(0)
+        action()
+        return result
+
+    def close(self):
+        pass
+
+
+def test_watch_updates_changed_sections(tmp_path, monkeypatch):
+    folder = tmp_path / 'project'
+    folder.mkdir()
+    for name in ['alpha', 'beta']:
+        (folder / f'{name}.py').write_text(python_source(name))
+    monkeypatch.chdir(tmp_path)
+
+    rendered = []
+    original = codeweave.main.render_folder_file
+    monkeypatch.setattr(codeweave.main, 'render_folder_file',
+                        lambda entry, *args, **kwargs: rendered.append(entry.rel_path) or original(entry, *args, **kwargs))
+    watcher = ScriptedWatcher([
+        (lambda: (folder / 'beta.py').write_text(python_source('beta_v2')), ({'beta.py'}, False)),
+        (lambda: (folder / 'gamma.py').write_text(python_source('gamma')), ({'gamma.py'}, False)),
+        (lambda: os.remove(folder / 'alpha.py'), ({'alpha.py'}, False)),
+    ])
+    monkeypatch.setattr(codeweave.main, 'create_watcher', lambda *args, **kwargs: watcher)
+
+    output_file = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index', '--watch'])
+
+    # beta.py was re-rendered alone; the new gamma.py triggered an incremental run
+    assert rendered == ['alpha.py', 'beta.py', 'beta.py', 'gamma.py']
+    with open(output_file, encoding='utf-8') as f:
+        content = f.read()
+    assert 'alpha_0' not in content
+    assert content.index('beta_v2_0 = 0') < content.index('gamma_0 = 0')
+
+    os.remove(output_file)
+    fresh_output = main([str(folder), '--lang', 'python', '--excluded_dirs', '', '--no-git-index'])
+    with open(fresh_output, encoding='utf-8') as f:
+        assert f.read() == content
+
+
+def test_polling_watcher_reports_changes(tmp_path):
+    (tmp_path / 'a.py').write_text("a = 1\n")
+    watcher = PollingWatcher(lambda: walk_files(str(tmp_path)), interval=0)
+
+    (tmp_path / 'a.py').write_text("a = 22\n")
+    (tmp_path / 'b.py').write_text("b = 1\n")
+
+    assert watcher.poll() == ({'a.py', 'b.py'}, False)
+    assert watcher.poll() == (set(), False)
+
+
+@pytest.mark.skipif(not INOTIFY_AVAILABLE, reason="inotify is not available")
+def test_inotify_watcher_reports_changes(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'node_modules').mkdir()
+    watcher = InotifyWatcher(str(tmp_path), excluded_dirs=['node_modules'])
+    try:
+        (tmp_path / 'src' / 'a.py').write_text("a = 1\n")
+        (tmp_path / 'node_modules' / 'b.js').write_text("b\n")
+        time.sleep(0.05)
+        assert watcher.poll(1) == ({'src/a.py'}, False)
+
+        (tmp_path / 'src' / 'pkg').mkdir()
+        changed, rescan = watcher.poll(1)
+        assert rescan
+    finally:
+        watcher.close()